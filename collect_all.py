@@ -2,77 +2,101 @@
 """
 collect_all.py - Master Data Collection Script
 
-Runs all resource collection scripts in sequence:
+Runs all resource collectors concurrently, in-process:
 1. Headlines (RSS, Google News, YouTube, GDELT)
 2. Government news
 3. Weather data
 
-Saves all outputs to jsons/ folder ready for pipeline.py to process.
+Each collector is imported as a module (no extra interpreter per source),
+and its result is written atomically to an absolute path under jsons/, ready
+for pipeline.py to process. Wall time is that of the slowest source.
 """
 
+import importlib
+import json
+import os
 import sys
-import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Dict, List
 
 ROOT = Path(__file__).resolve().parent
-RESOURCES = ROOT / "resources"
-
-# Scripts to run (in order)
-COLLECTION_SCRIPTS = [
-    RESOURCES / "headlines" / "headline_ocean.py",
-    RESOURCES / "gov" / "gov.py",
-    RESOURCES / "weather" / "weather.py",
-]
-
-def run_script(script_path):
-    """Run a Python script and return success status."""
-    print(f"\n{'='*60}")
-    print(f"Running: {script_path.name}")
-    print('='*60)
-    
+JSONS_DIR = ROOT / "jsons"
+
+sys.path.append(str(ROOT))
+
+# Collectors to run: name -> (module, output file)
+COLLECTORS = {
+    "headlines": ("resources.headlines.headline_ocean", JSONS_DIR / "sri_lanka_news.json"),
+    "gov": ("resources.gov.gov", JSONS_DIR / "government_news.json"),
+    "weather": ("resources.weather.weather", JSONS_DIR / "srilanka_weather.json"),
+}
+
+
+def atomic_write_json(path: Path, data: Any) -> int:
+    """Write JSON via a temp file + rename so readers never see a partial file. Returns bytes written."""
+    payload = json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return len(payload)
+
+
+def run_collector(name: str, module_name: str, output_path: Path) -> Dict[str, Any]:
+    """Import a collector module, run its collect() and persist the result."""
+    start = time.perf_counter()
+    result = {"source": name, "ok": False, "count": 0, "bytes": 0, "duration": 0.0,
+              "output": str(output_path), "error": None}
     try:
-        result = subprocess.run(
-            [sys.executable, str(script_path)],
-            cwd=script_path.parent,
-            capture_output=False,
-            text=True
-        )
-        
-        if result.returncode == 0:
-            print(f"✓ {script_path.name} completed successfully")
-            return True
-        else:
-            print(f"✗ {script_path.name} failed with code {result.returncode}")
-            return False
-            
+        module = importlib.import_module(module_name)
+        data = module.collect()
+        result["count"] = len(data)
+        result["bytes"] = atomic_write_json(output_path, data)
+        result["ok"] = True
     except Exception as e:
-        print(f"✗ Error running {script_path.name}: {e}")
-        return False
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["duration"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def collect_all(sources: List[str] = None) -> List[Dict[str, Any]]:
+    """Run the selected collectors (default: all) in parallel and return per-source results."""
+    names = sources or list(COLLECTORS)
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        futures = [pool.submit(run_collector, n, *COLLECTORS[n]) for n in names]
+        return [f.result() for f in futures]
+
 
 def main():
     print("\n" + "="*60)
     print(" DATA COLLECTION - Master Script")
     print("="*60)
-    
-    success_count = 0
-    
-    for script in COLLECTION_SCRIPTS:
-        if not script.exists():
-            print(f"⚠ Script not found: {script}")
-            continue
-            
-        if run_script(script):
-            success_count += 1
-    
+
+    start = time.perf_counter()
+    results = collect_all()
+    wall = time.perf_counter() - start
+
+    for r in results:
+        if r["ok"]:
+            print(f"✓ {r['source']}: {r['count']} items, {r['bytes']} bytes in {r['duration']}s → {r['output']}")
+        else:
+            print(f"✗ {r['source']} failed after {r['duration']}s: {r['error']}")
+
+    success_count = sum(1 for r in results if r["ok"])
     print("\n" + "="*60)
-    print(f" COLLECTION COMPLETE: {success_count}/{len(COLLECTION_SCRIPTS)} successful")
+    print(f" COLLECTION COMPLETE: {success_count}/{len(results)} successful in {wall:.1f}s")
     print("="*60)
-    
-    if success_count == len(COLLECTION_SCRIPTS):
+
+    if success_count == len(results):
         print("\n✓ All data collected. Ready to run pipeline.py")
         return 0
     else:
-        print("\n⚠ Some collection scripts failed. Check outputs above.")
+        print("\n⚠ Some collectors failed. Check outputs above.")
         return 1
 
 if __name__ == "__main__":
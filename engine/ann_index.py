@@ -0,0 +1,353 @@
+"""
+engine/ann_index.py
+
+Approximate-nearest-neighbour index over every processed headline.
+
+Headlines are embedded by feature hashing: each word (and, at half
+weight, each bigram) from engine/text_tokens.py adds a signed weight to one
+of DIM dimensions, and the vector is L2-normalised. The embedding needs no
+model and never changes, so vectors stay comparable across years of runs.
+Cosine similarity is a dot product.
+
+Layout under history/ann/:
+    meta.json        count, training state and the live lists/centroids file names,
+                     applied snapshots, recently embedded event ids
+    vectors.f32      count x DIM float32 (little-endian), in insertion order
+    ids.bin          count x ID_WIDTH bytes, NUL-padded event ids
+    lists.i32        IVF list of each vector (-1 before training)
+    lists.<n>.i32    the same after the n-th training
+    centroids.<n>.f32  NLIST x DIM unit centroids of the n-th training
+
+Until TRAIN_MIN vectors exist, search is an exact scan. At that point (with
+numpy installed) spherical k-means trains NLIST centroids, and every vector
+is assigned to its nearest one. New vectors are assigned as they are
+appended. A query scans only the NPROBE lists whose centroids are closest,
+i.e. about NPROBE / NLIST of the index.
+
+An event is embedded once: ids seen within HORIZON_DAYS (longer than the
+event window) are skipped when they reappear in later runs, as in the
+search index.
+
+Appends follow the columnar archive's rules (engine/index_meta.py): bytes
+only go to file ends, meta.json is replaced last, and uncommitted bytes are
+truncated before the next append. Training writes new lists/centroids files
+next to the live ones and only removes the old pair once meta.json names
+the new one, so readers never mix a training's lists with another's
+centroids.
+
+CLI:
+    python engine/ann_index.py build                 # rebuild from the history store
+    python engine/ann_index.py train                 # (re)train the IVF centroids
+    python engine/ann_index.py query "fuel price cut" [-k 10]
+"""
+
+import calendar
+import hashlib
+import mmap
+import shutil
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from engine.index_meta import AppliedSnapshots, RecentIds, commit_meta, load_meta
+    from engine.rollups import parse_ts
+    from engine.text_tokens import bigrams, headline_events, words
+except ImportError:
+    from index_meta import AppliedSnapshots, RecentIds, commit_meta, load_meta
+    from rollups import parse_ts
+    from text_tokens import bigrams, headline_events, words
+
+DIM = 128
+ID_WIDTH = 24
+NLIST = 1024
+# Exact search below this many vectors; IVF training once it is reached
+TRAIN_MIN = 32 * NLIST
+TRAIN_SAMPLE = 32768
+TRAIN_ITERATIONS = 10
+NPROBE = 8
+BIGRAM_WEIGHT = 0.5
+HORIZON_DAYS = 7
+
+META_FILENAME = "meta.json"
+VECTORS, IDS, LISTS, CENTROIDS = "vectors.f32", "ids.bin", "lists.i32", "centroids.f32"
+UNASSIGNED = -1
+
+
+def embed(text: str) -> array:
+    """Unit-length hashed embedding of a headline (all zeros if it has no words)."""
+    vec = [0.0] * DIM
+    tokens = words(text)
+    for feature, weight in [(t, 1.0) for t in tokens] + [(b, BIGRAM_WEIGHT) for b in bigrams(tokens)]:
+        h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        vec[h % DIM] += weight if (h >> 32) & 1 else -weight
+    norm = sum(v * v for v in vec) ** 0.5
+    return array("f", [v / norm for v in vec] if norm else vec)
+
+
+def _nearest(centroids: array, vec: array) -> int:
+    """Index of the centroid with the largest dot product (scalar path)."""
+    best, best_dot = UNASSIGNED, float("-inf")
+    for c in range(len(centroids) // DIM):
+        row = centroids[c * DIM:(c + 1) * DIM]
+        dot = sum(a * b for a, b in zip(row, vec))
+        if dot > best_dot:
+            best, best_dot = c, dot
+    return best
+
+
+def train_centroids(sample: "np.ndarray", nlist: int, iterations: int = TRAIN_ITERATIONS, seed: int = 0) -> "np.ndarray":
+    """Spherical k-means: unit centroids maximising the dot product with their members."""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = np.bincount(assign, minlength=nlist) == 0
+        # Re-seed empty lists from random vectors
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return centroids.astype(np.float32)
+
+
+def assign_lists(vectors: "np.ndarray", centroids: "np.ndarray", chunk: int = 65536) -> "np.ndarray":
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk):
+        out[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+    return out
+
+
+class AnnIndex:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.meta_path = self.root / META_FILENAME
+        self.meta = load_meta(self.meta_path, {"dim": DIM, "count": 0, "nlist": 0, "applied_through": "",
+                                               "applied_ids": [], "recent": {}, "trainings": 0,
+                                               "lists": LISTS, "centroids": CENTROIDS}, "ANN index")
+
+    def path(self, name: str) -> Path:
+        return self.root / name
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    @property
+    def trained(self) -> bool:
+        return self.meta["nlist"] > 0
+
+    def _commit(self, **changes):
+        self.meta = dict(self.meta, **changes)
+        commit_meta(self.meta_path, self.meta)
+
+    def _truncate_uncommitted(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        count = self.meta["count"]
+        for name, size in ((VECTORS, count * DIM * 4), (IDS, count * ID_WIDTH), (self.meta["lists"], count * 4)):
+            path = self.path(name)
+            if not path.exists() or path.stat().st_size != size:
+                with path.open("ab") as f:
+                    f.truncate(size)
+        # Training files meta.json does not name: an interrupted training, or an old pair left behind
+        live = {self.meta["lists"], self.meta["centroids"]}
+        for path in list(self.root.glob("lists.*")) + list(self.root.glob("centroids.*")):
+            if path.name not in live:
+                path.unlink(missing_ok=True)
+
+    def _centroids(self) -> array:
+        table = array("f")
+        if self.trained:
+            with self.path(self.meta["centroids"]).open("rb") as f:
+                table.frombytes(f.read())
+            if sys.byteorder != "little":
+                table.byteswap()
+        return table
+
+    # ---- appending ----
+    def append_many(self, snapshots: Iterable[Dict[str, Any]]) -> int:
+        """Embed and append the events of snapshots (in time order); already-applied snapshots are skipped."""
+        self._truncate_uncommitted()
+        applied = AppliedSnapshots(self.meta)
+        recent = RecentIds(self.meta["recent"], HORIZON_DAYS)
+        vectors, lists, ids = array("f"), array("i"), bytearray()
+        centroids = self._centroids()
+        matrix = np.frombuffer(centroids, dtype="<f4").reshape(-1, DIM) if np is not None and self.trained else None
+
+        added = 0
+        for snapshot in snapshots:
+            if not applied.is_new(snapshot):
+                continue
+            run_at = calendar.timegm(parse_ts(snapshot["run_timestamp"]).timetuple())
+            recent.start_run(run_at)
+            for event in headline_events(snapshot):
+                event_id = event.get("id")
+                if not event_id or len(event_id) > ID_WIDTH or not recent.add(event_id, run_at):
+                    continue
+                vec = embed(event.get("text", ""))
+                vectors.extend(vec)
+                ids += event_id.encode("ascii").ljust(ID_WIDTH, b"\0")
+                if matrix is not None:
+                    lists.append(int(np.argmax(matrix @ np.frombuffer(vec, dtype=np.float32))))
+                else:
+                    lists.append(_nearest(centroids, vec) if self.trained else UNASSIGNED)
+            applied.mark(snapshot)
+            added += 1
+
+        if not added:
+            return 0
+        if sys.byteorder != "little":
+            vectors.byteswap()
+            lists.byteswap()
+        with self.path(VECTORS).open("ab") as f:
+            vectors.tofile(f)
+        with self.path(self.meta["lists"]).open("ab") as f:
+            lists.tofile(f)
+        with self.path(IDS).open("ab") as f:
+            f.write(ids)
+        self._commit(count=self.meta["count"] + len(lists), recent=recent.seen, **applied.meta())
+        if not self.trained and len(self) >= TRAIN_MIN and np is not None:
+            self.train()
+        return added
+
+    def append(self, snapshot: Dict[str, Any]) -> bool:
+        return self.append_many([snapshot]) == 1
+
+    def train(self, nlist: int = NLIST):
+        """(Re)train the IVF centroids on a sample and reassign every vector (requires numpy)."""
+        count = len(self)
+        nlist = min(nlist, count)
+        if np is None or nlist == 0:
+            return
+        vectors = np.memmap(self.path(VECTORS), dtype="<f4", mode="r", shape=(count, DIM))
+        rng = np.random.default_rng(0)
+        sample = np.asarray(vectors[np.sort(rng.choice(count, min(count, TRAIN_SAMPLE), replace=False))])
+        centroids = train_centroids(sample, nlist)
+        lists = assign_lists(vectors, centroids)
+        trainings = self.meta["trainings"] + 1
+        names = {"centroids": f"centroids.{trainings}.f32", "lists": f"lists.{trainings}.i32"}
+        centroids.astype("<f4").tofile(self.path(names["centroids"]))
+        lists.astype("<i4").tofile(self.path(names["lists"]))
+        old = (self.meta["centroids"], self.meta["lists"])
+        self._commit(nlist=nlist, trainings=trainings, **names)
+        for name in old:
+            self.path(name).unlink(missing_ok=True)
+        print(f"[ANN] Trained {nlist} lists over {count} vectors")
+
+    # ---- searching ----
+    def searcher(self) -> "AnnSearcher":
+        return AnnSearcher(self)
+
+
+class AnnSearcher:
+    """Read-only view of the committed vectors (memory-mapped), with the IVF lists grouped for probing."""
+
+    def __init__(self, index: AnnIndex):
+        self.index = index
+        self.count = len(index)
+        self.nlist = index.meta["nlist"]
+        self._maps: List[mmap.mmap] = []
+        if self.count == 0:
+            return
+        if np is not None:
+            self.vectors = np.memmap(index.path(VECTORS), dtype="<f4", mode="r", shape=(self.count, DIM))
+            self.ids = np.memmap(index.path(IDS), dtype=f"S{ID_WIDTH}", mode="r", shape=(self.count,))
+            if self.nlist:
+                lists = np.memmap(index.path(index.meta["lists"]), dtype="<i4", mode="r", shape=(self.count,))
+                self.centroids = np.fromfile(index.path(index.meta["centroids"]), dtype="<f4").reshape(self.nlist, DIM)
+                # Vector rows grouped by list: rows of list c are order[bounds[c]:bounds[c + 1]]
+                self.order = np.argsort(lists, kind="stable")
+                self.bounds = np.concatenate(([0], np.cumsum(np.bincount(lists, minlength=self.nlist))))
+        else:
+            self.vectors = self._map(VECTORS, self.count * DIM * 4).cast("f")
+            self.ids = self._map(IDS, self.count * ID_WIDTH)
+
+    def _map(self, name: str, size: int) -> memoryview:
+        with self.index.path(name).open("rb") as f:
+            mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped)
+
+    def _id(self, row: int) -> str:
+        if np is not None:
+            return self.ids[row].decode("ascii")
+        return bytes(self.ids[row * ID_WIDTH:(row + 1) * ID_WIDTH]).rstrip(b"\0").decode("ascii")
+
+    def search(self, vec: array, k: int = 10, nprobe: int = NPROBE, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Up to k (event id, cosine) pairs, most similar first; each event id once."""
+        if self.count == 0:
+            return []
+        if np is None:
+            return self._search_scalar(vec, k, exclude)
+        q = np.frombuffer(vec, dtype=np.float32)
+        if self.nlist:
+            probe = np.argsort(-(self.centroids @ q))[:nprobe]
+            # Sorted rows turn the gather into forward reads of the memory map
+            rows = np.sort(np.concatenate([self.order[self.bounds[c]:self.bounds[c + 1]] for c in probe]))
+            if len(rows) == 0:
+                return []
+            sims = self.vectors[rows] @ q
+        else:
+            rows = np.arange(self.count)
+            sims = np.asarray(self.vectors @ q)
+        # A few extra candidates so duplicates / the excluded id cannot leave the result short
+        take = min(len(rows), k + 8)
+        top = np.argpartition(-sims, take - 1)[:take]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return self._collect(((int(rows[i]), float(sims[i])) for i in top), k, exclude)
+
+    def _search_scalar(self, vec: array, k: int, exclude: Optional[str]) -> List[Tuple[str, float]]:
+        vectors = self.vectors
+        sims = []
+        for row in range(self.count):
+            base = row * DIM
+            sims.append((sum(vectors[base + j] * vec[j] for j in range(DIM)), row))
+        sims.sort(key=lambda s: -s[0])
+        return self._collect(((row, sim) for sim, row in sims), k, exclude)
+
+    def _collect(self, ranked: Iterable[Tuple[int, float]], k: int, exclude: Optional[str]) -> List[Tuple[str, float]]:
+        out, seen = [], {exclude}
+        for row, sim in ranked:
+            event_id = self._id(row)
+            if event_id in seen:
+                continue
+            seen.add(event_id)
+            out.append((event_id, round(sim, 4)))
+            if len(out) >= k:
+                break
+        return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    root = Path(__file__).resolve().parent.parent
+    sys.path.append(str(root))
+    from engine.history_store import HistoryStore
+
+    p = argparse.ArgumentParser(description="ANN index over processed headlines")
+    p.add_argument("cmd", choices=["build", "train", "query"])
+    p.add_argument("text", nargs="?")
+    p.add_argument("-k", type=int, default=10)
+    args = p.parse_args()
+
+    ann_dir = root / "history" / "ann"
+    if args.cmd == "build":
+        shutil.rmtree(ann_dir, ignore_errors=True)
+        history = HistoryStore(root / "history")
+        index = AnnIndex(ann_dir)
+        entries = history.entries()
+        count = 0
+        for start in range(0, len(entries), 500):
+            count += index.append_many(history.read_many(entries[start:start + 500]))
+        print(f"[OK] Indexed {len(index)} headlines from {count} snapshots → {ann_dir}")
+    elif args.cmd == "train":
+        AnnIndex(ann_dir).train()
+    else:
+        for event_id, sim in AnnIndex(ann_dir).searcher().search(embed(args.text or ""), args.k):
+            print(f"{sim:.4f}  {event_id}")
@@ -0,0 +1,238 @@
+"""
+engine/canonical_urls.py
+
+Canonical URL index used for exact cross-source story deduplication.
+
+The same article reaches us through the RSS feeds, Google News redirect
+links and GDELT with different `link`/`url` values. Every link is reduced
+to a canonical form (tracking parameters stripped, host normalised, Google
+News wrappers unwrapped offline) and recorded in a persistent index so the
+pipeline can skip stories it has already processed before hashing text or
+running inference. Entries expire HORIZON_DAYS after they were first seen,
+longer than the feeds keep an item, so the index does not grow forever.
+
+Offline fixtures and their expected canonical forms live in
+fixtures/canonical_urls/ (exercised by test_canonical_urls.py).
+"""
+
+import base64
+import binascii
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+try:
+    from engine.event_query import parse_time
+except ImportError:
+    from event_query import parse_time
+
+HORIZON_DAYS = 7
+
+# Query parameters that only carry campaign / click tracking information
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "oc", "ocid", "cmpid", "ref", "ref_src", "referrer", "via", "ito", "spm", "_ga",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_", "__")
+
+# Host prefixes that point at the same site as the bare domain
+HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+
+# Redirect wrappers that carry the target URL in a query parameter
+REDIRECT_PARAMS = {
+    "news.google.com": ("url",),
+    "google.com": ("q", "url"),
+    "l.facebook.com": ("u",),
+}
+
+GOOGLE_NEWS_HOSTS = {"news.google.com"}
+
+
+def _normalise_host(netloc: str, scheme: str) -> str:
+    host = netloc.lower().rsplit("@", 1)[-1]
+    if (scheme == "http" and host.endswith(":80")) or (scheme == "https" and host.endswith(":443")):
+        host = host.rsplit(":", 1)[0]
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix) and host.count(".") >= 2:
+            host = host[len(prefix):]
+            break
+    return host.rstrip(".")
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def _read_varint(data: bytes, pos: int):
+    result = 0
+    shift = 0
+    while pos < len(data):
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+    return None, pos
+
+
+def decode_google_news_article(article_id: str) -> Optional[str]:
+    """
+    Decode the target URL embedded in a Google News `/articles/<id>` link.
+
+    Older article ids are a base64url protobuf whose first string field is
+    the publisher URL. Newer opaque ids need a network round trip to
+    resolve, so they return None and the wrapper URL is kept as-is.
+    """
+    try:
+        padded = article_id + "=" * (-len(article_id) % 4)
+        data = base64.urlsafe_b64decode(padded)
+    except (binascii.Error, ValueError):
+        return None
+
+    # Look for the first length-delimited field holding an http(s) URL
+    pos = 0
+    while pos < len(data):
+        tag = data[pos]
+        pos += 1
+        wire_type = tag & 0x07
+        if wire_type == 0:
+            _, pos = _read_varint(data, pos)
+        elif wire_type == 2:
+            length, pos = _read_varint(data, pos)
+            if length is None or pos + length > len(data):
+                return None
+            chunk = data[pos:pos + length]
+            pos += length
+            if chunk.startswith((b"http://", b"https://")):
+                try:
+                    return chunk.decode("utf-8")
+                except UnicodeDecodeError:
+                    return None
+        else:
+            return None
+    return None
+
+
+def _unwrap_redirect(parts) -> Optional[str]:
+    host = _normalise_host(parts.netloc, parts.scheme.lower())
+
+    if host in GOOGLE_NEWS_HOSTS:
+        segments = [s for s in parts.path.split("/") if s]
+        if len(segments) >= 2 and segments[-2] == "articles":
+            target = decode_google_news_article(segments[-1])
+            if target:
+                return target
+
+    params = REDIRECT_PARAMS.get(host)
+    if params:
+        query = dict(parse_qsl(parts.query, keep_blank_values=False))
+        for name in params:
+            target = query.get(name)
+            if target and target.startswith(("http://", "https://")):
+                return target
+    return None
+
+
+def canonicalize_url(url: Any) -> Optional[str]:
+    """Return the canonical form of a story link, or None if it is unusable."""
+    if not url or not isinstance(url, str):
+        return None
+    url = url.strip()
+    if not url.startswith(("http://", "https://")):
+        return None
+
+    parts = urlsplit(url)
+    # Unwrap redirectors (possibly nested) before normalising
+    for _ in range(3):
+        target = _unwrap_redirect(parts)
+        if not target:
+            break
+        parts = urlsplit(target.strip())
+
+    scheme = parts.scheme.lower()
+    host = _normalise_host(parts.netloc, scheme)
+    if not host:
+        return None
+
+    path = parts.path or "/"
+    while "//" in path:
+        path = path.replace("//", "/")
+    # AMP and trailing-slash variants point at the same article
+    for suffix in ("/amp/", "/amp"):
+        if path.endswith(suffix) and len(path) > len(suffix):
+            path = path[: -len(suffix)]
+            break
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(k)
+    ]
+    query.sort()
+
+    # Scheme is dropped from the key: http/https copies are the same story
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+def item_url(item: Any) -> Optional[str]:
+    """An item's `link` (headlines) or `url` (government news)."""
+    if not isinstance(item, dict):
+        return None
+    return item.get("link") or item.get("url")
+
+
+class CanonicalUrlIndex:
+    """Persistent canonical URL -> first-seen record mapping."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Path) -> "CanonicalUrlIndex":
+        index = cls(path)
+        if index.path.exists():
+            try:
+                with index.path.open("r", encoding="utf-8") as f:
+                    index.entries = json.load(f).get("urls", {})
+            except Exception as e:
+                print(f"[WARN] Failed to load canonical URL index: {e}")
+        return index
+
+    def __contains__(self, canonical: str) -> bool:
+        return canonical in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def prune(self, now: float) -> int:
+        """Drop entries first seen more than HORIZON_DAYS before now (epoch seconds); returns how many."""
+        cutoff = now - HORIZON_DAYS * 86400
+        expired = [url for url, rec in self.entries.items() if (parse_time(rec.get("first_seen")) or 0) < cutoff]
+        for url in expired:
+            del self.entries[url]
+        self._dirty = self._dirty or bool(expired)
+        return len(expired)
+
+    def add(self, canonical: str, source: str, text_hash: Optional[str], seen_at: str):
+        if canonical in self.entries:
+            return
+        self.entries[canonical] = {"source": source, "hash": text_hash, "first_seen": seen_at}
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump({"urls": self.entries}, f, ensure_ascii=False)
+            tmp.replace(self.path)
+            self._dirty = False
+        except Exception as e:
+            print(f"[WARN] Failed to save canonical URL index: {e}")
@@ -0,0 +1,361 @@
+"""
+engine/columnar_archive.py
+
+Columnar copy of the snapshot history for fast analytics.
+
+Layout under history/columnar/:
+    meta.json                     row counts, dictionary sizes, applied snapshots
+    snapshots/<column>.bin        one fixed-width little-endian array per column
+    events/<column>.bin
+    impacts/<column>.bin
+    dict/<name>.jsonl             dictionary values, one JSON string per line
+
+Strings (ids, sources, categories, industries, impact types) are stored as
+int32 codes into append-only dictionaries, so codes stay stable as runs are
+appended. Events and impacts point to their snapshot (and event) by row
+number and repeat its run time, so time-range filters need no join.
+
+Appends only ever add bytes to the ends of files. meta.json is replaced
+last, and rows or dictionary entries beyond its counts (an interrupted
+append) are truncated before the next append and ignored by readers.
+
+The reader memory-maps every column: np.memmap arrays when numpy is
+installed, otherwise memoryviews over mmap. Aggregations use numpy
+(bincount over dictionary codes) when available, with a scalar fallback
+giving the same results.
+
+CLI:
+    python engine/columnar_archive.py export                 # rebuild from the history store
+    python engine/columnar_archive.py stats
+    python engine/columnar_archive.py industries [--since 2025-09-01] [--until ..] [--monthly]
+"""
+
+import json
+import mmap
+import shutil
+import sys
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from engine.event_query import parse_time
+    from engine.index_meta import AppliedSnapshots, commit_meta, load_meta
+except ImportError:
+    from event_query import parse_time
+    from index_meta import AppliedSnapshots, commit_meta, load_meta
+
+# table -> column -> array typecode ('i' int32, 'd' float64)
+SCHEMA = {
+    "snapshots": {"snapshot_id": "i", "run_at": "d", "overall_score": "d", "events_count": "i"},
+    "events": {"snapshot": "i", "run_at": "d", "at": "d", "event_id": "i", "source": "i", "category": "i",
+               "opportunity_score": "d", "opportunity_confidence": "d"},
+    "impacts": {"event": "i", "snapshot": "i", "run_at": "d", "industry": "i", "impact_type": "i",
+                "score": "d", "relevance": "d"},
+}
+# Columns holding dictionary codes (the dictionary has the column's name)
+DICTIONARY_COLUMNS = ("snapshot_id", "event_id", "source", "category", "industry", "impact_type")
+MISSING_CODE = -1
+NUMPY_DTYPES = {"i": "<i4", "d": "<f8"}
+
+META_FILENAME = "meta.json"
+DICT_DIRNAME = "dict"
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class ColumnarArchive:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.meta_path = self.root / META_FILENAME
+        self.meta = self._load_meta()
+
+    def _load_meta(self) -> Dict[str, Any]:
+        return load_meta(self.meta_path, {"rows": {t: 0 for t in SCHEMA},
+                                          "dict_bytes": {d: 0 for d in DICTIONARY_COLUMNS},
+                                          "dict_sizes": {d: 0 for d in DICTIONARY_COLUMNS},
+                                          "applied_through": "", "applied_ids": []}, "columnar archive")
+
+    def column_path(self, table: str, column: str) -> Path:
+        return self.root / table / f"{column}.bin"
+
+    def dict_path(self, name: str) -> Path:
+        return self.root / DICT_DIRNAME / f"{name}.jsonl"
+
+    def dictionary(self, name: str) -> List[str]:
+        """Committed values of a dictionary; a value's code is its position."""
+        path = self.dict_path(name)
+        if not path.exists():
+            return []
+        with path.open("rb") as f:
+            data = f.read(self.meta["dict_bytes"][name])
+        # One parse for the whole file rather than one per line
+        return json.loads(b"[" + b",".join(data.splitlines()) + b"]")
+
+    def __len__(self) -> int:
+        return self.meta["rows"]["snapshots"]
+
+    # ---- appending ----
+    def _truncate_uncommitted(self):
+        for table, columns in SCHEMA.items():
+            (self.root / table).mkdir(parents=True, exist_ok=True)
+            for column, code in columns.items():
+                path = self.column_path(table, column)
+                size = self.meta["rows"][table] * array(code).itemsize
+                if not path.exists() or path.stat().st_size != size:
+                    with path.open("ab") as f:
+                        f.truncate(size)
+        (self.root / DICT_DIRNAME).mkdir(parents=True, exist_ok=True)
+        for name in DICTIONARY_COLUMNS:
+            path = self.dict_path(name)
+            size = self.meta["dict_bytes"][name]
+            if not path.exists() or path.stat().st_size != size:
+                with path.open("ab") as f:
+                    f.truncate(size)
+
+    def append_many(self, snapshots) -> int:
+        """Append snapshots (in time order) as one batch; already-applied ones are skipped."""
+        meta = self.meta
+        self._truncate_uncommitted()
+        codes = {name: {v: i for i, v in enumerate(self.dictionary(name))} for name in DICTIONARY_COLUMNS}
+        new_values: Dict[str, List[str]] = {name: [] for name in DICTIONARY_COLUMNS}
+        columns = {t: {c: array(code) for c, code in cols.items()} for t, cols in SCHEMA.items()}
+        rows = dict(meta["rows"])
+        applied = AppliedSnapshots(meta)
+
+        def encode(name: str, value: Any) -> int:
+            if value is None or value == "":
+                return MISSING_CODE
+            value = str(value)
+            code = codes[name].get(value)
+            if code is None:
+                code = codes[name][value] = len(codes[name])
+                new_values[name].append(value)
+            return code
+
+        added = 0
+        for snapshot in snapshots:
+            if not applied.is_new(snapshot):
+                continue
+            sid = snapshot.get("snapshot_id")
+            run_at = parse_time(snapshot["run_timestamp"]) or float("nan")
+            snap_row = rows["snapshots"]
+            s = columns["snapshots"]
+            s["snapshot_id"].append(encode("snapshot_id", sid))
+            s["run_at"].append(run_at)
+            s["overall_score"].append(_number(snapshot.get("overall_score")))
+            s["events_count"].append(len(snapshot.get("events", [])))
+            rows["snapshots"] += 1
+
+            e, im = columns["events"], columns["impacts"]
+            for event in snapshot.get("events", []):
+                event_row = rows["events"]
+                at = parse_time(event.get("timestamp"))
+                e["snapshot"].append(snap_row)
+                e["run_at"].append(run_at)
+                e["at"].append(float("nan") if at is None else at)
+                e["event_id"].append(encode("event_id", event.get("id")))
+                e["source"].append(encode("source", event.get("source")))
+                e["category"].append(encode("category", event.get("thematic_category")))
+                e["opportunity_score"].append(_number(event.get("opportunity_score")))
+                e["opportunity_confidence"].append(_number(event.get("opportunity_confidence")))
+                rows["events"] += 1
+                for impact in event.get("impacts", []):
+                    im["event"].append(event_row)
+                    im["snapshot"].append(snap_row)
+                    im["run_at"].append(run_at)
+                    im["industry"].append(encode("industry", impact.get("industry")))
+                    im["impact_type"].append(encode("impact_type", impact.get("impact_type")))
+                    im["score"].append(_number(impact.get("score")))
+                    im["relevance"].append(_number(impact.get("relevance")))
+                    rows["impacts"] += 1
+
+            applied.mark(snapshot)
+            added += 1
+
+        if not added:
+            return 0
+        for table, cols in columns.items():
+            for column, values in cols.items():
+                if sys.byteorder != "little":
+                    values.byteswap()
+                with self.column_path(table, column).open("ab") as f:
+                    values.tofile(f)
+        dict_bytes = dict(meta["dict_bytes"])
+        for name, values in new_values.items():
+            if values:
+                data = "".join(json.dumps(v, ensure_ascii=False) + "\n" for v in values).encode("utf-8")
+                with self.dict_path(name).open("ab") as f:
+                    f.write(data)
+                dict_bytes[name] += len(data)
+
+        # Commit point: only now do the appended bytes become visible
+        self.meta = dict(meta, rows=rows, dict_bytes=dict_bytes,
+                         dict_sizes={name: len(c) for name, c in codes.items()},
+                         **applied.meta())
+        commit_meta(self.meta_path, self.meta)
+        return added
+
+    def append(self, snapshot: Dict[str, Any]) -> bool:
+        return self.append_many([snapshot]) == 1
+
+    # ---- reading ----
+    def reader(self) -> "ColumnarReader":
+        return ColumnarReader(self)
+
+
+class ColumnarReader:
+    """Memory-mapped, read-only view of the committed rows."""
+
+    def __init__(self, archive: ColumnarArchive):
+        self.archive = archive
+        self.rows = dict(archive.meta["rows"])
+        self._maps: List[mmap.mmap] = []
+        self._dictionaries: Dict[str, List[str]] = {}
+
+    def column(self, table: str, name: str):
+        code, rows = SCHEMA[table][name], self.rows[table]
+        if np is not None:
+            if rows == 0:
+                return np.empty(0, dtype=NUMPY_DTYPES[code])
+            return np.memmap(self.archive.column_path(table, name), dtype=NUMPY_DTYPES[code], mode="r", shape=(rows,))
+        if rows == 0:
+            return memoryview(array(code))
+        with self.archive.column_path(table, name).open("rb") as f:
+            mapped = mmap.mmap(f.fileno(), rows * array(code).itemsize, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped).cast(code)
+
+    def dictionary(self, name: str) -> List[str]:
+        if name not in self._dictionaries:
+            self._dictionaries[name] = self.archive.dictionary(name)
+        return self._dictionaries[name]
+
+    def decode(self, name: str, code: int) -> Optional[str]:
+        return None if code < 0 else self.dictionary(name)[code]
+
+    def industry_stats(self, since: Optional[float] = None, until: Optional[float] = None,
+                       monthly: bool = False) -> Dict[str, Any]:
+        """
+        Impact count, mean / min / max score and threat / opportunity counts
+        per industry for runs in [since, until], optionally per month
+        ({"2025-11": {industry: stats}}).
+        """
+        if np is not None:
+            return self._industry_stats_numpy(since, until, monthly)
+        return self._industry_stats_scalar(since, until, monthly)
+
+    def _impact_type_code(self, value: str) -> int:
+        values = self.dictionary("impact_type")
+        return values.index(value) if value in values else MISSING_CODE - 1
+
+    def _industry_stats_numpy(self, since, until, monthly):
+        run_at = self.column("impacts", "run_at")
+        industry = self.column("impacts", "industry")
+        mask = (industry >= 0) & ~np.isnan(run_at)
+        if since is not None:
+            mask &= run_at >= since
+        if until is not None:
+            mask &= run_at <= until
+        codes = industry[mask]
+        scores = self.column("impacts", "score")[mask]
+        kinds = self.column("impacts", "impact_type")[mask]
+        names = self.dictionary("industry")
+        width = len(names)
+
+        if monthly:
+            months = run_at[mask].astype("datetime64[s]").astype("datetime64[M]")
+            labels, month_idx = np.unique(months, return_inverse=True)
+            groups = month_idx.astype(np.int64) * width + codes
+            group_labels = [str(m) for m in labels]
+        else:
+            groups, group_labels = codes.astype(np.int64), [None]
+        size = len(group_labels) * width
+
+        count = np.bincount(groups, minlength=size)
+        total = np.bincount(groups, weights=scores, minlength=size)
+        lo = np.full(size, np.inf)
+        hi = np.full(size, -np.inf)
+        np.minimum.at(lo, groups, scores)
+        np.maximum.at(hi, groups, scores)
+        threats = np.bincount(groups, weights=kinds == self._impact_type_code("Threat"), minlength=size)
+        opps = np.bincount(groups, weights=kinds == self._impact_type_code("Opportunity"), minlength=size)
+
+        out: Dict[str, Any] = {}
+        for g in np.flatnonzero(count):
+            label, code = group_labels[g // width], g % width
+            cell = {"count": int(count[g]), "mean": round(float(total[g] / count[g]), 4),
+                    "min": round(float(lo[g]), 4), "max": round(float(hi[g]), 4),
+                    "threats": int(threats[g]), "opportunities": int(opps[g])}
+            (out.setdefault(label, {}) if monthly else out)[names[code]] = cell
+        return out
+
+    def _industry_stats_scalar(self, since, until, monthly):
+        names = self.dictionary("industry")
+        threat, opportunity = self._impact_type_code("Threat"), self._impact_type_code("Opportunity")
+        cells: Dict[Any, List[float]] = {}
+        for at, code, score, kind in zip(self.column("impacts", "run_at"), self.column("impacts", "industry"),
+                                         self.column("impacts", "score"), self.column("impacts", "impact_type")):
+            if code < 0 or at != at or (since is not None and not at >= since) or (until is not None and not at <= until):
+                continue
+            label = datetime.fromtimestamp(at, timezone.utc).strftime("%Y-%m") if monthly else None
+            cell = cells.get((label, code))
+            if cell is None:
+                cell = cells[(label, code)] = [0, 0.0, score, score, 0, 0]
+            cell[0] += 1
+            cell[1] += score
+            cell[2] = min(cell[2], score)
+            cell[3] = max(cell[3], score)
+            cell[4] += kind == threat
+            cell[5] += kind == opportunity
+
+        out: Dict[str, Any] = {}
+        for (label, code), (count, total, lo, hi, threats, opps) in sorted(cells.items(), key=lambda kv: (kv[0][0] or "", kv[0][1])):
+            cell = {"count": count, "mean": round(total / count, 4), "min": round(lo, 4), "max": round(hi, 4),
+                    "threats": threats, "opportunities": opps}
+            (out.setdefault(label, {}) if monthly else out)[names[code]] = cell
+        return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    root = Path(__file__).resolve().parent.parent
+    sys.path.append(str(root))
+    from engine.history_store import HistoryStore
+
+    p = argparse.ArgumentParser(description="Columnar history archive")
+    p.add_argument("cmd", choices=["export", "stats", "industries"])
+    p.add_argument("--since")
+    p.add_argument("--until")
+    p.add_argument("--monthly", action="store_true")
+    args = p.parse_args()
+
+    archive_dir = root / "history" / "columnar"
+    if args.cmd == "export":
+        shutil.rmtree(archive_dir, ignore_errors=True)
+        history = HistoryStore(root / "history")
+        archive = ColumnarArchive(archive_dir)
+        count = archive.append_many(history.read_many(history.entries()))
+        print(f"[OK] Exported {count} snapshots → {archive_dir} ({archive.meta['rows']})")
+    elif args.cmd == "stats":
+        archive = ColumnarArchive(archive_dir)
+        print(json.dumps({"rows": archive.meta["rows"], "dictionaries": archive.meta["dict_sizes"],
+                          "applied_through": archive.meta["applied_through"],
+                          "numpy": np is not None}, indent=2))
+    else:
+        reader = ColumnarArchive(archive_dir).reader()
+        since = parse_time(args.since) if args.since else None
+        until = parse_time(args.until) if args.until else None
+        print(json.dumps(reader.industry_stats(since, until, args.monthly), indent=2, ensure_ascii=False))
@@ -0,0 +1,14 @@
+"""
+engine/constants.py
+
+Scoring thresholds shared by the pipeline and every store that re-derives
+impact types from stored scores (rollups, momentum, event store).
+"""
+
+# Industries with relevance above this get an impact (lowered to 0.1 to capture more industries)
+RELEVANCE_THRESHOLD = 0.1
+
+# Scores above +IMPACT_TYPE_THRESHOLD are Opportunities, below -IMPACT_TYPE_THRESHOLD Threats
+IMPACT_TYPE_THRESHOLD = 0.05
+OPPORTUNITY_THRESHOLD = IMPACT_TYPE_THRESHOLD
+THREAT_THRESHOLD = -IMPACT_TYPE_THRESHOLD
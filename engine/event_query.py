@@ -0,0 +1,298 @@
+"""
+engine/event_query.py
+
+In-memory query indexes over the published events and insights.
+
+An index is built once per output file version (the server rebuilds it when
+the file's mtime changes). Categorical fields get inverted indexes
+(value -> set of row positions); numeric fields and the event time get
+sorted arrays searched with bisect. A query intersects the smallest posting
+sets first, then walks a presorted order from a keyset cursor, so the cost
+of a page is proportional to the page size rather than to the window.
+"""
+
+import base64
+import json
+import math
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Sort key for rows without a value: after everything when descending
+MISSING = -1e18
+
+# Separator for composite terms (e.g. industry + impact type of the same impact)
+SEP = "\x1f"
+
+
+def parse_time(value: Any) -> Optional[float]:
+    """Epoch seconds for the timestamp formats found in events (ISO, RFC 2822, GDELT), else None."""
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    dt = None
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            dt = datetime.strptime(value, "%Y%m%dT%H%M%SZ")
+        except ValueError:
+            try:
+                dt = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def sort_key(value: Any) -> float:
+    """Numeric sort key; missing, non-numeric and NaN values all sort as MISSING."""
+    try:
+        key = float(value)
+    except (TypeError, ValueError):
+        return MISSING
+    return MISSING if key != key else key
+
+
+def encode_cursor(key: float, row_id: str) -> str:
+    raw = json.dumps([key, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, row_id = json.loads(raw)
+        return float(key), str(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class RecordIndex:
+    """
+    Inverted + sorted indexes over a list of records.
+
+    `terms(record)` yields (field, value) pairs for equality filters;
+    `numbers(record)` returns {field: float or None} for range filters and
+    sorting; values that are not numbers count as missing. Every numeric
+    field is sortable, even over an empty list.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]],
+                 terms: Callable[[Dict], Iterable[Tuple[str, str]]],
+                 numbers: Callable[[Dict], Dict[str, Optional[float]]]):
+        self.records = records
+        self.ids = [str(r.get("id", i)) for i, r in enumerate(records)]
+        self.positions = {row_id: pos for pos, row_id in enumerate(self.ids)}
+        self.postings: Dict[str, Dict[str, Set[int]]] = {}
+        values: Dict[str, List[Any]] = {field: [None] * len(records) for field in numbers({})}
+
+        for pos, record in enumerate(records):
+            for field, value in terms(record):
+                if value is None or value == "":
+                    continue
+                self.postings.setdefault(field, {}).setdefault(str(value), set()).add(pos)
+            for field, value in numbers(record).items():
+                column = values.get(field)
+                if column is None:
+                    column = values[field] = [None] * len(records)
+                column[pos] = value
+
+        # Per numeric field: the sort key of every row, and all rows in
+        # ascending (key, id, pos) order for range lookups and keyset pagination
+        self.columns: Dict[str, List[float]] = {}
+        self.orders: Dict[str, List[Tuple[float, str, int]]] = {}
+        for field, column in values.items():
+            keys = [sort_key(v) for v in column]
+            self.columns[field] = keys
+            self.orders[field] = sorted(zip(keys, self.ids, range(len(keys))))
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, row_id: str) -> Optional[Dict[str, Any]]:
+        pos = self.positions.get(row_id)
+        return None if pos is None else self.records[pos]
+
+    def facets(self, field: str) -> Dict[str, int]:
+        return {value: len(rows) for value, rows in sorted(self.postings.get(field, {}).items())}
+
+    def _term_rows(self, field: str, values: List[str]) -> Set[int]:
+        index = self.postings.get(field, {})
+        rows: Set[int] = set()
+        for value in values:
+            rows |= index.get(value, set())
+        return rows
+
+    def _range_rows(self, field: str, lo: Optional[float], hi: Optional[float]) -> Set[int]:
+        order = self.orders.get(field, [])
+        # Rows without a value never match a range
+        start = bisect_left(order, lo, key=itemgetter(0)) if lo is not None else bisect_right(order, MISSING, key=itemgetter(0))
+        end = bisect_right(order, hi, key=itemgetter(0)) if hi is not None else len(order)
+        return {pos for _, _, pos in order[start:end]}
+
+    def query(self, terms: Optional[Dict[str, List[str]]] = None,
+              ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+              sort: str = "time", descending: bool = True,
+              limit: int = DEFAULT_LIMIT, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """AND across fields, OR within a field's values. Returns a page plus the next cursor."""
+        if sort not in self.orders:
+            raise ValueError(f"sort must be one of {sorted(self.orders)}")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+
+        # Intersect term postings smallest first, so every step is cheap
+        candidates = sorted((self._term_rows(f, v) for f, v in (terms or {}).items() if v), key=len)
+        matched: Optional[Set[int]] = None
+        for rows in candidates:
+            matched = set(rows) if matched is None else matched & rows
+        # Ranges are checked per row against the term matches, and only
+        # looked up in the sorted order when there are no term filters
+        for field, (lo, hi) in (ranges or {}).items():
+            if lo is None and hi is None:
+                continue
+            if matched is None:
+                matched = self._range_rows(field, lo, hi)
+                continue
+            column = self.columns.get(field)
+            if column is None:
+                matched = set()
+                continue
+            matched = {pos for pos in matched if column[pos] != MISSING
+                       and (lo is None or column[pos] >= lo) and (hi is None or column[pos] <= hi)}
+
+        order, filtered = self.orders[sort], matched
+        if matched is not None and len(matched) * 8 < len(order):
+            # Few matches: sorting them is cheaper than scanning the full order
+            keys = self.columns[sort]
+            order, filtered = sorted((keys[pos], self.ids[pos], pos) for pos in matched), None
+
+        if cursor is None:
+            walk = range(len(order) - 1, -1, -1) if descending else range(len(order))
+        else:
+            key, row_id = decode_cursor(cursor)
+            if descending:
+                walk = range(bisect_left(order, (key, row_id)) - 1, -1, -1)
+            else:
+                walk = range(bisect_right(order, (key, row_id, float("inf"))), len(order))
+
+        items, last, more = [], None, False
+        for i in walk:
+            key, row_id, pos = order[i]
+            if filtered is not None and pos not in filtered:
+                continue
+            if len(items) == limit:
+                more = True
+                break
+            items.append(self.records[pos])
+            last = (key, row_id)
+
+        return {
+            "total": len(self.records) if matched is None else len(matched),
+            "count": len(items),
+            "items": items,
+            "next_cursor": encode_cursor(*last) if more else None,
+        }
+
+
+def _event_terms(event: Dict) -> Iterable[Tuple[str, str]]:
+    yield "category", event.get("thematic_category")
+    yield "source", event.get("source")
+    for impact in event.get("impacts", []):
+        industry, kind = impact.get("industry"), impact.get("impact_type")
+        yield "industry", industry
+        yield "impact_type", kind
+        if industry and kind:
+            yield "industry_impact", f"{industry}{SEP}{kind}"
+
+
+def _event_numbers(event: Dict) -> Dict[str, Optional[float]]:
+    return {"time": parse_time(event.get("timestamp")), "score": event.get("opportunity_score")}
+
+
+def _insight_terms(insight: Dict) -> Iterable[Tuple[str, str]]:
+    yield "category", insight.get("thematic_category")
+    yield "source", insight.get("source")
+    yield "risk_category", insight.get("risk_category")
+    yield "opportunity_category", insight.get("opportunity_category")
+    for industry in insight.get("top_affected_industries", []):
+        yield "industry", industry
+
+
+def _insight_numbers(insight: Dict) -> Dict[str, Optional[float]]:
+    return {
+        "time": parse_time(insight.get("timestamp")),
+        "score": insight.get("opportunity_score"),
+        "risk": insight.get("risk_score"),
+    }
+
+
+def build_event_index(events: List[Dict]) -> RecordIndex:
+    return RecordIndex(events, _event_terms, _event_numbers)
+
+
+def build_insight_index(insights: List[Dict]) -> RecordIndex:
+    return RecordIndex(insights, _insight_terms, _insight_numbers)
+
+
+def _values(params: Dict[str, List[str]], name: str) -> List[str]:
+    """Repeated and comma-separated parameters both mean OR."""
+    return [v.strip() for raw in params.get(name, []) for v in raw.split(",") if v.strip()]
+
+
+def _number(params: Dict[str, List[str]], name: str) -> Optional[float]:
+    if name not in params:
+        return None
+    try:
+        value = float(params[name][0])
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+    # inf / nan would overflow int() or poison range comparisons
+    if not math.isfinite(value):
+        raise ValueError(f"{name} must be a finite number")
+    return value
+
+
+def _time(params: Dict[str, List[str]], name: str) -> Optional[float]:
+    if name not in params:
+        return None
+    ts = parse_time(params[name][0])
+    if ts is None:
+        raise ValueError(f"{name} must be an ISO timestamp")
+    return ts
+
+
+def run_query(index: RecordIndex, params: Dict[str, List[str]], term_fields: Iterable[str],
+              range_fields: Iterable[str] = ("score",), now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Translate query-string parameters into an index query.
+
+      <term field>=a,b            equality (OR within a field, AND across fields)
+      min_<f>= / max_<f>=         numeric range on a range field
+      since= / until= / hours=    time window (ISO timestamps, or the last N hours)
+      sort=<numeric field>&order=asc|desc&limit=N&cursor=...
+    """
+    terms = {field: _values(params, field) for field in term_fields}
+    # Both filters together must hold for the same impact ("Threat impacts on Tea")
+    if terms.get("industry") and terms.get("impact_type") and "industry_impact" in index.postings:
+        industries, kinds = terms.pop("industry"), terms.pop("impact_type")
+        terms["industry_impact"] = [f"{i}{SEP}{t}" for i in industries for t in kinds]
+
+    ranges = {field: (_number(params, f"min_{field}"), _number(params, f"max_{field}")) for field in range_fields}
+    since, until = _time(params, "since"), _time(params, "until")
+    if "hours" in params:
+        since = (now or time.time()) - _number(params, "hours") * 3600
+    ranges["time"] = (since, until)
+
+    order = params.get("order", ["desc"])[0]
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+    limit = int(_number(params, "limit") or DEFAULT_LIMIT)
+    return index.query(terms, ranges, sort=params.get("sort", ["time"])[0], descending=order == "desc",
+                       limit=limit, cursor=params.get("cursor", [None])[0])
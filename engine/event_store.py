@@ -0,0 +1,322 @@
+"""
+engine/event_store.py
+
+Embedded SQLite store for events, their industry impacts, snapshots and
+zero-shot classifications.
+
+The database runs in WAL mode, so the pipeline can commit a run while the
+server keeps reading. Every connection is per thread. Impacts carry a copy
+of their event's time so per-industry trends are a single index range scan:
+
+    events(id, source, at, thematic_category, opportunity_score, ..., body)
+    impacts(event_id, rank, industry, score, impact_type, relevance, at)
+    snapshots(snapshot_id, run_timestamp, run_at, events_count, overall_score)
+    snapshot_events(snapshot_id, event_id)
+    classifications(text_hash, thematic_category, industry_labels, industry_scores)
+
+`body` keeps each event exactly as published. The JSON outputs are not
+materialized from the store: they are rendered by the rolling window
+(event_window.json), whose indicator rows are maintained per inserted or
+evicted event. Querying them out of SQL every run would re-run indicator
+classification over the whole window. The store is what the window is
+rebuilt from when that state is missing, and what trends, /api/similar and
+/api/search read event bodies from.
+
+CLI:
+    python engine/event_store.py import-history              # backfill from history/
+    python engine/event_store.py trend --industry Construction --days 30
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from engine.constants import OPPORTUNITY_THRESHOLD, THREAT_THRESHOLD
+    from engine.event_query import parse_time
+except ImportError:
+    from constants import OPPORTUNITY_THRESHOLD, THREAT_THRESHOLD
+    from event_query import parse_time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    at REAL NOT NULL,
+    timestamp TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    thematic_category TEXT,
+    opportunity_score REAL,
+    opportunity_confidence REAL,
+    text TEXT,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_at ON events(at);
+CREATE INDEX IF NOT EXISTS events_last_seen ON events(last_seen);
+CREATE INDEX IF NOT EXISTS events_category_at ON events(thematic_category, at);
+CREATE INDEX IF NOT EXISTS events_source_at ON events(source, at);
+
+CREATE TABLE IF NOT EXISTS impacts (
+    event_id TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    industry TEXT NOT NULL,
+    score REAL NOT NULL,
+    impact_type TEXT,
+    relevance REAL,
+    at REAL NOT NULL,
+    PRIMARY KEY (event_id, rank)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS impacts_industry_at ON impacts(industry, at);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    snapshot_id TEXT PRIMARY KEY,
+    run_timestamp TEXT NOT NULL,
+    run_at REAL NOT NULL,
+    events_count INTEGER NOT NULL,
+    overall_score REAL
+);
+CREATE INDEX IF NOT EXISTS snapshots_run_at ON snapshots(run_at);
+
+CREATE TABLE IF NOT EXISTS snapshot_events (
+    snapshot_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    PRIMARY KEY (snapshot_id, event_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS snapshot_events_event ON snapshot_events(event_id);
+
+CREATE TABLE IF NOT EXISTS classifications (
+    text_hash TEXT PRIMARY KEY,
+    thematic_category TEXT NOT NULL,
+    industry_labels TEXT NOT NULL,
+    industry_scores TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+TREND_DIMENSIONS = ("industry", "category", "source")
+
+
+class ClassificationCache:
+    """
+    Dict-like view of the classifications table (text_hash -> record), so
+    code written against the old JSON cache works unchanged. Every write is
+    its own short transaction: the write lock is not held across a run's
+    (slow) model calls, so readers and other writers never wait on it.
+    """
+
+    def __init__(self, store: "EventStore"):
+        self.store = store
+
+    def __contains__(self, text_hash: str) -> bool:
+        row = self.store.conn.execute("SELECT 1 FROM classifications WHERE text_hash = ?", (text_hash,)).fetchone()
+        return row is not None
+
+    def get(self, text_hash: str, default=None) -> Optional[Dict[str, Any]]:
+        row = self.store.conn.execute(
+            "SELECT thematic_category, industry_labels, industry_scores FROM classifications WHERE text_hash = ?",
+            (text_hash,)).fetchone()
+        if row is None:
+            return default
+        return {
+            "thematic_category": row[0],
+            "industry_labels": json.loads(row[1]),
+            "industry_scores": json.loads(row[2]),
+        }
+
+    def __getitem__(self, text_hash: str) -> Dict[str, Any]:
+        record = self.get(text_hash)
+        if record is None:
+            raise KeyError(text_hash)
+        return record
+
+    @staticmethod
+    def _row(text_hash: str, record: Dict[str, Any]) -> Tuple[str, str, str, str]:
+        return (text_hash, record["thematic_category"],
+                json.dumps(record["industry_labels"]), json.dumps(record["industry_scores"]))
+
+    def __setitem__(self, text_hash: str, record: Dict[str, Any]):
+        with self.store.conn:
+            self.store.conn.execute("INSERT OR REPLACE INTO classifications VALUES (?, ?, ?, ?)",
+                                    self._row(text_hash, record))
+
+    def __len__(self) -> int:
+        return self.store.conn.execute("SELECT COUNT(*) FROM classifications").fetchone()[0]
+
+    def update(self, records: Dict[str, Dict[str, Any]]):
+        """Insert many records in one transaction."""
+        with self.store.conn:
+            self.store.conn.executemany("INSERT OR REPLACE INTO classifications VALUES (?, ?, ?, ?)",
+                                        [self._row(h, r) for h, r in records.items()])
+
+    def commit(self):
+        """Kept for callers of the old JSON cache; writes are already committed."""
+        self.store.conn.commit()
+
+
+class EventStore:
+    """`read_only` stores (the server) never create or modify the database."""
+
+    def __init__(self, path: Path, read_only: bool = False):
+        self.path = Path(path)
+        self.read_only = read_only
+        self._local = threading.local()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """This thread's connection (created, and the schema ensured, on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None and self.read_only:
+            # Raises sqlite3.OperationalError until the pipeline has created the database
+            conn = self._local.conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True, timeout=30)
+        elif conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def classifications(self) -> ClassificationCache:
+        return ClassificationCache(self)
+
+    # ---- writes ----
+    def _upsert_event(self, event: Dict[str, Any], seen_at: float):
+        at = parse_time(event.get("timestamp"))
+        at = seen_at if at is None else at
+        conn = self.conn
+        conn.execute(
+            """
+            INSERT INTO events (id, source, at, timestamp, first_seen, last_seen, thematic_category,
+                                opportunity_score, opportunity_confidence, text, body)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                source = excluded.source, at = excluded.at, timestamp = excluded.timestamp,
+                last_seen = excluded.last_seen,
+                thematic_category = excluded.thematic_category,
+                opportunity_score = excluded.opportunity_score,
+                opportunity_confidence = excluded.opportunity_confidence,
+                text = excluded.text, body = excluded.body
+            """,
+            (event["id"], event.get("source", ""), at, event.get("timestamp"), seen_at, seen_at,
+             event.get("thematic_category"), event.get("opportunity_score"),
+             event.get("opportunity_confidence"), event.get("text"),
+             json.dumps(event, ensure_ascii=False)))
+        # An updated event (e.g. a new weather reading) replaces its impacts
+        conn.execute("DELETE FROM impacts WHERE event_id = ?", (event["id"],))
+        conn.executemany(
+            "INSERT INTO impacts VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(event["id"], rank, imp.get("industry", ""), float(imp.get("score", 0) or 0),
+              imp.get("impact_type"), imp.get("relevance"), at)
+             for rank, imp in enumerate(event.get("impacts", []))])
+
+    def add_snapshot(self, snapshot: Dict[str, Any]) -> bool:
+        """Store a run's snapshot with its events and impacts in one transaction; False if already stored."""
+        run_at = parse_time(snapshot.get("run_timestamp")) or time.time()
+        with self.conn:
+            exists = self.conn.execute("SELECT 1 FROM snapshots WHERE snapshot_id = ?",
+                                       (snapshot["snapshot_id"],)).fetchone()
+            if exists:
+                return False
+            events = snapshot.get("events", [])
+            self.conn.execute("INSERT INTO snapshots VALUES (?, ?, ?, ?, ?)",
+                              (snapshot["snapshot_id"], snapshot["run_timestamp"], run_at,
+                               len(events), snapshot.get("overall_score")))
+            for event in events:
+                self._upsert_event(event, run_at)
+            self.conn.executemany("INSERT OR IGNORE INTO snapshot_events VALUES (?, ?)",
+                                  [(snapshot["snapshot_id"], e["id"]) for e in events])
+        return True
+
+    # ---- reads ----
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def events_seen_since(self, since: float) -> List[Tuple[float, Dict[str, Any]]]:
+        """(last_seen, event) for events ingested at or after `since`, oldest first."""
+        rows = self.conn.execute(
+            "SELECT last_seen, body FROM events WHERE last_seen >= ? ORDER BY last_seen, rowid",
+            (since,)).fetchall()
+        return [(last_seen, json.loads(body)) for last_seen, body in rows]
+
+    def get_events(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored events by id (unknown ids are left out)."""
+        out: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            rows = self.conn.execute(f"SELECT id, body FROM events WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+            out.update((event_id, json.loads(body)) for event_id, body in rows)
+        return out
+
+    def snapshot_events(self, snapshot_id: str) -> List[Dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT e.body FROM snapshot_events s JOIN events e ON e.id = s.event_id WHERE s.snapshot_id = ?",
+            (snapshot_id,)).fetchall()
+        return [json.loads(body) for (body,) in rows]
+
+    def trend(self, industry: Optional[str] = None, category: Optional[str] = None,
+              source: Optional[str] = None, days: float = 30, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Daily series over the last `days`: count, mean score, mean risk
+        (max(-score, 0), as in calculate_risk_score) and threat/opportunity
+        counts. With `industry` the series is over that industry's impacts
+        (joined to their events for the other filters); otherwise over events.
+        """
+        since = (now or time.time()) - days * 86400
+        if industry:
+            sql = ["SELECT strftime('%Y-%m-%d', i.at, 'unixepoch') AS day, COUNT(*), AVG(i.score),",
+                   "AVG(CASE WHEN i.score < 0 THEN -i.score ELSE 0 END),",
+                   "SUM(i.impact_type = 'Threat'), SUM(i.impact_type = 'Opportunity')",
+                   "FROM impacts i"]
+            where, params = ["i.industry = ?", "i.at >= ?"], [industry, since]
+            if category or source:
+                sql.append("JOIN events e ON e.id = i.event_id")
+        else:
+            sql = ["SELECT strftime('%Y-%m-%d', e.at, 'unixepoch') AS day, COUNT(*), AVG(e.opportunity_score),",
+                   "AVG(CASE WHEN e.opportunity_score < 0 THEN -e.opportunity_score ELSE 0 END),",
+                   f"SUM(e.opportunity_score < {THREAT_THRESHOLD}), SUM(e.opportunity_score > {OPPORTUNITY_THRESHOLD})",
+                   "FROM events e"]
+            where, params = ["e.at >= ?"], [since]
+        if category:
+            where.append("e.thematic_category = ?")
+            params.append(category)
+        if source:
+            where.append("e.source = ?")
+            params.append(source)
+        sql.append("WHERE " + " AND ".join(where) + " GROUP BY day ORDER BY day")
+        return [
+            {"day": day, "count": count, "mean_score": round(mean or 0.0, 4), "mean_risk": round(risk or 0.0, 4),
+             "threats": int(threats or 0), "opportunities": int(opps or 0)}
+            for day, count, mean, risk, threats, opps in self.conn.execute(" ".join(sql), params)
+        ]
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    root = Path(__file__).resolve().parent.parent
+    sys.path.append(str(root))
+    from engine.history_store import HistoryStore
+
+    p = argparse.ArgumentParser(description="SQLite event store maintenance and queries")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("import-history")
+    t = sub.add_parser("trend")
+    t.add_argument("--industry")
+    t.add_argument("--category")
+    t.add_argument("--source")
+    t.add_argument("--days", type=float, default=30)
+    args = p.parse_args()
+
+    store = EventStore(root / "output" / "events.db")
+    if args.cmd == "import-history":
+        history = HistoryStore(root / "history")
+        added = sum(store.add_snapshot(s) for s in history.read_many(history.entries()))
+        print(f"[OK] Imported {added} snapshots → {store.path} ({len(store)} events)")
+    else:
+        for point in store.trend(args.industry, args.category, args.source, args.days):
+            print(json.dumps(point))
@@ -0,0 +1,160 @@
+"""
+engine/event_table.py
+
+Compact in-memory form of published events.
+
+An event dict carries ~8 keys and an `impacts` list of 4-key dicts, and
+after a JSON load every "Threat" or industry name is its own string.
+EventRecord holds the same data in __slots__:
+- source, thematic category, industry and impact type become small int
+  codes into shared Codes tables;
+- the impacts are one flat tuple (industry, score, type, relevance, ...).
+
+The original key order is kept as an interned layout, so `to_dict()`
+reproduces the published event exactly. It is only needed when
+publishing.
+"""
+
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class Codes:
+    """Interned values <-> small integer codes (shared by all records)."""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self):
+        self.values: List[Any] = []
+        self.codes: Dict[Any, int] = {}
+
+    def code(self, value: Any) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+SOURCES = Codes()
+CATEGORIES = Codes()
+INDUSTRIES = Codes()
+IMPACT_TYPES = Codes()
+LAYOUTS = Codes()
+
+IMPACT_KEYS = ("industry", "score", "impact_type", "relevance")
+IMPACT_WIDTH = len(IMPACT_KEYS)
+INDUSTRY, SCORE, IMPACT_TYPE, RELEVANCE = range(IMPACT_WIDTH)
+
+# Event keys held in slots; anything else (e.g. weather's `place`) goes to `extra`
+SLOT_FIELDS = frozenset(("id", "timestamp", "source", "text", "thematic_category",
+                         "opportunity_score", "opportunity_confidence", "impacts"))
+
+
+def pack_impacts(impacts: Any) -> Tuple[Tuple, bool]:
+    """Flat impact tuple, plus whether the dicts had exactly the standard keys (so they can be rebuilt)."""
+    if not isinstance(impacts, list):
+        return (), False
+    flat: List[Any] = []
+    standard = True
+    for imp in impacts:
+        if not isinstance(imp, dict):
+            standard = False
+            continue
+        standard = standard and tuple(imp) == IMPACT_KEYS
+        flat += (INDUSTRIES.code(imp.get("industry")), imp.get("score", 0),
+                 IMPACT_TYPES.code(imp.get("impact_type")), imp.get("relevance"))
+    return tuple(flat), standard
+
+
+class EventRecord:
+    __slots__ = ("id", "timestamp", "text", "source", "category", "score", "confidence",
+                 "impacts", "layout", "extra")
+
+    @classmethod
+    def from_dict(cls, event: Dict[str, Any]) -> "EventRecord":
+        rec = cls()
+        rec.id = event.get("id")
+        rec.timestamp = event.get("timestamp")
+        rec.text = event.get("text", "")
+        rec.source = SOURCES.code(event.get("source"))
+        rec.category = CATEGORIES.code(event.get("thematic_category", ""))
+        rec.score = event.get("opportunity_score", 0)
+        rec.confidence = event.get("opportunity_confidence")
+        rec.impacts, standard = pack_impacts(event.get("impacts", []))
+        rec.layout = LAYOUTS.code(tuple(event))
+        extra = {k: v for k, v in event.items() if k not in SLOT_FIELDS}
+        if not standard and "impacts" in event:
+            # Non-standard impact dicts are kept verbatim for publishing
+            extra["impacts"] = event["impacts"]
+        rec.extra = extra or None
+        return rec
+
+    # ---- field access ----
+    @property
+    def source_name(self) -> Optional[str]:
+        return SOURCES.values[self.source]
+
+    @property
+    def category_name(self) -> str:
+        return CATEGORIES.values[self.category]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict.get over the published form of the event."""
+        if key not in LAYOUTS.values[self.layout]:
+            return default
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        return _GETTERS[key](self)
+
+    # ---- impacts ----
+    def impact_count(self) -> int:
+        return len(self.impacts) // IMPACT_WIDTH
+
+    def impact_scores(self) -> Tuple:
+        return self.impacts[SCORE::IMPACT_WIDTH]
+
+    def industries(self, limit: Optional[int] = None) -> List[str]:
+        """Industry names in stored order (optionally the first `limit`)."""
+        codes = self.impacts[INDUSTRY::IMPACT_WIDTH]
+        return [INDUSTRIES.values[c] for c in (codes if limit is None else codes[:limit])]
+
+    def top_industries(self, n: int) -> List[str]:
+        """The n industries with the largest |score| (ties in stored order, like a stable sort)."""
+        scores = self.impact_scores()
+        top = heapq.nlargest(n, range(len(scores)), key=lambda i: abs(scores[i]))
+        return [INDUSTRIES.values[self.impacts[i * IMPACT_WIDTH + INDUSTRY]] for i in top]
+
+    def impact_dicts(self) -> List[Dict[str, Any]]:
+        if self.extra is not None and "impacts" in self.extra:
+            return self.extra["impacts"]
+        flat = self.impacts
+        return [
+            {"industry": INDUSTRIES.values[flat[i]], "score": flat[i + SCORE],
+             "impact_type": IMPACT_TYPES.values[flat[i + IMPACT_TYPE]], "relevance": flat[i + RELEVANCE]}
+            for i in range(0, len(flat), IMPACT_WIDTH)
+        ]
+
+    # ---- publishing ----
+    def to_dict(self) -> Dict[str, Any]:
+        extra = self.extra or {}
+        return {key: extra[key] if key in extra else _GETTERS[key](self) for key in LAYOUTS.values[self.layout]}
+
+
+_GETTERS = {
+    "id": lambda r: r.id,
+    "timestamp": lambda r: r.timestamp,
+    "text": lambda r: r.text,
+    "source": lambda r: SOURCES.values[r.source],
+    "thematic_category": lambda r: CATEGORIES.values[r.category],
+    "opportunity_score": lambda r: r.score,
+    "opportunity_confidence": lambda r: r.confidence,
+    "impacts": EventRecord.impact_dicts,
+}
+
+
+def to_records(events: Iterable[Dict[str, Any]]) -> List[EventRecord]:
+    return [EventRecord.from_dict(e) for e in events]
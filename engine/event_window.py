@@ -0,0 +1,301 @@
+"""
+engine/event_window.py
+
+Persistent rolling-window event store with incrementally maintained
+indicator lists.
+
+The pipeline only processes items it has not seen before, so a single run's
+events are just the hour's delta. The window keeps the last N hours of
+events (as compact EventRecords); each run inserts its new events and
+evicts expired ones, and the order of the derived indicator rows (national /
+operational / risk-opportunity) is kept by applying those deltas instead of
+recomputing the whole window. Only sort keys are held per row; the rows
+themselves are rendered when published.
+
+Each run's net effect on the window (event ids added / updated / removed)
+is appended to a bounded change log so clients can fetch deltas between
+snapshots.
+"""
+
+import json
+import time
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+try:
+    from engine.event_table import EventRecord
+except ImportError:
+    from event_table import EventRecord
+
+DEFAULT_WINDOW_HOURS = 72
+
+# Snapshots kept in the change log; older `since` ids get a full reset
+DEFAULT_CHANGE_LOG_ENTRIES = 500
+
+ADDED, UPDATED, REMOVED = "added", "updated", "removed"
+
+
+def fold_change(changes: Dict[str, str], event_id: str, status: str):
+    """Combine a new change for an event with the one already recorded (net effect)."""
+    prev = changes.get(event_id)
+    if prev is None:
+        changes[event_id] = status
+    elif status == REMOVED:
+        if prev == ADDED:
+            del changes[event_id]  # appeared and vanished in between: nothing to report
+        else:
+            changes[event_id] = REMOVED
+    elif prev == REMOVED:
+        changes[event_id] = UPDATED  # existed before and exists again
+    # added/updated followed by added/updated keep the earlier status
+
+
+class SortedRows:
+    """Row ids kept in descending key order; ties keep insertion order (stable)."""
+
+    def __init__(self):
+        self._keys: List[float] = []
+        self._ids: List[str] = []
+        self._key_of: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, row_id: str, key: float):
+        # Negated keys so the ascending bisect order is descending by key;
+        # bisect_right places equal keys after existing ones like a stable sort.
+        k = -key
+        pos = bisect_right(self._keys, k)
+        self._keys.insert(pos, k)
+        self._ids.insert(pos, row_id)
+        self._key_of[row_id] = key
+
+    def append_sorted(self, row_id: str, key: float):
+        """Append a row already known to be in order (used when loading)."""
+        self._keys.append(-key)
+        self._ids.append(row_id)
+        self._key_of[row_id] = key
+
+    def remove(self, row_id: str):
+        key = self._key_of.pop(row_id, None)
+        if key is None:
+            return
+        k = -key
+        lo = bisect_left(self._keys, k)
+        hi = bisect_right(self._keys, k)
+        for pos in range(lo, hi):
+            if self._ids[pos] == row_id:
+                del self._keys[pos]
+                del self._ids[pos]
+                return
+
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+
+class WindowEntry:
+    __slots__ = ("key", "inserted_at", "record", "sort_keys")
+
+    def __init__(self, key: str, inserted_at: float, record: EventRecord, sort_keys: Dict[str, Optional[float]]):
+        self.key = key
+        self.inserted_at = inserted_at
+        self.record = record
+        self.sort_keys = sort_keys
+
+
+class EventWindow:
+    """
+    Last `window_hours` of events, held as compact EventRecords.
+
+    `classify(record)` returns {kind: sort key, or None if the event has no
+    row of that kind}. It runs once per inserted event. Rows are kept as ids
+    in descending key order and are only rendered, by `render(kind, record)`,
+    when `rows(kind)` is read. `key_fn(record)` gives the identity under
+    which an event is stored. Inserting an event with an existing key
+    replaces the older one (e.g. one weather reading per place).
+    """
+
+    def __init__(self, path: Path, classify: Callable[[EventRecord], Dict[str, Optional[float]]],
+                 render: Callable[[str, EventRecord], Dict], kinds: Iterable[str],
+                 key_fn: Callable[[EventRecord], str] = lambda r: r.id,
+                 window_hours: float = DEFAULT_WINDOW_HOURS):
+        self.path = Path(path)
+        self.classify = classify
+        self.render = render
+        self.key_fn = key_fn
+        self.window_seconds = window_hours * 3600
+        self.entries: Dict[str, WindowEntry] = {}
+        self.sorted = {kind: SortedRows() for kind in kinds}
+        self.score_sum = 0.0
+        # Net changes (event id -> added/updated/removed) since the last drain_changes()
+        self.changes: Dict[str, str] = {}
+
+    # ---- persistence ----
+    @classmethod
+    def load(cls, path: Path, classify, render, kinds, key_fn=lambda r: r.id,
+             window_hours: float = DEFAULT_WINDOW_HOURS) -> "EventWindow":
+        window = cls(path, classify, render, kinds, key_fn, window_hours)
+        if not window.path.exists():
+            return window
+        try:
+            with window.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[WARN] Failed to load event window, starting empty: {e}")
+            return window
+
+        for item in data.get("entries", []):
+            record = EventRecord.from_dict(item["event"])
+            # Files written before sort keys were persisted carry rendered rows instead
+            sort_keys = item["sort_keys"] if "sort_keys" in item else classify(record)
+            window.entries[item["key"]] = WindowEntry(item["key"], item["inserted_at"], record, sort_keys)
+            window.score_sum += record.score
+        # Sorted order was persisted, so no re-sorting is needed
+        for kind, ids in data.get("order", {}).items():
+            rows = window.sorted.get(kind)
+            if rows is None:
+                continue
+            for key in ids:
+                entry = window.entries.get(key)
+                if entry and entry.sort_keys.get(kind) is not None:
+                    rows.append_sorted(key, entry.sort_keys[kind])
+        return window
+
+    def save(self):
+        data = {
+            "window_hours": self.window_seconds / 3600,
+            "entries": [{"key": e.key, "inserted_at": e.inserted_at, "event": e.record.to_dict(), "sort_keys": e.sort_keys}
+                        for e in self.entries.values()],
+            "order": {kind: rows.ids() for kind, rows in self.sorted.items()},
+        }
+        try:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            tmp.replace(self.path)
+        except Exception as e:
+            print(f"[WARN] Failed to save event window: {e}")
+
+    # ---- deltas ----
+    def insert(self, event: Union[Dict, EventRecord], now: Optional[float] = None):
+        record = event if isinstance(event, EventRecord) else EventRecord.from_dict(event)
+        key = self.key_fn(record)
+        if key in self.entries:
+            self.remove(key)
+        fold_change(self.changes, record.id, ADDED)
+        sort_keys = self.classify(record)
+        self.entries[key] = WindowEntry(key, now or time.time(), record, sort_keys)
+        self.score_sum += record.score
+        for kind, sort_key in sort_keys.items():
+            if sort_key is not None and kind in self.sorted:
+                self.sorted[kind].add(key, sort_key)
+
+    def insert_many(self, events: Iterable[Union[Dict, EventRecord]], now: Optional[float] = None) -> int:
+        now = now or time.time()
+        count = 0
+        for event in events:
+            self.insert(event, now)
+            count += 1
+        return count
+
+    def remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        fold_change(self.changes, entry.record.id, REMOVED)
+        self.score_sum -= entry.record.score
+        for kind in self.sorted:
+            self.sorted[kind].remove(key)
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """Drop events older than the window. Entries are in insertion order, so stop at the first live one."""
+        cutoff = (now or time.time()) - self.window_seconds
+        expired = []
+        for key, entry in self.entries.items():
+            if entry.inserted_at >= cutoff:
+                break
+            expired.append(key)
+        for key in expired:
+            self.remove(key)
+        return len(expired)
+
+    def drain_changes(self) -> Dict[str, str]:
+        changes, self.changes = self.changes, {}
+        return changes
+
+    # ---- views ----
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def records(self) -> List[EventRecord]:
+        return [entry.record for entry in self.entries.values()]
+
+    def events(self) -> List[Dict]:
+        """Events in their published dict form."""
+        return [entry.record.to_dict() for entry in self.entries.values()]
+
+    def rows(self, kind: str) -> List[Dict]:
+        entries = self.entries
+        return [self.render(kind, entries[key].record) for key in self.sorted[kind].ids()]
+
+    def mean_score(self) -> float:
+        if not self.entries:
+            return 0.0
+        return self.score_sum / len(self.entries)
+
+
+class ChangeLog:
+    """
+    Bounded JSONL log of per-snapshot window changes:
+        {"snapshot_id", "run_timestamp", "changes": {event_id: status}}
+    """
+
+    def __init__(self, path: Path, max_entries: int = DEFAULT_CHANGE_LOG_ENTRIES):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.entries: List[Dict[str, Any]] = []
+
+    @classmethod
+    def load(cls, path: Path, max_entries: int = DEFAULT_CHANGE_LOG_ENTRIES) -> "ChangeLog":
+        log = cls(path, max_entries)
+        if log.path.exists():
+            try:
+                with log.path.open("r", encoding="utf-8") as f:
+                    log.entries = [json.loads(line) for line in f if line.strip()]
+            except Exception as e:
+                print(f"[WARN] Failed to load change log: {e}")
+        return log
+
+    def append(self, snapshot_id: str, run_timestamp: str, changes: Dict[str, str]):
+        entry = {"snapshot_id": snapshot_id, "run_timestamp": run_timestamp, "changes": changes}
+        self.entries.append(entry)
+        try:
+            if len(self.entries) > self.max_entries:
+                # Trim by rewriting; otherwise a plain append is enough
+                self.entries = self.entries[-self.max_entries:]
+                tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+                with tmp.open("w", encoding="utf-8") as f:
+                    f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in self.entries)
+                tmp.replace(self.path)
+            else:
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"[WARN] Failed to append change log: {e}")
+
+    def latest(self) -> Optional[str]:
+        return self.entries[-1]["snapshot_id"] if self.entries else None
+
+    def since(self, snapshot_id: str, until: Optional[str] = None) -> Optional[Dict[str, str]]:
+        """Net changes after `snapshot_id` (up to and including `until`), or None if it is not in the log."""
+        for i in range(len(self.entries) - 1, -1, -1):
+            if self.entries[i]["snapshot_id"] == snapshot_id:
+                changes: Dict[str, str] = {}
+                for entry in self.entries[i + 1:] if snapshot_id != until else []:
+                    for event_id, status in entry["changes"].items():
+                        fold_change(changes, event_id, status)
+                    if entry["snapshot_id"] == until:
+                        break
+                return changes
+        return None
@@ -0,0 +1,510 @@
+"""
+engine/history_store.py
+
+Segmented, compressed, content-addressed snapshot history.
+
+Layout under history/:
+    CURRENT                        name of the live store directory (absent: the files below
+                                   live directly in history/)
+    store-*/                       a store written by compaction, holding:
+      segments/YYYY-MM-DD.jsonl.gz   one gzip member per snapshot record, appended
+      index.jsonl                    snapshot_id -> segment/offset/length/timestamp
+      blobs/YYYY-MM-DD.jsonl.gz      event bodies, stored once per content hash
+      blobs.jsonl                    content hash -> blob segment/offset/length
+    .lock                          flock held exclusively by appends and compaction, shared by reads
+
+A snapshot record holds only references to its events: the content hash of
+the event body plus the per-run fields (`id`, `timestamp`). Bodies that were
+already stored by an earlier run (weather re-emitted every hour, repeated
+stories) are not written again. Every record and every batch of new bodies
+is its own gzip member, so readers seek straight to an offset and inflate
+only what they need; "last N" and "between T1 and T2" queries cost
+O(result size) rather than O(all history).
+
+Compaction writes a complete new store-*/ directory and then swaps it in by
+replacing CURRENT, so a crash at any point leaves one complete store live.
+Readers re-resolve CURRENT on every refresh and hold the shared lock while
+they read, so the old store is not removed under them; entries looked up
+before a compaction are re-resolved by snapshot id in the new store.
+
+CLI:
+    python engine/history_store.py migrate [--source history/hourly_history.jsonl]
+    python engine/history_store.py compact
+    python engine/history_store.py stats
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends and compaction are not serialized across processes
+    fcntl = None
+
+SEGMENTS_DIRNAME = "segments"
+INDEX_FILENAME = "index.jsonl"
+BLOBS_DIRNAME = "blobs"
+BLOB_INDEX_FILENAME = "blobs.jsonl"
+LEGACY_HISTORY_FILENAME = "hourly_history.jsonl"
+POINTER_FILENAME = "CURRENT"
+LOCK_FILENAME = ".lock"
+STORE_DIR_PREFIX = "store-"
+
+# Per-run event fields kept in the snapshot reference rather than the shared body
+REF_FIELDS = (("id", "id"), ("timestamp", "ts"))
+
+# Decompressed blob members kept in memory
+BLOB_CACHE_SIZE = 64
+
+
+def event_body(event: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in event.items() if k not in ("id", "timestamp")}
+
+
+def content_hash(body: Dict[str, Any]) -> str:
+    """Stable hash of an event body (key order independent)."""
+    return hashlib.md5(json.dumps(body, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _gzip_member(lines: Iterable[str]) -> bytes:
+    return gzip.compress("".join(lines).encode("utf-8"), compresslevel=6)
+
+
+class JsonlTail:
+    """Append-only JSONL file read incrementally: each refresh parses only new complete lines."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.offset = 0
+
+    def reset(self):
+        self.offset = 0
+
+    def read_new(self) -> Optional[List[Dict[str, Any]]]:
+        """Return new records, [] if nothing changed, or None if the file was rewritten (caller resets)."""
+        if not self.path.exists():
+            return []
+        size = self.path.stat().st_size
+        if size < self.offset:
+            return None
+        if size == self.offset:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        # Only consume complete lines; a partially written tail is picked up next time
+        end = chunk.rfind(b"\n") + 1
+        records = []
+        for line in chunk[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        self.offset += end
+        return records
+
+
+class HistoryStore:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        # One store is shared by the server's request threads; serializes index/blob state
+        self._lock = threading.RLock()
+        # Thread holding the exclusive flock; its own reads must not wait for a shared one
+        self._exclusive_owner: Optional[int] = None
+        self._reset(self._live_dir())
+
+    def _live_dir(self) -> Path:
+        """Directory holding the live store: the one named by CURRENT, else root itself."""
+        try:
+            name = (self.root / POINTER_FILENAME).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return self.root
+        return self.root / name if name else self.root
+
+    def _reset(self, data_dir: Path):
+        """Point at data_dir and drop all in-memory state; it is rebuilt from disk on demand."""
+        self.data_dir = data_dir
+        self.segments_dir = data_dir / SEGMENTS_DIRNAME
+        self.index_file = data_dir / INDEX_FILENAME
+        self.blobs_dir = data_dir / BLOBS_DIRNAME
+        self.blob_index_file = data_dir / BLOB_INDEX_FILENAME
+
+        # In-memory snapshot index, extended incrementally
+        self._index_tail = JsonlTail(self.index_file)
+        self._entries: List[Dict[str, Any]] = []
+        self._timestamps: List[str] = []
+        self._by_id: Dict[str, int] = {}
+        # id() of every live entry: tells them apart from entries of a store compacted away
+        self._entry_ids: set = set()
+
+        # content hash -> blob location
+        self._blob_tail = JsonlTail(self.blob_index_file)
+        self._blobs: Dict[str, Dict[str, Any]] = {}
+        self._blob_cache: "OrderedDict[tuple, Dict[str, Dict]]" = OrderedDict()
+
+    def _sync(self):
+        """Follow CURRENT if compaction swapped in a new store since we last looked."""
+        live = self._live_dir()
+        if live != self.data_dir:
+            self._reset(live)
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock across threads and processes (history/.lock, released when the file closes)."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        # flock before the thread lock: a reader holding the shared flock still needs the thread lock
+        with open(self.root / LOCK_FILENAME, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            with self._lock:
+                self._exclusive_owner = threading.get_ident()
+                try:
+                    yield
+                finally:
+                    self._exclusive_owner = None
+
+    @contextmanager
+    def _shared(self):
+        """Shared lock held while reading, so compaction cannot remove the store being read."""
+        if fcntl is None or self._exclusive_owner == threading.get_ident() or not self.root.is_dir():
+            yield
+            return
+        with open(self.root / LOCK_FILENAME, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            yield
+
+    # ---- writing ----
+    def append(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Store new event bodies, then the reference-only snapshot record and its index entry."""
+        # Waits for a running compaction, then writes into whichever store is live
+        with self._locked():
+            self._sync()
+            return self._append(snapshot)
+
+    def _append(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        self.refresh_blobs()
+        ts = snapshot.get("run_timestamp") or "1970-01-01T00:00:00Z"
+        day = ts[:10]
+
+        refs = []
+        new_bodies: Dict[str, Dict[str, Any]] = {}
+        for event in snapshot.get("events", []):
+            body = event_body(event)
+            h = content_hash(body)
+            ref = {"h": h}
+            for field, short in REF_FIELDS:
+                if field in event:
+                    ref[short] = event[field]
+            refs.append(ref)
+            if h not in self._blobs and h not in new_bodies:
+                new_bodies[h] = body
+
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        if new_bodies:
+            self._write_blobs(f"{day}.jsonl.gz", new_bodies)
+
+        record = {k: v for k, v in snapshot.items() if k != "events"}
+        record["refs"] = refs
+        payload = _gzip_member([json.dumps(record, ensure_ascii=False) + "\n"])
+
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        segment = f"{day}.jsonl.gz"
+        with open(self.segments_dir / segment, "ab") as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(payload)
+
+        entry = {
+            "snapshot_id": snapshot.get("snapshot_id"),
+            "run_timestamp": ts,
+            "segment": segment,
+            "offset": offset,
+            "length": len(payload),
+            "events_count": snapshot.get("events_count", len(refs)),
+            "new_bodies": len(new_bodies),
+        }
+        # Index is written after the segment so it never points at missing bytes
+        with open(self.index_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        return entry
+
+    def _write_blobs(self, segment: str, bodies: Dict[str, Dict[str, Any]]):
+        payload = _gzip_member(
+            json.dumps({"h": h, "e": body}, ensure_ascii=False) + "\n" for h, body in bodies.items()
+        )
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.blobs_dir / segment, "ab") as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(payload)
+        loc = {"segment": segment, "offset": offset, "length": len(payload)}
+        with open(self.blob_index_file, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps({"h": h, **loc}) + "\n" for h in bodies))
+        for h in bodies:
+            self._blobs[h] = loc
+
+    # ---- index ----
+    def refresh(self) -> List[Dict[str, Any]]:
+        """Load index lines appended since the last call; returns a copy of all entries."""
+        with self._lock:
+            self._refresh()
+            return list(self._entries)
+
+    def _refresh(self):
+        self._sync()
+        records = self._index_tail.read_new()
+        if records is None:
+            # Index was rewritten in place; start over
+            self._entries, self._timestamps, self._by_id, self._entry_ids = [], [], {}, set()
+            self._index_tail.reset()
+            records = self._index_tail.read_new() or []
+        for entry in records:
+            self._add_entry(entry)
+
+    def refresh_blobs(self):
+        with self._lock:
+            records = self._blob_tail.read_new()
+            if records is None:
+                self._blobs, self._blob_cache = {}, OrderedDict()
+                self._blob_tail.reset()
+                records = self._blob_tail.read_new() or []
+            for rec in records:
+                self._blobs[rec["h"]] = {"segment": rec["segment"], "offset": rec["offset"], "length": rec["length"]}
+
+    def _add_entry(self, entry: Dict[str, Any]):
+        ts = entry.get("run_timestamp", "")
+        self._entry_ids.add(id(entry))
+        # Snapshots arrive in time order; fall back to an ordered insert if not
+        if self._timestamps and ts < self._timestamps[-1]:
+            pos = bisect_right(self._timestamps, ts)
+            self._entries.insert(pos, entry)
+            self._timestamps.insert(pos, ts)
+            self._by_id = {e.get("snapshot_id"): i for i, e in enumerate(self._entries)}
+        else:
+            self._by_id[entry.get("snapshot_id")] = len(self._entries)
+            self._entries.append(entry)
+            self._timestamps.append(ts)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        return self.refresh()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._entries)
+
+    # ---- reading ----
+    def _blob_member(self, loc: Dict[str, Any]) -> Dict[str, Dict]:
+        key = (loc["segment"], loc["offset"])
+        member = self._blob_cache.get(key)
+        if member is not None:
+            self._blob_cache.move_to_end(key)
+            return member
+        with open(self.blobs_dir / loc["segment"], "rb") as f:
+            f.seek(loc["offset"])
+            data = gzip.decompress(f.read(loc["length"]))
+        member = {}
+        for line in data.splitlines():
+            rec = json.loads(line)
+            member[rec["h"]] = rec["e"]
+        self._blob_cache[key] = member
+        if len(self._blob_cache) > BLOB_CACHE_SIZE:
+            self._blob_cache.popitem(last=False)
+        return member
+
+    def hydrate(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn a reference-only record back into a full snapshot (legacy full records pass through)."""
+        if "refs" not in record:
+            return record
+        events = []
+        with self._lock:
+            self.refresh_blobs()
+            for ref in record["refs"]:
+                loc = self._blobs.get(ref["h"])
+                body = self._blob_member(loc).get(ref["h"], {}) if loc else {}
+                event = {field: ref[short] for field, short in REF_FIELDS if short in ref}
+                event.update(body)
+                events.append(event)
+        snapshot = {k: v for k, v in record.items() if k != "refs"}
+        snapshot["events"] = events
+        return snapshot
+
+    def _live_entry(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """The live store's entry for a snapshot; an entry from before a compaction points into the old store."""
+        with self._lock:
+            if id(entry) in self._entry_ids:
+                return entry
+            pos = self._by_id.get(entry.get("snapshot_id"))
+            return self._entries[pos] if pos is not None else entry
+
+    def read_record(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Seek to one snapshot's gzip member and decode the raw (reference-only) record."""
+        return next(self.read_many([entry], hydrate=False))
+
+    def read(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        return next(self.read_many([entry]))
+
+    def read_many(self, entries: List[Dict[str, Any]], hydrate: bool = True) -> Iterator[Dict[str, Any]]:
+        # Holds the shared lock until the last record is read; segment files stay open across entries
+        handles = {}
+        with self._shared():
+            with self._lock:
+                self._refresh()
+            try:
+                for entry in entries:
+                    entry = self._live_entry(entry)
+                    f = handles.get(entry["segment"])
+                    if f is None:
+                        f = handles[entry["segment"]] = open(self.segments_dir / entry["segment"], "rb")
+                    f.seek(entry["offset"])
+                    record = json.loads(gzip.decompress(f.read(entry["length"])))
+                    yield self.hydrate(record) if hydrate else record
+            finally:
+                for f in handles.values():
+                    f.close()
+
+    def last_entries(self, n: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return self._entries[-n:] if n > 0 else []
+
+    def entries_between(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Index entries with start <= run_timestamp <= end (ISO-8601 strings, either bound optional)."""
+        with self._lock:
+            self._refresh()
+            lo = bisect_left(self._timestamps, start) if start else 0
+            # Pad a date-only / partial end bound so the whole day/hour is included
+            hi = bisect_right(self._timestamps, end + "\uffff") if end else len(self._timestamps)
+            return self._entries[lo:hi]
+
+    def entry(self, snapshot_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            pos = self._by_id.get(snapshot_id)
+            return self._entries[pos] if pos is not None else None
+
+    def last(self, n: int) -> List[Dict[str, Any]]:
+        return list(self.read_many(self.last_entries(n)))
+
+    def between(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        return list(self.read_many(self.entries_between(start, end)))
+
+    def get(self, snapshot_id: str) -> Optional[Dict[str, Any]]:
+        entry = self.entry(snapshot_id)
+        return self.read(entry) if entry else None
+
+    # ---- maintenance ----
+    def migrate_legacy(self, source: Path) -> int:
+        """Import a legacy hourly_history.jsonl, skipping known snapshot ids and repeated lines."""
+        known = {e.get("snapshot_id") for e in self.refresh()}
+        seen_lines = set()
+        imported = 0
+        with open(source, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                # run_hourly used to append a second, byte-identical copy of every snapshot
+                line_hash = hashlib.md5(line.encode("utf-8")).hexdigest()
+                if line_hash in seen_lines:
+                    continue
+                seen_lines.add(line_hash)
+                try:
+                    snapshot = json.loads(line)
+                except json.JSONDecodeError:
+                    print("[WARN] Skipping invalid history line")
+                    continue
+                snapshot_id = snapshot.get("snapshot_id")
+                if snapshot_id is not None and snapshot_id in known:
+                    continue
+                known.add(snapshot_id)
+                self.append(snapshot)
+                imported += 1
+        return imported
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Rewrite the whole store into the content-addressed format: older
+        full-body records are converted and unreferenced blobs are dropped.
+        The new store is written to its own store-*/ directory and made live
+        by a single atomic replace of CURRENT; appends wait on the lock.
+        """
+        def disk_usage(root: Path) -> int:
+            return sum(p.stat().st_size for p in root.rglob("*") if p.is_file() and p.name != "readme.txt")
+
+        with self._locked():
+            self._sync()
+            old_dir = self.data_dir
+            # Directories left by an interrupted compaction were never made live
+            for stale in self.root.glob(STORE_DIR_PREFIX + "*"):
+                if stale != old_dir:
+                    shutil.rmtree(stale)
+            before = disk_usage(self.root)
+
+            name = f"{STORE_DIR_PREFIX}{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+            fresh = HistoryStore(self.root / name)
+            count = 0
+            for snapshot in self.read_many(self.refresh()):
+                fresh._append(snapshot)
+                count += 1
+            fresh.data_dir.mkdir(parents=True, exist_ok=True)
+
+            pointer = self.root / POINTER_FILENAME
+            tmp = pointer.with_name(f".{POINTER_FILENAME}.{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(name + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, pointer)
+
+            # The old store is only removed once CURRENT names the new one
+            if old_dir == self.root:
+                for old in (SEGMENTS_DIRNAME, BLOBS_DIRNAME):
+                    shutil.rmtree(self.root / old, ignore_errors=True)
+                for old in (INDEX_FILENAME, BLOB_INDEX_FILENAME):
+                    (self.root / old).unlink(missing_ok=True)
+            else:
+                shutil.rmtree(old_dir, ignore_errors=True)
+            self._reset(fresh.data_dir)
+            return {"snapshots": count, "bytes_before": before, "bytes_after": disk_usage(self.root)}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    root = Path(__file__).resolve().parent.parent / "history"
+    p = argparse.ArgumentParser(description="Segmented history store maintenance")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("migrate", help="Import legacy hourly_history.jsonl into segments")
+    m.add_argument("--source", default=str(root / LEGACY_HISTORY_FILENAME))
+    sub.add_parser("compact", help="Rewrite history into the deduplicated format")
+    sub.add_parser("stats", help="Print index / segment statistics")
+    args = p.parse_args()
+
+    store = HistoryStore(root)
+    if args.cmd == "migrate":
+        count = store.migrate_legacy(Path(args.source))
+        print(f"[OK] Imported {count} snapshots into {store.segments_dir}")
+    elif args.cmd == "compact":
+        stats = store.compact()
+        print(f"[OK] Compacted {stats['snapshots']} snapshots: {stats['bytes_before']} → {stats['bytes_after']} bytes")
+    else:
+        entries = store.entries()
+        store.refresh_blobs()
+        seg_bytes = sum(f.stat().st_size for f in store.segments_dir.glob("*.jsonl.gz")) if store.segments_dir.exists() else 0
+        blob_bytes = sum(f.stat().st_size for f in store.blobs_dir.glob("*.jsonl.gz")) if store.blobs_dir.exists() else 0
+        print(f"Snapshots: {len(entries)} in {len({e['segment'] for e in entries})} segments ({seg_bytes} bytes)")
+        print(f"Distinct event bodies: {len(store._blobs)} ({blob_bytes} bytes)")
+        if entries:
+            print(f"Range: {entries[0]['run_timestamp']} → {entries[-1]['run_timestamp']}")
@@ -0,0 +1,94 @@
+"""
+engine/impact_batch.py
+
+Batched per-industry impact computation (requires numpy).
+
+The pipeline's build_impacts turns one event's global opportunity score and
+its zero-shot industry relevances into a list of impact dicts sorted by
+|score|. build_impacts_batch does the same for a whole batch: relevances
+are packed into an events x labels matrix (each row in that event's own
+label order), and the relevance mask, scores, impact types and the |score|
+ordering (a stable argsort, so ties keep label order) are computed for all
+events at once. Only the output dicts are built per impact.
+
+Rounding matches Python's round(x, 4) exactly: np.round is used, and the
+rare values whose scaled form lies within float error of a .5 boundary are
+re-rounded with round().
+"""
+
+from typing import Any, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+OPPORTUNITY, THREAT, NEUTRAL = 0, 1, 2
+IMPACT_TYPE_NAMES = ("Opportunity", "Threat", "Neutral")
+
+# |x * 10^4 - (k + 0.5)| below this may round differently in numpy and Python
+HALF_TOLERANCE = 1e-6
+
+
+def round4(values: "np.ndarray") -> "np.ndarray":
+    """Elementwise round(x, 4), bit-identical to Python's."""
+    scaled = values * 1e4
+    out = np.round(scaled) / 1e4
+    near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < HALF_TOLERANCE
+    for idx in np.flatnonzero(near_half):
+        out.flat[idx] = round(float(values.flat[idx]), 4)
+    return out
+
+
+def _relevance_matrix(relevances: Sequence[Sequence[float]], widths: List[int]) -> "np.ndarray":
+    n, width = len(relevances), max(widths, default=0)
+    if all(w == width and len(r) == width for w, r in zip(widths, relevances)):
+        return np.asarray(relevances, dtype=np.float64).reshape(n, width)
+    # Ragged rows: cells past an event's labels can never pass the threshold
+    matrix = np.full((n, width), -np.inf)
+    for i, (row, w) in enumerate(zip(relevances, widths)):
+        matrix[i, :w] = row[:w]
+    return matrix
+
+
+def build_impacts_batch(opp_scores: Sequence[float], labels: Sequence[Sequence[str]],
+                        relevances: Sequence[Sequence[float]], min_relevance: float,
+                        type_threshold: float) -> List[Optional[List[dict]]]:
+    """
+    Impacts for every event: industries with relevance > min_relevance,
+    score = opp_score * relevance, typed Opportunity / Threat / Neutral by
+    +-type_threshold on the unrounded score, sorted by |rounded score|
+    descending. None for events without a relevant industry.
+    """
+    n = len(opp_scores)
+    if n == 0:
+        return []
+    # zip(labels, scores) semantics: pairs up to the shorter list
+    widths = [min(len(l), len(r)) for l, r in zip(labels, relevances)]
+    rel = _relevance_matrix(relevances, widths)
+    keep = rel > min_relevance
+    opp = np.asarray(opp_scores, dtype=np.float64)[:, None]
+    raw = np.where(keep, opp * np.where(keep, rel, 0.0), 0.0)
+
+    # Kept cells of every row, in output order (|rounded score| desc, ties in label order)
+    scores = round4(raw)
+    order = np.argsort(np.where(keep, -np.abs(scores), np.inf), axis=1, kind="stable")
+    counts = keep.sum(axis=1)
+    rows = np.repeat(np.arange(n), counts)
+    cols = order[np.arange(order.shape[1]) < counts[:, None]]
+    picked = raw[rows, cols]
+    kinds = np.where(picked > type_threshold, OPPORTUNITY, np.where(picked < -type_threshold, THREAT, NEUTRAL))
+
+    flat = zip(rows.tolist(), cols.tolist(), scores[rows, cols].tolist(), kinds.tolist(),
+               round4(rel[rows, cols]).tolist())
+    impacts = [{"industry": labels[i][j], "score": s, "impact_type": IMPACT_TYPE_NAMES[k], "relevance": r}
+               for i, j, s, k, r in flat]
+
+    out: List[Optional[List[dict]]] = []
+    start = 0
+    for count in counts.tolist():
+        out.append(impacts[start:start + count] if count else None)
+        start += count
+    return out
@@ -0,0 +1,87 @@
+"""
+engine/index_meta.py
+
+meta.json handling shared by the append-only stores under history/
+(columnar archive, ANN index, search index).
+
+Each store appends its data files first and then replaces meta.json, which
+is the commit point: readers and the next append only trust what
+meta.json lists. Bytes or files beyond it are the leftovers of an
+interrupted append and are discarded by the store.
+
+meta.json also records which snapshots were applied (AppliedSnapshots), so
+replayed runs are skipped, and the ANN and search indexes keep the ids
+they indexed recently (RecentIds), so an event re-emitted by later runs is
+indexed once.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+
+def load_meta(path: Path, defaults: Dict[str, Any], label: str) -> Dict[str, Any]:
+    """Committed metadata over defaults (just the defaults for a new store)."""
+    meta = dict(defaults)
+    try:
+        with Path(path).open("r", encoding="utf-8") as f:
+            meta.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[WARN] Failed to load {label} metadata: {e}")
+    return meta
+
+
+class AppliedSnapshots:
+    """The newest applied run timestamp and the snapshot ids applied at it (snapshots arrive in time order)."""
+
+    def __init__(self, meta: Dict[str, Any]):
+        self.through = meta["applied_through"]
+        self.ids = list(meta["applied_ids"])
+
+    def is_new(self, snapshot: Dict[str, Any]) -> bool:
+        """False for snapshots without a timestamp and for ones applied before."""
+        ts = snapshot.get("run_timestamp")
+        if not ts:
+            return False
+        return ts > self.through or (ts == self.through and snapshot.get("snapshot_id") not in self.ids)
+
+    def mark(self, snapshot: Dict[str, Any]):
+        ts = snapshot["run_timestamp"]
+        if ts != self.through:
+            self.through, self.ids = ts, []
+        self.ids.append(snapshot.get("snapshot_id"))
+
+    def meta(self) -> Dict[str, Any]:
+        return {"applied_through": self.through, "applied_ids": self.ids}
+
+
+class RecentIds:
+    """Event ids indexed within the last horizon_days (id -> run epoch seconds)."""
+
+    def __init__(self, recent: Dict[str, int], horizon_days: float):
+        self.seen = dict(recent)
+        self.horizon = horizon_days * 86400
+
+    def start_run(self, run_at: int):
+        """Forget ids last indexed more than the horizon before this run."""
+        cutoff = run_at - self.horizon
+        self.seen = {eid: at for eid, at in self.seen.items() if at >= cutoff}
+
+    def add(self, event_id: str, run_at: int) -> bool:
+        """Record event_id for this run; False if it was already indexed within the horizon."""
+        if event_id in self.seen:
+            return False
+        self.seen[event_id] = run_at
+        return True
+
+
+def commit_meta(path: Path, meta: Dict[str, Any]):
+    """Atomically replace meta.json: the commit point of an append, merge or retrain."""
+    path = Path(path)
+    tmp = path.with_suffix(".json.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(meta, f, separators=(",", ":"))
+    os.replace(tmp, path)
@@ -0,0 +1,91 @@
+"""
+engine/keyword_matcher.py
+
+Compiled multi-pattern keyword matcher (Aho-Corasick) shared by the
+rule-based classifiers.
+
+Rules are given as {category: [keyword, ...]}. The automaton is built once
+and reports every category whose keywords occur in a text in a single
+linear pass, so evaluation cost does not grow with the size of the keyword
+vocabulary. Matching is plain case-insensitive substring matching, i.e. the
+same semantics as `keyword in text.lower()`.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over lowercase keywords grouped by category."""
+
+    def __init__(self, rules: Dict[str, Iterable[str]]):
+        self.categories = list(rules)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Tuple[str, str], ...]] = [()]
+
+        for category, keywords in rules.items():
+            for keyword in keywords:
+                self._insert(keyword.lower(), category)
+        self._build_failure_links()
+
+    def _insert(self, keyword: str, category: str):
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        if (category, keyword) not in self._out[state]:
+            self._out[state] = self._out[state] + ((category, keyword),)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # Inherit matches ending at the failure state (suffix keywords)
+                if self._out[self._fail[nxt]]:
+                    self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str):
+        """Yield (category, keyword) for every keyword occurrence in text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                yield from out[state]
+
+    def hits(self, text: str) -> Dict[str, Set[str]]:
+        """Return {category: {matched keywords}} for all categories that fire."""
+        found: Dict[str, Set[str]] = {}
+        for category, keyword in self.iter_matches(text):
+            found.setdefault(category, set()).add(keyword)
+        return found
+
+    def match_categories(self, text: str) -> Set[str]:
+        """Return the set of categories with at least one keyword in text."""
+        return {category for category, _ in self.iter_matches(text)}
+
+    def first_category(self, text: str, default=None):
+        """Return the first category (in rule order) that matches, like an if/elif chain."""
+        matched = self.match_categories(text)
+        for category in self.categories:
+            if category in matched:
+                return category
+        return default
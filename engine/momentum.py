@@ -0,0 +1,191 @@
+"""
+engine/momentum.py
+
+Incrementally maintained outlook statistics per industry and per thematic
+category.
+
+Each snapshot contributes one observation per key: the mean impact score of
+that industry (or the mean opportunity score of that category) over the
+run's events. Every key keeps a fixed-size state that is updated in O(1):
+
+    runs, observations          counts
+    mean, m2                    Welford running mean / variance (all time)
+    fast, slow, slow_var        time-decayed EWMAs (half-lives FAST_HALF_LIFE_HOURS /
+                                SLOW_HALF_LIFE_HOURS) and the EW variance around `slow`
+    last_at, last_value         time and value of the latest observation
+
+Momentum is the z-score of the short-term level against the baseline:
+(fast - slow) / sqrt(slow_var). Decay uses the time between observations,
+so irregular run schedules are weighted correctly.
+
+CLI:
+    python engine/momentum.py rebuild     # recompute from the history store
+"""
+
+import calendar
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    from engine.rollups import DIMENSIONS, observations, parse_ts
+except ImportError:
+    from rollups import DIMENSIONS, observations, parse_ts
+
+FAST_HALF_LIFE_HOURS = 24
+SLOW_HALF_LIFE_HOURS = 168
+# Momentum is reported once the baseline has seen this many runs
+MIN_RUNS = 5
+# |momentum| above this is labelled rising / falling
+TREND_THRESHOLD = 1.0
+
+RUNS, OBS, MEAN, M2, FAST, SLOW, SLOW_VAR, LAST_AT, LAST_VALUE = range(9)
+
+
+def _decay(dt_hours: float, half_life: float) -> float:
+    """Weight of a new observation after dt_hours (1 - 2^(-dt/half_life))."""
+    return 1.0 - math.pow(2.0, -max(dt_hours, 0.0) / half_life)
+
+
+def update_state(state: Optional[List[float]], value: float, count: int, at: float) -> List[float]:
+    """Fold one run's observation (mean `value` over `count` items at epoch `at`) into a key's state."""
+    if state is None:
+        return [1, count, value, 0.0, value, value, 0.0, at, value]
+    state[RUNS] += 1
+    state[OBS] += count
+    # Welford
+    delta = value - state[MEAN]
+    state[MEAN] += delta / state[RUNS]
+    state[M2] += delta * (value - state[MEAN])
+    # Time-decayed EWMAs; EW variance around the slow average (West's update)
+    dt = (at - state[LAST_AT]) / 3600.0
+    state[FAST] += _decay(dt, FAST_HALF_LIFE_HOURS) * (value - state[FAST])
+    alpha = _decay(dt, SLOW_HALF_LIFE_HOURS)
+    diff = value - state[SLOW]
+    incr = alpha * diff
+    state[SLOW] += incr
+    state[SLOW_VAR] = (1.0 - alpha) * (state[SLOW_VAR] + diff * incr)
+    state[LAST_AT] = max(state[LAST_AT], at)
+    state[LAST_VALUE] = value
+    return state
+
+
+def momentum(state: List[float]) -> float:
+    if state[RUNS] < MIN_RUNS or state[SLOW_VAR] <= 1e-12:
+        return 0.0
+    return (state[FAST] - state[SLOW]) / math.sqrt(state[SLOW_VAR])
+
+
+def describe(state: List[float]) -> Dict[str, Any]:
+    z = momentum(state)
+    runs = int(state[RUNS])
+    variance = state[M2] / (runs - 1) if runs > 1 else 0.0
+    return {
+        "runs": runs,
+        "observations": int(state[OBS]),
+        "mean": round(state[MEAN], 4),
+        "std": round(math.sqrt(variance), 4),
+        "ewma_fast": round(state[FAST], 4),
+        "ewma_slow": round(state[SLOW], 4),
+        "momentum": round(z, 3),
+        "trend": "rising" if z > TREND_THRESHOLD else "falling" if z < -TREND_THRESHOLD else "steady",
+        "last_value": round(state[LAST_VALUE], 4),
+        "last_at": state[LAST_AT],
+    }
+
+
+class MomentumStats:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        # state[dimension][key] = fixed-size list (see module docstring)
+        self.state: Dict[str, Dict[str, List[float]]] = {d: {} for d in DIMENSIONS}
+        self.applied_through: str = ""
+        self.applied_ids: List[str] = []
+
+    @classmethod
+    def load(cls, path: Path) -> "MomentumStats":
+        stats = cls(path)
+        if stats.path.exists():
+            try:
+                with stats.path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+                stats.state.update(data.get("state", {}))
+                stats.applied_through = data.get("applied_through", "")
+                stats.applied_ids = data.get("applied_ids", [])
+            except Exception as e:
+                print(f"[WARN] Failed to load momentum stats: {e}")
+        return stats
+
+    def save(self):
+        data = {"applied_through": self.applied_through, "applied_ids": self.applied_ids, "state": self.state}
+        try:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            tmp.replace(self.path)
+        except Exception as e:
+            print(f"[WARN] Failed to save momentum stats: {e}")
+
+    def add_snapshot(self, snapshot: Dict[str, Any]) -> bool:
+        """Fold one run into every key it touches. Snapshots already applied are ignored."""
+        ts = snapshot.get("run_timestamp")
+        if not ts:
+            return False
+        sid = snapshot.get("snapshot_id")
+        if ts < self.applied_through or (ts == self.applied_through and sid in self.applied_ids):
+            return False
+
+        at = calendar.timegm(parse_ts(ts).timetuple())
+
+        sums: Dict[tuple, List[float]] = {}
+        for dimension, key, score, _ in observations(snapshot):
+            cell = sums.setdefault((dimension, key), [0.0, 0])
+            cell[0] += score
+            cell[1] += 1
+        for (dimension, key), (total, count) in sums.items():
+            per_dim = self.state[dimension]
+            per_dim[key] = update_state(per_dim.get(key), total / count, count, at)
+
+        if ts != self.applied_through:
+            self.applied_through, self.applied_ids = ts, []
+        self.applied_ids.append(sid)
+        return True
+
+    # ---- queries ----
+    def keys(self, dimension: str) -> List[str]:
+        return sorted(self.state.get(dimension, {}))
+
+    def get(self, dimension: str, key: str) -> Optional[Dict[str, Any]]:
+        state = self.state.get(dimension, {}).get(key)
+        return describe(state) if state is not None else None
+
+    def summary(self) -> Dict[str, Any]:
+        """Every key, strongest momentum first within each dimension."""
+        out: Dict[str, Any] = {
+            "applied_through": self.applied_through,
+            "half_life_hours": {"fast": FAST_HALF_LIFE_HOURS, "slow": SLOW_HALF_LIFE_HOURS},
+        }
+        for dimension, per_key in self.state.items():
+            rows = {key: describe(state) for key, state in per_key.items()}
+            out[dimension] = dict(sorted(rows.items(), key=lambda kv: -abs(kv[1]["momentum"])))
+        return out
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    root = Path(__file__).resolve().parent.parent
+    sys.path.append(str(root))
+    from engine.history_store import HistoryStore
+
+    p = argparse.ArgumentParser(description="Industry / category momentum statistics")
+    p.add_argument("cmd", choices=["rebuild"])
+    args = p.parse_args()
+
+    stats = MomentumStats(root / "output" / "momentum.json")
+    store = HistoryStore(root / "history")
+    count = sum(stats.add_snapshot(s) for s in store.read_many(store.entries()))
+    stats.save()
+    print(f"[OK] Rebuilt momentum stats from {count} snapshots → {stats.path}")
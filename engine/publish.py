@@ -0,0 +1,172 @@
+"""
+engine/publish.py
+
+Publish-time writers for the files the server hands out.
+
+Outputs are written minified, with gzip (and brotli, when the optional
+package is installed) precompressed siblings next to them:
+    live_output.json  live_output.json.gz  live_output.json.br
+so the server can send the encoded bytes straight from disk instead of
+compressing per request. Siblings are written first and the plain file
+last, each via an atomic rename: once a new version of the plain file is
+visible, its encoded variants are already in place.
+
+A pipeline run publishes all of its outputs as one immutable generation:
+
+    output/generations/<id>.tmp/   files written here, invisible to readers
+    output/generations/<id>/       renamed into place when complete
+    output/latest.json             manifest naming the current generation,
+                                   atomically replaced last
+
+Readers resolve files through the manifest, so they never see a torn file
+or a mix of two runs. A generation in which any file failed to write is
+not committed; the previous one stays current. Plain output/<name> paths are kept as copies of the
+current generation for scripts that read the directory. (Copies rather
+than hard links, since some of those scripts rewrite the files in place.)
+"""
+
+import gzip
+import json
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PRECOMPRESSED_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+GENERATIONS_DIRNAME = "generations"
+MANIFEST_NAME = "latest.json"
+# Older generations stay briefly so in-flight downloads can finish
+KEEP_GENERATIONS = 3
+
+
+def _atomic_write(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+def encode_variants(body: bytes) -> Dict[str, bytes]:
+    """Encoded forms of a body keyed by Content-Encoding name."""
+    variants = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=11)
+    return variants
+
+
+def write_precompressed(path: Path, body: bytes) -> int:
+    """Write body and its precompressed siblings; returns the plain size."""
+    path = Path(path)
+    for encoding, data in encode_variants(body).items():
+        _atomic_write(path.with_name(path.name + PRECOMPRESSED_SUFFIXES[encoding]), data)
+    _atomic_write(path, body)
+    return len(body)
+
+
+def dump_minified(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def publish_json(path: Path, obj: Any) -> int:
+    """Minified JSON plus .gz/.br siblings."""
+    return write_precompressed(path, dump_minified(obj))
+
+
+def load_manifest(output_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with (Path(output_dir) / MANIFEST_NAME).open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def resolve_output(output_dir: Path, name: str, manifest: Optional[Dict[str, Any]] = None) -> Path:
+    """Path of `name` (or one of its encoded siblings) in the current generation, else in output/."""
+    output_dir = Path(output_dir)
+    manifest = manifest if manifest is not None else load_manifest(output_dir)
+    if manifest and manifest.get("generation"):
+        base = name
+        for suffix in PRECOMPRESSED_SUFFIXES.values():
+            if name.endswith(suffix):
+                base = name[: -len(suffix)]
+        if base in manifest.get("files", []):
+            return output_dir / GENERATIONS_DIRNAME / manifest["generation"] / name
+    return output_dir / name
+
+
+def _atomic_copy(src: Path, dst: Path):
+    tmp = dst.with_name(dst.name + ".tmp")
+    shutil.copyfile(src, tmp)
+    tmp.replace(dst)
+
+
+class Generation:
+    """One run's outputs, made visible together by `commit`."""
+
+    def __init__(self, output_dir: Path, generation_id: str):
+        self.output_dir = Path(output_dir)
+        self.id = generation_id
+        self.root = self.output_dir / GENERATIONS_DIRNAME
+        self.path = self.root / generation_id
+        self.staging = self.root / f"{generation_id}.tmp"
+        self.files: List[str] = []
+        self.failed: List[str] = []
+        if self.staging.exists():
+            shutil.rmtree(self.staging)
+        self.staging.mkdir(parents=True)
+
+    def publish_json(self, name: str, obj: Any) -> int:
+        """Add a minified JSON file (with encoded siblings) to the generation."""
+        try:
+            body = dump_minified(obj)
+            # Not visible to readers until commit, so no per-file renames are needed
+            for encoding, data in encode_variants(body).items():
+                (self.staging / (name + PRECOMPRESSED_SUFFIXES[encoding])).write_bytes(data)
+            (self.staging / name).write_bytes(body)
+        except Exception:
+            self.failed.append(name)
+            raise
+        self.files.append(name)
+        return len(body)
+
+    def commit(self, manifest: Dict[str, Any]) -> Dict[str, Any]:
+        """Move the generation into place, then atomically point the manifest at it."""
+        # Readers would otherwise get that file from an older run next to this run's others
+        if self.failed:
+            raise RuntimeError(f"{', '.join(self.failed)} failed to write; keeping the previous generation")
+        if self.path.exists():
+            shutil.rmtree(self.path)
+        self.staging.rename(self.path)
+        manifest = {"generation": self.id, "files": list(self.files), **manifest}
+        _atomic_write(self.output_dir / MANIFEST_NAME, dump_minified(manifest))
+        self._mirror()
+        prune_generations(self.output_dir)
+        return manifest
+
+    def _mirror(self):
+        for name in self.files:
+            siblings = [name + s for s in PRECOMPRESSED_SUFFIXES.values() if (self.path / (name + s)).exists()]
+            for filename in siblings + [name]:
+                try:
+                    _atomic_copy(self.path / filename, self.output_dir / filename)
+                except OSError as e:
+                    print(f"[WARN] Failed to mirror {filename}: {e}")
+
+
+def prune_generations(output_dir: Path, keep: int = KEEP_GENERATIONS):
+    """Remove all but the newest `keep` generations (ids sort chronologically) and stale staging dirs."""
+    root = Path(output_dir) / GENERATIONS_DIRNAME
+    if not root.exists():
+        return
+    manifest = load_manifest(output_dir) or {}
+    current = manifest.get("generation")
+    dirs = sorted(d for d in root.iterdir() if d.is_dir())
+    done = [d for d in dirs if not d.name.endswith(".tmp")]
+    doomed = [d for d in dirs if d.name.endswith(".tmp")] + done[:-keep]
+    for d in doomed:
+        if d.name != current:
+            shutil.rmtree(d, ignore_errors=True)
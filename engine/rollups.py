@@ -0,0 +1,179 @@
+"""
+engine/rollups.py
+
+Precomputed time-series rollups per industry and per thematic category.
+
+Each snapshot is folded into hourly / daily / weekly buckets keyed by its
+run timestamp. A bucket is a fixed-size cell
+    [count, score_sum, score_min, score_max, opportunities, threats]
+so adding a snapshot costs O(events x impacts) and answering a series query
+never touches history. Industry cells aggregate event x impact pairs (impact
+score and type); category cells aggregate events (global opportunity score).
+
+CLI:
+    python engine/rollups.py rebuild     # recompute from the history store
+"""
+
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    from engine.constants import OPPORTUNITY_THRESHOLD, THREAT_THRESHOLD
+except ImportError:
+    from constants import OPPORTUNITY_THRESHOLD, THREAT_THRESHOLD
+
+RESOLUTIONS = ("hourly", "daily", "weekly")
+DIMENSIONS = ("industry", "category")
+
+# Older buckets are pruned per resolution (None = keep forever)
+RETENTION_DAYS = {"hourly": 31, "daily": 731, "weekly": None}
+
+COUNT, SUM, MIN, MAX, OPP, THREAT = range(6)
+
+
+def parse_ts(ts: str) -> datetime:
+    return datetime.strptime(ts[:19], "%Y-%m-%dT%H:%M:%S")
+
+
+def bucket_key(dt: datetime, resolution: str) -> str:
+    if resolution == "hourly":
+        return dt.strftime("%Y-%m-%dT%H:00Z")
+    if resolution == "daily":
+        return dt.strftime("%Y-%m-%d")
+    # Weekly buckets start on the ISO week's Monday
+    return (dt - timedelta(days=dt.weekday())).strftime("%Y-%m-%d")
+
+
+def observations(snapshot: Dict[str, Any]):
+    """Yield (dimension, key, score, kind) for every aggregatable value in a snapshot."""
+    for event in snapshot.get("events", []):
+        category = event.get("thematic_category")
+        if category:
+            score = float(event.get("opportunity_score", 0) or 0)
+            kind = "Opportunity" if score > OPPORTUNITY_THRESHOLD else "Threat" if score < THREAT_THRESHOLD else "Neutral"
+            yield "category", category, score, kind
+        for impact in event.get("impacts", []):
+            industry = impact.get("industry")
+            if industry:
+                yield "industry", industry, float(impact.get("score", 0) or 0), impact.get("impact_type")
+
+
+class Rollups:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        # series[dimension][key][resolution][bucket] = cell
+        self.series: Dict[str, Dict[str, Dict[str, Dict[str, List[float]]]]] = {d: {} for d in DIMENSIONS}
+        self.applied_through: str = ""
+        self.applied_ids: List[str] = []
+
+    @classmethod
+    def load(cls, path: Path) -> "Rollups":
+        rollups = cls(path)
+        if rollups.path.exists():
+            try:
+                with rollups.path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+                rollups.series.update(data.get("series", {}))
+                rollups.applied_through = data.get("applied_through", "")
+                rollups.applied_ids = data.get("applied_ids", [])
+            except Exception as e:
+                print(f"[WARN] Failed to load rollups: {e}")
+        return rollups
+
+    def save(self):
+        data = {"applied_through": self.applied_through, "applied_ids": self.applied_ids, "series": self.series}
+        try:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            tmp.replace(self.path)
+        except Exception as e:
+            print(f"[WARN] Failed to save rollups: {e}")
+
+    def add_snapshot(self, snapshot: Dict[str, Any]) -> bool:
+        """Fold one snapshot into every bucket. Snapshots already applied are ignored."""
+        ts = snapshot.get("run_timestamp")
+        if not ts:
+            return False
+        sid = snapshot.get("snapshot_id")
+        if ts < self.applied_through or (ts == self.applied_through and sid in self.applied_ids):
+            return False
+
+        dt = parse_ts(ts)
+        buckets = {res: bucket_key(dt, res) for res in RESOLUTIONS}
+        for dimension, key, score, kind in observations(snapshot):
+            per_res = self.series[dimension].setdefault(key, {})
+            for res, bucket in buckets.items():
+                cell = per_res.setdefault(res, {}).get(bucket)
+                if cell is None:
+                    per_res[res][bucket] = [1, score, score, score, int(kind == "Opportunity"), int(kind == "Threat")]
+                    continue
+                cell[COUNT] += 1
+                cell[SUM] += score
+                cell[MIN] = min(cell[MIN], score)
+                cell[MAX] = max(cell[MAX], score)
+                cell[OPP] += kind == "Opportunity"
+                cell[THREAT] += kind == "Threat"
+
+        if ts != self.applied_through:
+            self.applied_through, self.applied_ids = ts, []
+        self.applied_ids.append(sid)
+        self._prune(dt)
+        return True
+
+    def _prune(self, now: datetime):
+        for res, days in RETENTION_DAYS.items():
+            if days is None:
+                continue
+            cutoff = bucket_key(now - timedelta(days=days), res)
+            for per_key in self.series.values():
+                for per_res in per_key.values():
+                    buckets = per_res.get(res, {})
+                    for bucket in [b for b in buckets if b < cutoff]:
+                        del buckets[bucket]
+
+    # ---- queries ----
+    def keys(self, dimension: str) -> List[str]:
+        return sorted(self.series.get(dimension, {}))
+
+    def query(self, dimension: str, key: str, resolution: str = "hourly",
+              start: Optional[str] = None, end: Optional[str] = None, last: Optional[int] = None) -> List[Dict[str, Any]]:
+        buckets = self.series.get(dimension, {}).get(key, {}).get(resolution, {})
+        points = []
+        for bucket in sorted(buckets):
+            if (start and bucket < start) or (end and bucket > end):
+                continue
+            count, total, lo, hi, opp, threat = buckets[bucket]
+            points.append({
+                "t": bucket,
+                "count": int(count),
+                "mean": round(total / count, 4),
+                "min": round(lo, 4),
+                "max": round(hi, 4),
+                "opportunity_ratio": round(opp / count, 4),
+                "threat_ratio": round(threat / count, 4),
+            })
+        if last:
+            points = points[-last:]
+        return points
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    root = Path(__file__).resolve().parent.parent
+    sys.path.append(str(root))
+    from engine.history_store import HistoryStore
+
+    p = argparse.ArgumentParser(description="Time-series rollup maintenance")
+    p.add_argument("cmd", choices=["rebuild"])
+    args = p.parse_args()
+
+    rollups = Rollups(root / "output" / "rollups.json")
+    store = HistoryStore(root / "history")
+    count = sum(rollups.add_snapshot(s) for s in store.read_many(store.entries()))
+    rollups.save()
+    print(f"[OK] Rebuilt rollups from {count} snapshots → {rollups.path}")
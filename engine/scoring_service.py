@@ -0,0 +1,186 @@
+"""
+engine/scoring_service.py
+
+Request-coalescing front end for on-demand text scoring.
+
+Callers on any thread submit texts and block on futures. A single worker
+thread owns the (warm) models: it drains the queue into micro-batches of up
+to `max_batch` texts, waiting at most `max_wait` seconds for a burst to
+fill, so concurrent requests share one batched model call. Identical texts
+that are queued or already being scored attach to the same future, and
+finished results are kept in an LRU cache. End-to-end request latencies
+are kept for p50/p99 reporting.
+"""
+
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_MAX_BATCH = 32
+DEFAULT_MAX_WAIT = 0.005
+DEFAULT_CACHE_SIZE = 4096
+LATENCY_SAMPLES = 2048
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+class ScoringService:
+    """
+    `load_scorer()` runs once on the worker thread and returns
+    `scorer(texts) -> [result, ...]` (one result per text, same order).
+    """
+
+    def __init__(self, load_scorer: Callable[[], Callable[[List[str]], List[Dict[str, Any]]]],
+                 max_batch: int = DEFAULT_MAX_BATCH, max_wait: float = DEFAULT_MAX_WAIT,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self._load_scorer = load_scorer
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.cache_size = cache_size
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._ready = threading.Event()
+        self._load_error: Optional[Exception] = None
+        self._thread: Optional[threading.Thread] = None
+        self.latencies_ms = deque(maxlen=LATENCY_SAMPLES)
+        self.requests = 0
+        self.texts = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched_texts = 0
+
+    # ---- lifecycle ----
+    def start(self):
+        """Start the worker; models load in the background so startup is not blocked."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="scoring-service", daemon=True)
+                self._thread.start()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set() and self._load_error is None
+
+    # ---- requests ----
+    def score(self, texts: List[str], timeout: float = 60.0) -> List[Dict[str, Any]]:
+        self.start()
+        started = time.perf_counter()
+        futures = []
+        with self._lock:
+            # Nothing would ever score new work once loading has failed
+            if self._load_error is not None:
+                raise RuntimeError(f"Scoring models failed to load: {self._load_error}")
+            self.requests += 1
+            self.texts += len(texts)
+            for text in texts:
+                cached = self._cache.get(text)
+                if cached is not None:
+                    self._cache.move_to_end(text)
+                    self.cache_hits += 1
+                    done: Future = Future()
+                    done.set_result(dict(cached, cached=True))
+                    futures.append(done)
+                    continue
+                pending = self._pending.get(text)
+                if pending is not None:
+                    # Same text already queued or in flight: share its result
+                    self.coalesced += 1
+                    futures.append(pending)
+                    continue
+                pending = self._pending[text] = Future()
+                futures.append(pending)
+                self._queue.put(text)
+        if not self._ready.wait(timeout):
+            raise TimeoutError("Scoring models are still loading")
+        if self._load_error is not None:
+            raise RuntimeError(f"Scoring models failed to load: {self._load_error}")
+        try:
+            results = [f.result(timeout=timeout) for f in futures]
+        except FuturesTimeoutError:
+            # Not the builtin TimeoutError before Python 3.11
+            raise TimeoutError("Scoring timed out") from None
+        self.latencies_ms.append((time.perf_counter() - started) * 1000)
+        return results
+
+    # ---- worker ----
+    def _next_batch(self) -> List[str]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        try:
+            scorer = self._load_scorer()
+        except Exception as e:
+            print(f"[ERROR] Scoring models failed to load: {e}")
+            # Fail everything already queued and reject later submissions,
+            # all under the lock so no request can slip in between
+            with self._lock:
+                self._load_error = e
+                for future in self._pending.values():
+                    future.set_exception(RuntimeError(f"Scoring models failed to load: {e}"))
+                self._pending.clear()
+                while not self._queue.empty():
+                    self._queue.get_nowait()
+            self._ready.set()
+            return
+        self._ready.set()
+
+        while True:
+            batch = self._next_batch()
+            try:
+                results = scorer(batch)
+                error = None
+            except Exception as e:
+                results, error = None, e
+            with self._lock:
+                self.batches += 1
+                self.batched_texts += len(batch)
+                for i, text in enumerate(batch):
+                    future = self._pending.pop(text)
+                    if error is not None:
+                        future.set_exception(error)
+                        continue
+                    result = dict(results[i], cached=False)
+                    self._cache[text] = results[i]
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+                    future.set_result(result)
+
+    # ---- stats ----
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies_ms)
+        return {
+            "ready": self.ready,
+            "requests": self.requests,
+            "texts": self.texts,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "mean_batch_size": round(self.batched_texts / self.batches, 2) if self.batches else 0.0,
+            "latency_ms": {
+                "samples": len(latencies),
+                "p50": round(percentile(latencies, 0.50), 2),
+                "p90": round(percentile(latencies, 0.90), 2),
+                "p99": round(percentile(latencies, 0.99), 2),
+                "max": round(latencies[-1], 2) if latencies else 0.0,
+            },
+        }
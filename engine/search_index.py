@@ -0,0 +1,471 @@
+"""
+engine/search_index.py
+
+Full-text search over every processed headline.
+
+An inverted index with positional postings, kept on disk as immutable
+segments under history/search/. Each run writes one small segment with
+its new events. Once MERGE_FACTOR trailing segments share a size tier
+(log base MERGE_FACTOR of their document count) they are merged into one,
+so there are O(log N) segments and a posting is rewritten O(log N) times
+over its life.
+
+Layout under history/search/:
+    meta.json               live segments, corpus totals, applied snapshots,
+                            recently indexed event ids
+    seg-NNNNNN.docs         one DOC record per document: event id, event time, length
+    seg-NNNNNN.post         uint32 (little-endian) postings. Per term: its doc
+                            ordinals (ascending), df + 1 offsets into its
+                            positions, then the positions
+    seg-NNNNNN.terms.json   term -> [offset, df] (offset in uint32 units)
+
+Segment files are written first and meta.json is replaced last, which is
+the commit point (engine/index_meta.py). Files of segments meta.json does not list (an
+interrupted append or merge) are deleted before the next append.
+
+Words come from engine/text_tokens.py, so positions count words after
+stopword removal ("port of Colombo" matches "port Colombo"). Industries,
+category and source are indexed as filter terms ("industry:Tea") with no
+positions. An event is indexed once: ids seen within HORIZON_DAYS (longer
+than the event window) are skipped when they reappear in later runs.
+
+A query is a conjunction of words and quoted phrases. Candidates come from
+the term with the fewest postings in each segment, and every other term is
+probed by binary search on its doc ordinals. A query therefore costs about
+the size of its most selective term, not the size of the history.
+Segments outside a date filter are skipped by their time range, and
+segments are scanned newest first until MAX_MATCHES matches are found or
+MAX_CANDIDATES candidates were checked (the result is then flagged as
+truncated: the best matches among the most recent ones).
+Matches are ranked by BM25. A phrase scores with its phrase frequency and
+the summed idf of its words.
+
+CLI:
+    python engine/search_index.py build                       # rebuild from the history store
+    python engine/search_index.py query '"colombo port" fuel' [--industry Tea] [--since 2025-11-01] [-k 10]
+"""
+
+import bisect
+import calendar
+import heapq
+import json
+import math
+import mmap
+import os
+import shutil
+import struct
+import sys
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from engine.event_query import parse_time
+    from engine.index_meta import AppliedSnapshots, RecentIds, commit_meta, load_meta
+    from engine.rollups import parse_ts
+    from engine.text_tokens import headline_events, words
+except ImportError:
+    from event_query import parse_time
+    from index_meta import AppliedSnapshots, RecentIds, commit_meta, load_meta
+    from rollups import parse_ts
+    from text_tokens import headline_events, words
+
+ID_WIDTH = 24
+# event id (NUL-padded), event time (epoch seconds), length in words
+DOC = struct.Struct(f"<{ID_WIDTH}sdI")
+MERGE_FACTOR = 8
+HORIZON_DAYS = 7
+# Stop scanning (newest first) once this many documents matched, or this
+# many candidates were checked; bounds the cost of very broad queries
+MAX_MATCHES = 5000
+MAX_CANDIDATES = 50000
+BM25_K1 = 1.2
+BM25_B = 0.75
+FILTER_FIELDS = ("industry", "category", "source")
+
+META_FILENAME = "meta.json"
+SEGMENT_PREFIX = "seg-"
+
+
+def filter_term(field: str, value: str) -> str:
+    return f"{field}:{value}"
+
+
+def document(event: Dict[str, Any]) -> Tuple[Dict[str, List[int]], int]:
+    """term -> positions for one event (filter terms have none), and its length in words."""
+    terms: Dict[str, List[int]] = {}
+    tokens = words(event.get("text", ""))
+    for pos, word in enumerate(tokens):
+        terms.setdefault(word, []).append(pos)
+    values = {("category", event.get("thematic_category")), ("source", event.get("source"))}
+    values.update(("industry", impact.get("industry")) for impact in event.get("impacts", []))
+    for field, value in values:
+        if value:
+            terms.setdefault(filter_term(field, value), [])
+    return terms, len(tokens)
+
+
+def parse_query(query: str) -> List[List[str]]:
+    """Clauses of a query: one word each, or the words of a "quoted phrase"."""
+    clauses: List[List[str]] = []
+    for i, part in enumerate(query.split('"')):
+        tokens = words(part)
+        if i % 2 and tokens:
+            clauses.append(tokens)
+        else:
+            clauses.extend([t] for t in tokens)
+    return list({" ".join(c): c for c in clauses}.values())
+
+
+def tier(docs: int) -> int:
+    return int(math.log(max(docs, 1), MERGE_FACTOR))
+
+
+class _SegmentWriter:
+    """Writes one segment term by term (terms must arrive in sorted order)."""
+
+    def __init__(self, root: Path, name: str):
+        self.root, self.name = root, name
+        self.post = (root / f"{name}.post").open("wb")
+        self.size = 0
+        self.terms: Dict[str, List[int]] = {}
+
+    def add_term(self, term: str, docs: array, starts: array, positions: array):
+        self.terms[term] = [self.size, len(docs)]
+        for part in (docs, starts, positions):
+            if sys.byteorder != "little":
+                part = array("I", part)
+                part.byteswap()
+            part.tofile(self.post)
+            self.size += len(part)
+
+    def finish(self, docs: List[Tuple[str, float, int]]) -> Dict[str, Any]:
+        self.post.close()
+        with (self.root / f"{self.name}.docs").open("wb") as f:
+            for event_id, at, length in docs:
+                f.write(DOC.pack(event_id.encode("ascii"), at, length))
+        with (self.root / f"{self.name}.terms.json").open("w", encoding="utf-8") as f:
+            json.dump(self.terms, f, ensure_ascii=False, separators=(",", ":"))
+        return {"name": self.name, "docs": len(docs), "length": sum(d[2] for d in docs),
+                "min_at": min(d[1] for d in docs), "max_at": max(d[1] for d in docs)}
+
+
+class Segment:
+    """Read-only view of one segment; postings are slices of the memory-mapped .post file."""
+
+    def __init__(self, root: Path, info: Dict[str, Any]):
+        self.info = info
+        self.name, self.docs = info["name"], info["docs"]
+        with (root / f"{self.name}.terms.json").open("r", encoding="utf-8") as f:
+            self.terms: Dict[str, List[int]] = json.load(f)
+        self.post = self._load(root / f"{self.name}.post", "I")
+        self.doc_table = self._load(root / f"{self.name}.docs", "B")
+
+    @staticmethod
+    def _load(path: Path, typecode: str):
+        if sys.byteorder != "little" and typecode != "B":
+            table = array(typecode)
+            with path.open("rb") as f:
+                table.frombytes(f.read())
+            table.byteswap()
+            return memoryview(table)
+        with path.open("rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return memoryview(array(typecode))
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast(typecode)
+
+    def df(self, term: str) -> int:
+        entry = self.terms.get(term)
+        return entry[1] if entry else 0
+
+    def postings(self, term: str) -> Optional[Tuple[memoryview, memoryview, memoryview]]:
+        """(doc ordinals, position offsets, positions) of a term, or None."""
+        entry = self.terms.get(term)
+        if entry is None:
+            return None
+        offset, df = entry
+        starts = self.post[offset + df:offset + 2 * df + 1]
+        base = offset + 2 * df + 1
+        return self.post[offset:offset + df], starts, self.post[base:base + starts[df]]
+
+    def doc(self, ordinal: int) -> Tuple[str, float, int]:
+        raw_id, at, length = DOC.unpack_from(self.doc_table, ordinal * DOC.size)
+        return raw_id.rstrip(b"\0").decode("ascii"), at, length
+
+    def at(self, ordinal: int) -> float:
+        return struct.unpack_from("<d", self.doc_table, ordinal * DOC.size + ID_WIDTH)[0]
+
+
+def _phrase_frequency(lists: List[Tuple[memoryview, memoryview, memoryview]], idx: List[int]) -> int:
+    """Occurrences of consecutive positions p, p+1, ... across the terms of a phrase."""
+    spans = []
+    for (_, starts, positions), i in zip(lists, idx):
+        spans.append(set(positions[starts[i]:starts[i + 1]]))
+    return sum(1 for p in spans[0] if all(p + j in spans[j] for j in range(1, len(spans))))
+
+
+# Segments are immutable, so readers share them across index generations.
+# Readers are built on server request threads, hence the lock.
+_open_segments: Dict[Path, Segment] = {}
+_open_segments_lock = threading.Lock()
+
+
+class SearchIndex:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.meta_path = self.root / META_FILENAME
+        self.meta = load_meta(self.meta_path, {"next_segment": 1, "segments": [], "docs": 0, "length": 0,
+                                               "applied_through": "", "applied_ids": [], "recent": {}}, "search index")
+
+    def __len__(self) -> int:
+        return self.meta["docs"]
+
+    def _commit(self, **changes):
+        self.meta = dict(self.meta, **changes)
+        commit_meta(self.meta_path, self.meta)
+
+    def _new_segment(self) -> _SegmentWriter:
+        name = f"{SEGMENT_PREFIX}{self.meta['next_segment']:06d}"
+        self.meta["next_segment"] += 1
+        return _SegmentWriter(self.root, name)
+
+    def _remove_unlisted(self):
+        """Delete segment files that meta.json does not list (left by an interrupted append or merge)."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        live = {s["name"] for s in self.meta["segments"]}
+        for path in self.root.glob(f"{SEGMENT_PREFIX}*"):
+            if path.name.split(".")[0] not in live:
+                path.unlink(missing_ok=True)
+
+    # ---- appending ----
+    def append_many(self, snapshots: Iterable[Dict[str, Any]]) -> int:
+        """Index the new events of snapshots (in time order); already-applied snapshots are skipped."""
+        self._remove_unlisted()
+        applied = AppliedSnapshots(self.meta)
+        recent = RecentIds(self.meta["recent"], HORIZON_DAYS)
+        postings: Dict[str, List[Tuple[int, List[int]]]] = {}
+        docs: List[Tuple[str, float, int]] = []
+
+        added = 0
+        for snapshot in snapshots:
+            if not applied.is_new(snapshot):
+                continue
+            run_at = calendar.timegm(parse_ts(snapshot["run_timestamp"]).timetuple())
+            recent.start_run(run_at)
+            for event in headline_events(snapshot):
+                event_id = event.get("id")
+                if not event_id or len(event_id) > ID_WIDTH or not recent.add(event_id, run_at):
+                    continue
+                terms, length = document(event)
+                at = parse_time(event.get("timestamp"))
+                for term, positions in terms.items():
+                    postings.setdefault(term, []).append((len(docs), positions))
+                docs.append((event_id, run_at if at is None else at, length))
+            applied.mark(snapshot)
+            added += 1
+
+        if not added:
+            return 0
+        segments = list(self.meta["segments"])
+        if docs:
+            writer = self._new_segment()
+            for term in sorted(postings):
+                plist = postings[term]
+                starts = array("I", [0])
+                for _, positions in plist:
+                    starts.append(starts[-1] + len(positions))
+                writer.add_term(term, array("I", (d for d, _ in plist)), starts,
+                                array("I", (p for _, positions in plist for p in positions)))
+            segments.append(writer.finish(docs))
+        self._commit(segments=segments, docs=self.meta["docs"] + len(docs),
+                     length=self.meta["length"] + sum(d[2] for d in docs),
+                     recent=recent.seen, **applied.meta())
+        self._merge()
+        return added
+
+    def append(self, snapshot: Dict[str, Any]) -> bool:
+        return self.append_many([snapshot]) == 1
+
+    # ---- merging ----
+    def _merge(self):
+        """
+        Merge the trailing segments of tier <= t once MERGE_FACTOR of them have
+        tier exactly t (lowest t first), until no tier qualifies. A segment is
+        only rewritten when the merge moves it up a tier.
+        """
+        while True:
+            segments = self.meta["segments"]
+            tiers = [tier(s["docs"]) for s in segments]
+            for level in range(max(tiers, default=0) + 1):
+                run = same = 0
+                while run < len(tiers) and tiers[-1 - run] <= level:
+                    same += tiers[-1 - run] == level
+                    run += 1
+                if same >= MERGE_FACTOR:
+                    self._merge_tail(run)
+                    break
+            else:
+                return
+
+    def _merge_tail(self, count: int):
+        segments = self.meta["segments"]
+        sources = [Segment(self.root, info) for info in segments[-count:]]
+        writer = self._new_segment()
+        bases, base = [], 0
+        for seg in sources:
+            bases.append(base)
+            base += seg.docs
+        for term in sorted(set().union(*(seg.terms for seg in sources))):
+            docs, starts, positions = array("I"), array("I", [0]), array("I")
+            for seg, offset in zip(sources, bases):
+                plist = seg.postings(term)
+                if plist is None:
+                    continue
+                seg_docs, seg_starts, seg_positions = plist
+                shift = len(positions)
+                docs.extend(d + offset for d in seg_docs)
+                starts.extend(s + shift for s in seg_starts[1:])
+                positions.extend(seg_positions)
+            writer.add_term(term, docs, starts, positions)
+        info = writer.finish([seg.doc(i) for seg in sources for i in range(seg.docs)])
+        self._commit(segments=segments[:-count] + [info])
+        for seg in sources:
+            for suffix in (".docs", ".post", ".terms.json"):
+                (self.root / f"{seg.name}{suffix}").unlink(missing_ok=True)
+
+    # ---- searching ----
+    def reader(self) -> "SearchReader":
+        return SearchReader(self)
+
+
+class SearchReader:
+    """Query view of the committed segments."""
+
+    def __init__(self, index: SearchIndex):
+        self.docs = index.meta["docs"]
+        self.avg_length = index.meta["length"] / self.docs if self.docs else 0.0
+        self.segments: List[Segment] = []
+        live = set()
+        with _open_segments_lock:
+            for info in index.meta["segments"]:
+                path = index.root / info["name"]
+                live.add(path)
+                seg = _open_segments.get(path)
+                if seg is None:
+                    seg = _open_segments[path] = Segment(index.root, info)
+                self.segments.append(seg)
+            for path in [p for p in _open_segments if p.parent == index.root and p not in live]:
+                _open_segments.pop(path, None)
+
+    def idf(self, term: str) -> float:
+        df = sum(seg.df(term) for seg in self.segments)
+        return math.log(1.0 + (self.docs - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, filters: Optional[Dict[str, str]] = None, since: Optional[float] = None,
+               until: Optional[float] = None, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """BM25-ranked matches of a query: {"total", "truncated", "results": [(event id, score, event time)]}."""
+        clauses = parse_query(query)
+        if not clauses:
+            raise ValueError("Query has no searchable words")
+        filter_terms = [filter_term(f, v) for f, v in (filters or {}).items() if v]
+        weights = [sum(self.idf(t) for t in clause) for clause in clauses]
+        words_needed = list(dict.fromkeys(t for clause in clauses for t in clause))
+
+        matches: List[Tuple[float, float, str]] = []
+        truncated = False
+        checked = 0
+        for seg in reversed(self.segments):
+            if (since is not None and seg.info["max_at"] < since) or (until is not None and seg.info["min_at"] > until):
+                continue
+            lists = {t: seg.postings(t) for t in words_needed + filter_terms}
+            if any(p is None for p in lists.values()):
+                continue
+            driver = min(lists, key=lambda t: len(lists[t][0]))
+            for ordinal in reversed(lists[driver][0]):
+                if len(matches) >= MAX_MATCHES or checked >= MAX_CANDIDATES:
+                    truncated = True
+                    break
+                checked += 1
+                if since is not None or until is not None:
+                    at = seg.at(ordinal)
+                    if (since is not None and at < since) or (until is not None and at > until):
+                        continue
+                idx = {}
+                for term, (docs, _, _) in lists.items():
+                    i = bisect.bisect_left(docs, ordinal)
+                    if i == len(docs) or docs[i] != ordinal:
+                        break
+                    idx[term] = i
+                else:
+                    score = self._score(seg, ordinal, clauses, weights, lists, idx)
+                    if score is not None:
+                        event_id, at, _ = seg.doc(ordinal)
+                        matches.append((score, at, event_id))
+            if truncated:
+                break
+
+        best: Dict[str, Tuple[float, float, str]] = {}
+        for match in matches:
+            # An event indexed again after the dedupe horizon keeps its best score
+            if match[2] not in best or match > best[match[2]]:
+                best[match[2]] = match
+        ranked = heapq.nlargest(offset + limit, best.values())[offset:]
+        return {"total": len(best), "truncated": truncated,
+                "results": [(event_id, round(score, 4), at) for score, at, event_id in ranked]}
+
+    def _score(self, seg: Segment, ordinal: int, clauses: List[List[str]], weights: List[float],
+               lists: Dict[str, Tuple[memoryview, memoryview, memoryview]], idx: Dict[str, int]) -> Optional[float]:
+        length = seg.doc(ordinal)[2]
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * length / (self.avg_length or 1.0))
+        score = 0.0
+        for clause, weight in zip(clauses, weights):
+            if len(clause) == 1:
+                starts, i = lists[clause[0]][1], idx[clause[0]]
+                tf = starts[i + 1] - starts[i]
+            else:
+                tf = _phrase_frequency([lists[t] for t in clause], [idx[t] for t in clause])
+                if tf == 0:
+                    return None
+            score += weight * tf * (BM25_K1 + 1.0) / (tf + norm)
+        return score
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    root = Path(__file__).resolve().parent.parent
+    sys.path.append(str(root))
+    from engine.history_store import HistoryStore
+
+    p = argparse.ArgumentParser(description="Full-text search over processed headlines")
+    p.add_argument("cmd", choices=["build", "query"])
+    p.add_argument("text", nargs="?")
+    for field in FILTER_FIELDS:
+        p.add_argument(f"--{field}")
+    p.add_argument("--since")
+    p.add_argument("--until")
+    p.add_argument("-k", type=int, default=10)
+    args = p.parse_args()
+
+    search_dir = root / "history" / "search"
+    if args.cmd == "build":
+        shutil.rmtree(search_dir, ignore_errors=True)
+        history = HistoryStore(root / "history")
+        index = SearchIndex(search_dir)
+        entries = history.entries()
+        count = 0
+        for start in range(0, len(entries), 500):
+            count += index.append_many(history.read_many(entries[start:start + 500]))
+        print(f"[OK] Indexed {len(index)} headlines from {count} snapshots in "
+              f"{len(index.meta['segments'])} segments → {search_dir}")
+    else:
+        started = time.perf_counter()
+        found = SearchIndex(search_dir).reader().search(
+            args.text or "", {f: getattr(args, f) for f in FILTER_FIELDS},
+            parse_time(args.since), parse_time(args.until), args.k)
+        print(f"{found['total']}{'+' if found['truncated'] else ''} matches "
+              f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+        for event_id, score, at in found["results"]:
+            print(f"{score:8.3f}  {time.strftime('%Y-%m-%d %H:%M', time.gmtime(at))}  {event_id}")
@@ -0,0 +1,275 @@
+"""
+engine/story_clusters.py
+
+Online clustering of window events into stories.
+
+Every headline becomes a hashed TF-IDF vector over its words (engine/
+text_tokens.py; features are hashed into FEATURE_DIM slots, document
+frequencies are counted over the events currently clustered). A new event
+is compared only with stories that already hold a lexically similar event.
+Those are found through a MinHash LSH index: BANDS bands of ROWS min-hashes
+over the headline's word set, so cost per event depends on the number of
+near-duplicates, not on the number of stored events. It joins the candidate
+story whose centroid is most similar (cosine >= SIM_THRESHOLD), or starts a
+new story.
+
+Stories carry aggregate risk / opportunity, their sources and a
+representative headline (the member closest to the centroid). Removing an
+event (window eviction) subtracts it from its story again.
+
+Each member's text, scores and min-hashes are persisted
+(output/story_index.json). Vectors and centroids are rebuilt on load and
+the LSH buckets are refilled from the stored min-hashes, so only new events
+are MinHashed.
+"""
+
+import hashlib
+import json
+import math
+import random
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from engine.event_table import EventRecord
+    from engine.text_tokens import words
+except ImportError:
+    from event_table import EventRecord
+    from text_tokens import words
+
+FEATURE_DIM = 1 << 20
+BANDS = 16
+ROWS = 2
+# Minimum cosine between an event and a story centroid to join the story
+SIM_THRESHOLD = 0.35
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20251201)
+_MINHASH = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(BANDS * ROWS)]
+
+
+def features(text: str) -> Dict[int, int]:
+    """Term counts of a headline keyed by hashed feature index."""
+    tf: Dict[int, int] = {}
+    for word in words(text):
+        idx = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little") % FEATURE_DIM
+        tf[idx] = tf.get(idx, 0) + 1
+    return tf
+
+
+def min_hashes(feature_ids: Iterable[int]) -> List[int]:
+    """BANDS x ROWS min-hash values of a non-empty feature set."""
+    ids = list(feature_ids)
+    return [min((a * x + b) % _PRIME for x in ids) for a, b in _MINHASH]
+
+
+def lsh_bands(mins: List[int]) -> List[Tuple[int, ...]]:
+    """LSH keys (band, min-hash values...) from min_hashes()."""
+    return [(band,) + tuple(mins[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+
+class StoryMember:
+    __slots__ = ("event_id", "story", "headline", "source", "category", "score", "risk", "opportunity",
+                 "industries", "at", "vector", "mins", "bands")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"story": self.story, "headline": self.headline, "source": self.source, "category": self.category,
+                "score": self.score, "risk": self.risk, "opportunity": self.opportunity,
+                "industries": self.industries, "at": self.at, "mins": self.mins}
+
+
+class Story:
+    __slots__ = ("id", "members", "centroid", "norm2")
+
+    def __init__(self, story_id: str):
+        self.id = story_id
+        self.members: Dict[str, StoryMember] = {}
+        # Sum of the members' unit vectors, and its squared norm
+        self.centroid: Dict[int, float] = {}
+        self.norm2 = 0.0
+
+    def similarity(self, vector: Dict[int, float]) -> float:
+        if self.norm2 <= 0:
+            return 0.0
+        centroid = self.centroid
+        return sum(w * centroid.get(i, 0.0) for i, w in vector.items()) / math.sqrt(self.norm2)
+
+    def similarity_of(self, member: StoryMember) -> float:
+        return self.similarity(member.vector)
+
+    def _shift(self, vector: Dict[int, float], sign: float):
+        centroid = self.centroid
+        dot = sum(w * centroid.get(i, 0.0) for i, w in vector.items())
+        # |C +- v|^2 = |C|^2 +- 2 v.C + |v|^2, with |v| = 1
+        self.norm2 = max(self.norm2 + sign * 2.0 * dot + 1.0, 0.0)
+        for i, w in vector.items():
+            value = centroid.get(i, 0.0) + sign * w
+            if abs(value) < 1e-9:
+                centroid.pop(i, None)
+            else:
+                centroid[i] = value
+
+    def add(self, member: StoryMember):
+        self.members[member.event_id] = member
+        self._shift(member.vector, 1.0)
+
+    def remove(self, member: StoryMember):
+        self._shift(member.vector, -1.0)
+        del self.members[member.event_id]
+
+    def summary(self) -> Dict[str, Any]:
+        members = list(self.members.values())
+        rep = max(members, key=self.similarity_of)
+        n = len(members)
+        categories: Dict[str, int] = {}
+        industries: Dict[str, int] = {}
+        for m in members:
+            categories[m.category] = categories.get(m.category, 0) + 1
+            for industry in m.industries:
+                industries[industry] = industries.get(industry, 0) + 1
+        return {
+            "story_id": self.id,
+            "headline": rep.headline,
+            "size": n,
+            "sources": sorted({m.source for m in members}),
+            "thematic_category": max(categories, key=categories.get),
+            "first_seen": min(m.at for m in members),
+            "last_seen": max(m.at for m in members),
+            "mean_opportunity_score": round(sum(m.score for m in members) / n, 4),
+            "mean_risk_score": round(sum(m.risk for m in members) / n, 4),
+            "max_risk_score": max(m.risk for m in members),
+            "max_opportunity_score": max(m.opportunity for m in members),
+            "threats": sum(1 for m in members if m.risk > m.opportunity),
+            "opportunities": sum(1 for m in members if m.opportunity > m.risk),
+            "top_industries": sorted(industries, key=lambda k: -industries[k])[:5],
+            "event_ids": [m.event_id for m in members],
+        }
+
+
+class StoryClusters:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.members: Dict[str, StoryMember] = {}
+        self.stories: Dict[str, Story] = {}
+        self.next_id = 1
+        # LSH band key -> event ids; feature index -> number of clustered events using it
+        self.buckets: Dict[Tuple[int, ...], Set[str]] = {}
+        self.df: Dict[int, int] = {}
+
+    # ---- persistence ----
+    @classmethod
+    def load(cls, path: Path) -> "StoryClusters":
+        clusters = cls(path)
+        if not clusters.path.exists():
+            return clusters
+        try:
+            with clusters.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"[WARN] Failed to load story clusters, starting empty: {e}")
+            return clusters
+        clusters.next_id = data.get("next_id", 1)
+        for event_id, item in data.get("members", {}).items():
+            clusters._insert(event_id, item, item["story"])
+        return clusters
+
+    def save(self):
+        data = {"next_id": self.next_id, "members": {eid: m.to_dict() for eid, m in self.members.items()}}
+        try:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            tmp.replace(self.path)
+        except Exception as e:
+            print(f"[WARN] Failed to save story clusters: {e}")
+
+    # ---- vectors ----
+    def _vector(self, tf: Dict[int, int]) -> Dict[int, float]:
+        n = len(self.members) + 1
+        vec = {i: (1.0 + math.log(c)) * (math.log((n + 1) / (self.df.get(i, 0) + 1)) + 1.0) for i, c in tf.items()}
+        norm = math.sqrt(sum(w * w for w in vec.values())) or 1.0
+        return {i: w / norm for i, w in vec.items()}
+
+    # ---- updates ----
+    def _insert(self, event_id: str, item: Dict[str, Any], story_id: Optional[str]) -> str:
+        member = StoryMember()
+        member.event_id = event_id
+        for key in ("headline", "source", "category", "score", "risk", "opportunity", "industries", "at"):
+            setattr(member, key, item[key])
+        tf = features(member.headline)
+        member.vector = self._vector(tf)
+        # Reloaded members bring their min-hashes (files saved before they were stored do not)
+        mins = item.get("mins")
+        if mins is None:
+            mins = min_hashes(tf) if tf else []
+        member.mins = mins
+        member.bands = lsh_bands(mins) if mins else []
+
+        if story_id is None:
+            candidates = {self.members[eid].story for key in member.bands for eid in self.buckets.get(key, ())}
+            best, best_sim = None, SIM_THRESHOLD
+            for sid in sorted(candidates):
+                sim = self.stories[sid].similarity(member.vector)
+                if sim >= best_sim:
+                    best, best_sim = sid, sim
+            if best is None:
+                best = f"s{self.next_id}"
+                self.next_id += 1
+            story_id = best
+
+        member.story = story_id
+        story = self.stories.get(story_id)
+        if story is None:
+            story = self.stories[story_id] = Story(story_id)
+        story.add(member)
+        self.members[event_id] = member
+        for key in member.bands:
+            self.buckets.setdefault(key, set()).add(event_id)
+        for i in tf:
+            self.df[i] = self.df.get(i, 0) + 1
+        return story_id
+
+    def add(self, rec: EventRecord, risk: float, opportunity: float, at: str) -> str:
+        """Assign one event to a story (existing or new) and return the story id."""
+        if rec.id in self.members:
+            self.remove(rec.id)
+        item = {"headline": rec.text[:200], "source": rec.source_name, "category": rec.category_name,
+                "score": rec.score, "risk": risk, "opportunity": opportunity,
+                "industries": rec.top_industries(3), "at": at}
+        return self._insert(rec.id, item, None)
+
+    def remove(self, event_id: str):
+        member = self.members.pop(event_id, None)
+        if member is None:
+            return
+        story = self.stories[member.story]
+        story.remove(member)
+        if not story.members:
+            del self.stories[member.story]
+        for key in member.bands:
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(event_id)
+                if not bucket:
+                    del self.buckets[key]
+        for i in member.vector:
+            count = self.df.get(i, 0) - 1
+            if count > 0:
+                self.df[i] = count
+            else:
+                self.df.pop(i, None)
+
+    # ---- views ----
+    def __len__(self) -> int:
+        return len(self.stories)
+
+    def story_of(self, event_id: str) -> Optional[Story]:
+        member = self.members.get(event_id)
+        return self.stories[member.story] if member is not None else None
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Stories, largest first (then most recently active)."""
+        rows = [story.summary() for story in self.stories.values()]
+        rows.sort(key=lambda r: r["last_seen"], reverse=True)
+        rows.sort(key=lambda r: r["size"], reverse=True)
+        return rows
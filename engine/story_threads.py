@@ -0,0 +1,306 @@
+"""
+engine/story_threads.py
+
+Cross-run lineage of developing stories.
+
+Each run's new events are linked to earlier events of the same story, e.g.
+"Death toll rises to 643" one hour and "... rises to 650" the next. Links
+come from similarity matches: candidates are found through MinHash LSH
+(engine/story_clusters.py) over the events of the last HORIZON_DAYS. A
+candidate is a match when the Jaccard similarity of the two headlines'
+word sets is at least MATCH_JACCARD. Matched events are merged with an
+incremental union-find (union by size, path compression). Work per new
+event is bounded by BANDS x MAX_BUCKET candidates, and older history is
+never reprocessed.
+
+Persisted in output/story_threads.json (only threads still open):
+    parent      event id -> parent event id (the union-find forest)
+    threads     root event id -> timeline [[run_timestamp, event id, headline, score], ...]
+    recent      event id -> [epoch, feature ids, LSH band keys] within the horizon
+    applied_through / applied_ids   newest run folded in, so replays are no-ops
+
+A thread with no event inside the horizon can no longer grow. It is
+appended to output/story_threads.archive.jsonl and dropped from the state,
+so per-run cost depends on the horizon, not on the length of history.
+
+CLI:
+    python engine/story_threads.py rebuild           # recompute from the history store
+    python engine/story_threads.py show <event_id>
+"""
+
+import calendar
+import heapq
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+try:
+    from engine.rollups import parse_ts
+    from engine.story_clusters import ROWS, features, min_hashes
+    from engine.text_tokens import headline_events
+except ImportError:
+    from rollups import parse_ts
+    from story_clusters import ROWS, features, min_hashes
+    from text_tokens import headline_events
+
+HORIZON_DAYS = 7
+MATCH_JACCARD = 0.3
+# Most recent events kept per LSH bucket
+MAX_BUCKET = 32
+
+
+def band_ids(mins: List[int]) -> List[int]:
+    """One compact integer LSH key per band (band number in the high bits)."""
+    ids = []
+    for start in range(0, len(mins), ROWS):
+        h = 0
+        for m in mins[start:start + ROWS]:
+            h = (h * 1000003) ^ m
+        ids.append((start // ROWS) << 32 | (h & 0xFFFFFFFF))
+    return ids
+
+
+def archive_path(path: Path) -> Path:
+    return Path(path).with_suffix(".archive.jsonl")
+
+
+def load_archive(path: Path) -> Dict[str, List[list]]:
+    """event id -> timeline of its closed thread, from an archive file."""
+    index: Dict[str, List[list]] = {}
+    if not Path(path).exists():
+        return index
+    with Path(path).open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                timeline = json.loads(line)["timeline"]
+            except (ValueError, KeyError):
+                continue  # torn last line
+            for entry in timeline:
+                index[entry[1]] = timeline
+    return index
+
+
+def describe(timeline: List[list]) -> Dict[str, Any]:
+    """Timeline and per-run score trajectory of a thread."""
+    per_run: Dict[str, List[float]] = {}
+    for ts, _, _, score in timeline:
+        per_run.setdefault(ts, []).append(score)
+    return {
+        "thread_id": timeline[0][1],
+        "size": len(timeline),
+        "first_seen": timeline[0][0],
+        "last_seen": timeline[-1][0],
+        "headline": timeline[-1][2],
+        "timeline": [{"run_timestamp": ts, "id": eid, "headline": text, "score": score}
+                     for ts, eid, text, score in timeline],
+        "trajectory": [{"run_timestamp": ts, "events": len(scores), "mean_score": round(sum(scores) / len(scores), 4)}
+                       for ts, scores in per_run.items()],
+    }
+
+
+class StoryThreads:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.archive_path = archive_path(self.path)
+        self.parent: Dict[str, str] = {}
+        self.threads: Dict[str, List[list]] = {}
+        self.recent: Dict[str, list] = {}
+        self.buckets: Dict[int, List[str]] = {}
+        self.applied_through: str = ""
+        self.applied_ids: List[str] = []
+
+    # ---- persistence ----
+    @classmethod
+    def load(cls, path: Path) -> "StoryThreads":
+        index = cls(path)
+        if index.path.exists():
+            try:
+                with index.path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+                index.parent = data.get("parent", {})
+                index.threads = data.get("threads", {})
+                index.recent = data.get("recent", {})
+                index.applied_through = data.get("applied_through", "")
+                index.applied_ids = data.get("applied_ids", [])
+            except Exception as e:
+                print(f"[WARN] Failed to load story threads: {e}")
+                return cls(path)
+        # Rebuild the LSH buckets (recent is in run order, so each keeps its newest events)
+        for event_id, (_, _, keys) in index.recent.items():
+            index._index(event_id, keys)
+        return index
+
+    def save(self):
+        data = {"parent": self.parent, "threads": self.threads, "recent": self.recent,
+                "applied_through": self.applied_through, "applied_ids": self.applied_ids}
+        try:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            tmp.replace(self.path)
+        except Exception as e:
+            print(f"[WARN] Failed to save story threads: {e}")
+
+    # ---- union-find ----
+    def find(self, event_id: str) -> Optional[str]:
+        if event_id not in self.parent:
+            return None
+        root = event_id
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[event_id] != root:
+            self.parent[event_id], event_id = root, self.parent[event_id]
+        return root
+
+    def union(self, a: str, b: str) -> str:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return ra
+        if len(self.threads[ra]) < len(self.threads[rb]):
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        big, small = self.threads[ra], self.threads.pop(rb)
+        if small[0][0] >= big[-1][0]:
+            big.extend(small)  # the usual case: a new event joins an older thread
+        else:
+            self.threads[ra] = list(heapq.merge(big, small, key=lambda e: e[0]))
+        return ra
+
+    # ---- updates ----
+    def _index(self, event_id: str, keys: List[int]):
+        for key in keys:
+            bucket = self.buckets.setdefault(key, [])
+            bucket.append(event_id)
+            if len(bucket) > MAX_BUCKET:
+                del bucket[0]
+
+    def _prune(self, now: float):
+        """Drop events older than the horizon from the LSH index and archive threads that closed."""
+        cutoff = now - HORIZON_DAYS * 86400
+        expired = []
+        # Events are added in run order, so stop at the first one inside the horizon
+        for event_id, (at, _, _) in self.recent.items():
+            if at >= cutoff:
+                break
+            expired.append(event_id)
+        closed = set()
+        for event_id in expired:
+            _, _, keys = self.recent.pop(event_id)
+            for key in keys:
+                bucket = self.buckets.get(key)
+                if bucket is not None and event_id in bucket:
+                    bucket.remove(event_id)
+                    if not bucket:
+                        del self.buckets[key]
+            closed.add(self.find(event_id))
+
+        cutoff_ts = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(cutoff))
+        closed = [root for root in closed if self.threads[root][-1][0] < cutoff_ts]
+        if not closed:
+            return
+        try:
+            with self.archive_path.open("a", encoding="utf-8") as f:
+                for root in closed:
+                    f.write(json.dumps({"timeline": self.threads[root]}, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"[WARN] Failed to archive closed story threads: {e}")
+            return
+        for root in closed:
+            for entry in self.threads.pop(root):
+                self.parent.pop(entry[1], None)
+
+    def add_event(self, event: Dict[str, Any], run_timestamp: str, at: float) -> Optional[str]:
+        """Thread one new event and return its thread root. Events already threaded are skipped."""
+        event_id = event.get("id")
+        if not event_id or event_id in self.parent:
+            return None
+        tf = features(event.get("text", ""))
+        self.parent[event_id] = event_id
+        self.threads[event_id] = [[run_timestamp, event_id, event.get("text", "")[:200], event.get("opportunity_score", 0)]]
+        if not tf:
+            return event_id
+
+        words = set(tf)
+        keys = band_ids(min_hashes(words))
+        candidates: Set[str] = set()
+        for key in keys:
+            candidates.update(self.buckets.get(key, ()))
+        for other in candidates:
+            other_words = set(self.recent[other][1])
+            if len(words & other_words) >= MATCH_JACCARD * len(words | other_words):
+                self.union(event_id, other)
+
+        self.recent[event_id] = [at, sorted(words), keys]
+        self._index(event_id, keys)
+        return self.find(event_id)
+
+    def add_snapshot(self, snapshot: Dict[str, Any]) -> Set[str]:
+        """Thread a run's events (weather readings excluded); returns the roots of the threads they joined.
+
+        Snapshots already applied are ignored, so an event archived with its thread is not threaded again.
+        """
+        ts = snapshot.get("run_timestamp")
+        if not ts:
+            return set()
+        sid = snapshot.get("snapshot_id")
+        if ts < self.applied_through or (ts == self.applied_through and sid in self.applied_ids):
+            return set()
+        at = calendar.timegm(parse_ts(ts).timetuple())
+        self._prune(at)
+        touched = set()
+        for event in headline_events(snapshot):
+            if self.add_event(event, ts, at) is not None:
+                touched.add(event["id"])
+        if ts != self.applied_through:
+            self.applied_through, self.applied_ids = ts, []
+        self.applied_ids.append(sid)
+        return {self.find(eid) for eid in touched}
+
+    # ---- views ----
+    def thread(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """Timeline and score trajectory of the open thread an event belongs to."""
+        root = self.find(event_id)
+        return describe(self.threads[root]) if root is not None else None
+
+    def active(self, roots: Set[str], min_size: int = 2) -> List[Dict[str, Any]]:
+        """Summaries of the given threads with at least min_size events, longest first."""
+        out = []
+        for root in roots:
+            info = self.thread(root)
+            if info is not None and info["size"] >= min_size:
+                out.append(info)
+        out.sort(key=lambda t: (-t["size"], t["thread_id"]))
+        return out
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    root = Path(__file__).resolve().parent.parent
+    sys.path.append(str(root))
+    from engine.history_store import HistoryStore
+
+    p = argparse.ArgumentParser(description="Story threads across snapshots")
+    p.add_argument("cmd", choices=["rebuild", "show"])
+    p.add_argument("event_id", nargs="?")
+    args = p.parse_args()
+
+    path = root / "output" / "story_threads.json"
+    if args.cmd == "rebuild":
+        threads = StoryThreads(path)
+        threads.archive_path.unlink(missing_ok=True)
+        store = HistoryStore(root / "history")
+        count = 0
+        for snapshot in store.read_many(store.entries()):
+            threads.add_snapshot(snapshot)
+            count += 1
+        threads.save()
+        print(f"[OK] Threaded {count} snapshots: {len(threads.threads)} open threads → {path}")
+    else:
+        info = StoryThreads.load(path).thread(args.event_id or "")
+        if info is None:
+            timeline = load_archive(archive_path(path)).get(args.event_id or "")
+            info = describe(timeline) if timeline else None
+        print(json.dumps(info, indent=2, ensure_ascii=False) if info else f"[WARN] Unknown event {args.event_id}")
@@ -0,0 +1,81 @@
+"""
+engine/text_tokens.py
+
+Headline tokenization shared by the streaming text analytics (burst
+detection, story clustering, search).
+
+- words():         lowercase word tokens with stopwords and 1-letter tokens removed
+- bigrams():       adjacent word pairs ("death toll")
+- named_phrases(): runs of two or more capitalised words in the original
+                   text ("Cyclone Ditwah", "Colombo Dockyard")
+- headline_events(): the events of a snapshot that carry a headline
+
+Everything is a single regex pass over the text, so cost is linear in its
+length.
+"""
+
+import re
+from typing import Any, Dict, List, Tuple
+
+WORD_RE = re.compile(r"[A-Za-z][A-Za-z0-9']*|\d+(?:[.,]\d+)*")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having he her here hers him his how i if in into is it its itself just me more most my
+no nor not now of off on once only or other our out over own same she should so some such than
+that the their them then there these they this those through to too under until up very was we
+were what when where which while who whom why will with would you your s says said amid via new
+""".split())
+
+# Above this share of capitalised words a headline is Title Case and carries no phrase signal
+TITLE_CASE_SHARE = 0.75
+
+
+def _tokens(text: str) -> List[Tuple[str, str]]:
+    """(lowercase, original) for every word-like token."""
+    return [(m.lower(), m) for m in WORD_RE.findall(text or "")]
+
+
+def words(text: str) -> List[str]:
+    return [w for w, _ in _tokens(text) if len(w) > 1 and w not in STOPWORDS]
+
+
+def bigrams(tokens: List[str]) -> List[str]:
+    return [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def named_phrases(text: str, max_len: int = 4) -> List[str]:
+    """Lowercased runs of 2..max_len consecutive capitalised words (none for Title Case headlines)."""
+    matches = list(WORD_RE.finditer(text or ""))
+    alpha = [m.group() for m in matches if m.group()[0].isalpha()]
+    if alpha and sum(w[0].isupper() for w in alpha) > TITLE_CASE_SHARE * len(alpha):
+        return []
+
+    phrases: List[str] = []
+    run: List[str] = []
+
+    def flush():
+        if len(run) >= 2:
+            phrases.append(" ".join(run[:max_len]))
+        run.clear()
+
+    end = 0
+    for m in matches:
+        # Punctuation between words ends a phrase ("Cyclone Ditwah: Death toll")
+        if text[end:m.start()].strip():
+            flush()
+        word = m.group()
+        if word[0].isupper() and word.lower() not in STOPWORDS:
+            run.append(word.lower())
+        else:
+            flush()
+        end = m.end()
+    flush()
+    return phrases
+
+
+def headline_events(snapshot: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Events of a snapshot that carry a headline."""
+    # Weather readings are re-emitted every run; they are not headlines
+    return [event for event in snapshot.get("events", []) if event.get("source") != "weather"]
@@ -0,0 +1,277 @@
+"""
+engine/trend_detector.py
+
+Streaming burst detection over every headline the pipeline sees.
+
+Each headline is split into terms (engine/text_tokens.py): words, bigrams
+and named phrases. Terms are counted in count-min sketches, so memory is
+fixed (DEPTH x WIDTH cells) no matter how large the vocabulary grows, and
+each headline costs O(terms):
+
+    current    counts for the current time bucket (BUCKET_HOURS)
+    baseline   per-bucket expected counts, an exponentially decayed average
+               of past buckets (half-life BASELINE_HALF_LIFE_BUCKETS)
+
+A term bursts when its current count c is well above its baseline b. The
+burst score is the Poisson z-score (c - b) / sqrt(b + 1). Sketches cannot
+be enumerated, so a bounded candidate set keeps the heaviest terms of the
+current bucket (with the sources they came from) for ranking.
+
+The same headline is counted once per bucket, so repeated runs within an
+hour do not inflate counts.
+
+CLI:
+    python engine/trend_detector.py top [-n 20]     # emerging topics from the saved state
+"""
+
+import base64
+import hashlib
+import json
+import math
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+try:
+    from engine.text_tokens import bigrams, named_phrases, words
+except ImportError:
+    from text_tokens import bigrams, named_phrases, words
+
+WIDTH = 4096
+DEPTH = 4
+BUCKET_HOURS = 1
+BASELINE_HALF_LIFE_BUCKETS = 24
+# Heaviest current-bucket terms kept for ranking
+MAX_CANDIDATES = 2000
+# A term needs this many mentions in the bucket to be reported
+MIN_COUNT = 3
+# ... and a burst score (Poisson z) of at least this
+MIN_BURST_SCORE = 3.0
+TOP_TOPICS = 25
+
+KINDS = {"w": "term", "b": "bigram", "p": "phrase"}
+KIND_ORDER = {"p": 0, "b": 1, "w": 2}
+# A term sharing a word with a topic and at least this share of the topic's
+# peak count belongs to the same burst
+SAME_BURST_RATIO = 0.8
+MAX_RELATED = 8
+
+
+def _cells(key: str) -> List[int]:
+    """One cell per sketch row (double hashing of a single 128-bit digest)."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [row * WIDTH + (h1 + row * h2) % WIDTH for row in range(DEPTH)]
+
+
+def headline_terms(text: str) -> Set[str]:
+    """Distinct kind-prefixed terms of a headline ("w:flood", "b:death toll", "p:cyclone ditwah")."""
+    tokens = words(text)
+    terms = {f"w:{t}" for t in tokens}
+    terms.update(f"b:{t}" for t in bigrams(tokens))
+    terms.update(f"p:{t}" for t in named_phrases(text))
+    return terms
+
+
+def _pack(table: array) -> str:
+    return base64.b64encode(table.tobytes()).decode("ascii")
+
+
+def _unpack(data: str) -> array:
+    table = array("d")
+    table.frombytes(base64.b64decode(data))
+    return table
+
+
+class TrendDetector:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.current = array("d", bytes(8 * WIDTH * DEPTH))
+        self.baseline = array("d", bytes(8 * WIDTH * DEPTH))
+        self.bucket: Optional[int] = None
+        self.buckets_seen = 0
+        # Headlines already counted in the current bucket
+        self.seen: Set[str] = set()
+        # term -> sources that mentioned it in the current bucket
+        self.candidates: Dict[str, Set[str]] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> "TrendDetector":
+        det = cls(path)
+        if det.path.exists():
+            try:
+                with det.path.open("r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("width") != WIDTH or data.get("depth") != DEPTH:
+                    print(f"[WARN] Trend sketch shape changed, starting fresh: {det.path}")
+                    return det
+                det.current = _unpack(data["current"])
+                det.baseline = _unpack(data["baseline"])
+                det.bucket = data.get("bucket")
+                det.buckets_seen = data.get("buckets_seen", 0)
+                det.seen = set(data.get("seen", []))
+                det.candidates = {k: set(v) for k, v in data.get("candidates", {}).items()}
+            except Exception as e:
+                print(f"[WARN] Failed to load trend sketch: {e}")
+                return cls(path)
+        return det
+
+    def save(self):
+        data = {
+            "width": WIDTH,
+            "depth": DEPTH,
+            "bucket": self.bucket,
+            "buckets_seen": self.buckets_seen,
+            "seen": sorted(self.seen),
+            "candidates": {k: sorted(v) for k, v in self.candidates.items()},
+            "current": _pack(self.current),
+            "baseline": _pack(self.baseline),
+        }
+        try:
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            tmp.replace(self.path)
+        except Exception as e:
+            print(f"[WARN] Failed to save trend sketch: {e}")
+
+    # ---- updates ----
+    def _advance(self, bucket: int):
+        """Fold the finished bucket into the baseline; buckets with no headlines count as zero."""
+        if self.bucket is not None:
+            gap = bucket - self.bucket
+            keep = math.pow(2.0, -1.0 / BASELINE_HALF_LIFE_BUCKETS)
+            decay_empty = keep ** (gap - 1)
+            if self.buckets_seen == 0:
+                # First finished bucket seeds the baseline
+                self.baseline = array("d", (c * decay_empty for c in self.current))
+            else:
+                self.baseline = array("d", ((b * keep + c * (1.0 - keep)) * decay_empty
+                                            for b, c in zip(self.baseline, self.current)))
+            self.buckets_seen += 1
+            self.current = array("d", bytes(8 * WIDTH * DEPTH))
+        self.bucket = bucket
+        self.seen.clear()
+        self.candidates.clear()
+
+    def observe(self, text: str, source: str, at: Optional[float] = None) -> bool:
+        """Count one headline. Returns False if it was already counted in this bucket."""
+        bucket = int((time.time() if at is None else at) // (BUCKET_HOURS * 3600))
+        if self.bucket is None or bucket > self.bucket:
+            self._advance(bucket)
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+
+        current = self.current
+        for term in headline_terms(text):
+            for cell in _cells(term):
+                current[cell] += 1
+            self.candidates.setdefault(term, set()).add(source)
+        if len(self.candidates) > 2 * MAX_CANDIDATES:
+            self._prune_candidates()
+        return True
+
+    def _prune_candidates(self):
+        counts = {term: self._estimate(self.current, term) for term in self.candidates}
+        keep = sorted(counts, key=counts.get, reverse=True)[:MAX_CANDIDATES]
+        self.candidates = {term: self.candidates[term] for term in keep}
+
+    # ---- queries ----
+    @staticmethod
+    def _estimate(table: array, term: str) -> float:
+        return min(table[cell] for cell in _cells(term))
+
+    def emerging(self, limit: int = TOP_TOPICS) -> List[Dict[str, Any]]:
+        """
+        Bursting terms of the current bucket grouped into topics: terms that
+        share a word and have similar counts belong to the same burst. Each
+        topic is named by its best term (phrase, then bigram, then word) and
+        lists the others as `related`; topics are ranked by burst score.
+        """
+        scored = []
+        for term, sources in self.candidates.items():
+            count = self._estimate(self.current, term)
+            if count < MIN_COUNT:
+                continue
+            base = self._estimate(self.baseline, term)
+            burst = (count - base) / math.sqrt(base + 1.0)
+            if burst >= MIN_BURST_SCORE:
+                scored.append((burst, count, term, base, sources))
+        scored.sort(key=lambda s: (-s[0], s[2]))
+
+        # Union-find over groups; a word points at the groups whose terms use it
+        parent: List[int] = []
+        members: List[List[tuple]] = []
+        by_word: Dict[str, List[int]] = {}
+
+        def find(g: int) -> int:
+            while parent[g] != g:
+                parent[g] = parent[parent[g]]
+                g = parent[g]
+            return g
+
+        for entry in scored:
+            count, text = entry[1], entry[2][2:]
+            roots = {find(g) for w in text.split() for g in by_word.get(w, ())}
+            roots = [g for g in roots if count >= SAME_BURST_RATIO * members[g][0][1]]
+            if roots:
+                group = min(roots)
+                for other in roots:
+                    if other != group:
+                        parent[other] = group
+                        members[group] += members[other]
+            else:
+                group = len(parent)
+                parent.append(group)
+                members.append([])
+            members[group].append(entry)
+            for w in text.split():
+                by_word.setdefault(w, []).append(group)
+
+        topics: List[Dict[str, Any]] = []
+        for g in range(len(parent)):
+            if find(g) != g:
+                continue
+            group = sorted(members[g], key=lambda s: (-s[0], s[2]))
+            best = min(group, key=lambda s: (KIND_ORDER[s[2][0]], -s[0], s[2]))
+            burst, count, term, base, _ = best
+            topics.append({
+                "term": term[2:],
+                "kind": KINDS[term[0]],
+                "count": int(count),
+                "baseline": round(base, 3),
+                "burst_score": round(burst, 3),
+                "sources": sorted(set().union(*(s[4] for s in group))),
+                "related": list(dict.fromkeys(s[2][2:] for s in group if s[2][2:] != term[2:]))[:MAX_RELATED],
+            })
+        topics.sort(key=lambda t: (-t["burst_score"], t["term"]))
+        return topics[:limit]
+
+    def summary(self, limit: int = TOP_TOPICS) -> Dict[str, Any]:
+        bucket_start = self.bucket * BUCKET_HOURS * 3600 if self.bucket is not None else None
+        return {
+            "bucket_start": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(bucket_start)) if bucket_start is not None else None,
+            "bucket_hours": BUCKET_HOURS,
+            "baseline_buckets": self.buckets_seen,
+            "headlines": len(self.seen),
+            "topics": self.emerging(limit),
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    root = Path(__file__).resolve().parent.parent
+    p = argparse.ArgumentParser(description="Emerging topics from the saved trend sketch")
+    p.add_argument("cmd", choices=["top"])
+    p.add_argument("-n", type=int, default=TOP_TOPICS)
+    args = p.parse_args()
+
+    summary = TrendDetector.load(root / "output" / "trend_sketch.json").summary(args.n)
+    print(f"Bucket {summary['bucket_start']}: {summary['headlines']} headlines, baseline over {summary['baseline_buckets']} buckets")
+    for t in summary["topics"]:
+        print(f"{t['burst_score']:>8.2f}  {t['count']:>4}  {t['kind']:<6}  {t['term']}  ({', '.join(t['sources'])})")
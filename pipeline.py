@@ -6,8 +6,10 @@ Strict ingestion pipeline:
  - Loads ONLY the 3 approved realtime JSON files in jsons/
  - Uses preprocessing engines (categorization + opportunity) if available
  - Falls back to transformers-based wrappers if not
- - Produces output/live_output.json (overwrite)
- - Appends a single hourly snapshot (Option 2) to history/hourly_history.jsonl
+ - Maintains a rolling window of recent events (output/event_window.json)
+ - Produces output/live_output.json and indicator files over that window, published
+   together as one generation (output/generations/<id>/, named by output/latest.json)
+ - Appends a single hourly snapshot to the segmented history store (history/segments/)
 """
 
 import json
@@ -17,6 +19,8 @@ from datetime import datetime
 from typing import Any, Dict, List, Optional, Set
 import sys
 import hashlib
+import heapq
+import time
 
 ROOT = Path(__file__).resolve().parent
 JSONS_DIR = ROOT / "jsons"
@@ -29,10 +33,44 @@ sys.path.append(str(ROOT))
 # Import Taxonomy
 try:
     from engine.taxonomy import TAXONOMY, ALL_INDUSTRIES, THEMATIC_CATEGORIES
+    from engine.constants import RELEVANCE_THRESHOLD, IMPACT_TYPE_THRESHOLD
+    from engine.canonical_urls import CanonicalUrlIndex, canonicalize_url, item_url
+    from engine.keyword_matcher import KeywordMatcher
+    from engine.event_window import ChangeLog, EventWindow
+    from engine.event_table import EventRecord, to_records
+    from engine.impact_batch import NUMPY_AVAILABLE, build_impacts_batch
+    from engine.history_store import HistoryStore
+    from engine.rollups import Rollups
+    from engine.momentum import MomentumStats
+    from engine.trend_detector import TrendDetector
+    from engine.story_clusters import StoryClusters
+    from engine.story_threads import StoryThreads
+    from engine.columnar_archive import ColumnarArchive
+    from engine.ann_index import AnnIndex
+    from engine.search_index import SearchIndex
+    from engine.publish import Generation
+    from engine.event_store import ClassificationCache, EventStore
 except ImportError:
     # Fallback if running from wrong dir
     sys.path.append(str(ROOT / "engine"))
     from taxonomy import TAXONOMY, ALL_INDUSTRIES, THEMATIC_CATEGORIES
+    from constants import RELEVANCE_THRESHOLD, IMPACT_TYPE_THRESHOLD
+    from canonical_urls import CanonicalUrlIndex, canonicalize_url, item_url
+    from keyword_matcher import KeywordMatcher
+    from event_window import ChangeLog, EventWindow
+    from event_table import EventRecord, to_records
+    from impact_batch import NUMPY_AVAILABLE, build_impacts_batch
+    from history_store import HistoryStore
+    from rollups import Rollups
+    from momentum import MomentumStats
+    from trend_detector import TrendDetector
+    from story_clusters import StoryClusters
+    from story_threads import StoryThreads
+    from columnar_archive import ColumnarArchive
+    from ann_index import AnnIndex
+    from search_index import SearchIndex
+    from publish import Generation
+    from event_store import ClassificationCache, EventStore
 
 # Approved files (strict) — nothing else will ever be loaded
 APPROVED_SOURCES = {
@@ -45,9 +83,33 @@ APPROVED_SOURCES = {
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 HISTORY_DIR.mkdir(parents=True, exist_ok=True)
 LIVE_OUTPUT = OUTPUT_DIR / "live_output.json"
-HISTORY_FILE = HISTORY_DIR / "hourly_history.jsonl"
+HISTORY_STORE = HistoryStore(HISTORY_DIR)
+ROLLUPS_FILE = OUTPUT_DIR / "rollups.json"
+# Per-industry / per-category EWMA, Welford and momentum state
+MOMENTUM_FILE = OUTPUT_DIR / "momentum.json"
+# Count-min sketches behind emerging_topics.json
+TREND_SKETCH_FILE = OUTPUT_DIR / "trend_sketch.json"
+# Story membership of the window's events (published as story_clusters.json)
+STORY_INDEX_FILE = OUTPUT_DIR / "story_index.json"
+# Cross-run story lineage (open threads; closed ones go to story_threads.archive.jsonl)
+STORY_THREADS_FILE = OUTPUT_DIR / "story_threads.json"
+COLUMNAR_DIR = HISTORY_DIR / "columnar"
+# Headline embeddings for /api/similar
+ANN_DIR = HISTORY_DIR / "ann"
+# Positional inverted index for /api/search
+SEARCH_DIR = HISTORY_DIR / "search"
 CACHE_FILE = OUTPUT_DIR / "processed_cache.json"
+# Legacy JSON classification cache, imported into the event store once
 CLASSIFICATION_CACHE_FILE = OUTPUT_DIR / "classification_cache.json"
+URL_INDEX_FILE = OUTPUT_DIR / "canonical_url_index.json"
+EVENT_WINDOW_FILE = OUTPUT_DIR / "event_window.json"
+# Per-snapshot window changes backing the server's /api/changes
+CHANGE_LOG_FILE = OUTPUT_DIR / "window_changes.jsonl"
+# Normalized events / impacts / snapshots / classifications (SQLite, WAL)
+EVENT_STORE = EventStore(OUTPUT_DIR / "events.db")
+
+# Live outputs reflect every event seen in the last WINDOW_HOURS
+WINDOW_HOURS = 72
 
 # Cache helpers
 def load_cache() -> Set[str]:
@@ -69,24 +131,24 @@ def save_cache(cache: Set[str]):
     except Exception as e:
         print(f"[WARN] Failed to save cache: {e}")
 
-def load_classification_cache() -> Dict[str, Dict]:
-    """Load cached zero-shot classification results."""
-    if not CLASSIFICATION_CACHE_FILE.exists():
-        return {}
-    try:
-        with open(CLASSIFICATION_CACHE_FILE, 'r') as f:
-            cache = json.load(f)
-            print(f"[CACHE] Loaded {len(cache)} cached classifications")
-            return cache
-    except Exception as e:
-        print(f"[WARN] Failed to load classification cache: {e}")
-        return {}
+def load_classification_cache() -> ClassificationCache:
+    """Cached zero-shot classification results (a dict-like view of the event store)."""
+    cache = EVENT_STORE.classifications()
+    if len(cache) == 0 and CLASSIFICATION_CACHE_FILE.exists():
+        try:
+            with open(CLASSIFICATION_CACHE_FILE, 'r') as f:
+                cache.update(json.load(f))
+            cache.commit()
+            print(f"[CACHE] Imported {len(cache)} classifications from {CLASSIFICATION_CACHE_FILE.name}")
+        except Exception as e:
+            print(f"[WARN] Failed to import classification cache: {e}")
+    print(f"[CACHE] Loaded {len(cache)} cached classifications")
+    return cache
 
-def save_classification_cache(cache: Dict[str, Dict]):
-    """Save classification cache to disk."""
+def save_classification_cache(cache: ClassificationCache):
+    """Commit new classifications to the event store."""
     try:
-        with open(CLASSIFICATION_CACHE_FILE, 'w') as f:
-            json.dump(cache, f, indent=2)
+        cache.commit()
     except Exception as e:
         print(f"[WARN] Failed to save classification cache: {e}")
 
@@ -95,6 +157,10 @@ def get_text_hash(text: str) -> str:
     return hashlib.md5(text.encode('utf-8')).hexdigest()
 
 # timestamp helper
+def make_event_id(source: str, content_hash: str) -> str:
+    """Deterministic event id: the same content from the same source keeps its id across runs."""
+    return hashlib.sha1(f"{source}:{content_hash}".encode("utf-8")).hexdigest()[:20]
+
 def now_iso() -> str:
     return datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
 
@@ -125,54 +191,56 @@ OPERATIONAL_KEYWORDS = {
     'business': ['business', 'company', 'sector', 'operations', 'productivity']
 }
 
-def classify_national_activity(text: str, thematic_category: str) -> bool:
+# Both keyword sets compiled into one automaton: a single pass over the text
+# reports every national/operational keyword group that fires.
+INDICATOR_MATCHER = KeywordMatcher({
+    **{f"national:{k}": v for k, v in NATIONAL_ACTIVITY_KEYWORDS.items()},
+    **{f"operational:{k}": v for k, v in OPERATIONAL_KEYWORDS.items()},
+})
+NATIONAL_GROUPS = frozenset(f"national:{k}" for k in NATIONAL_ACTIVITY_KEYWORDS)
+OPERATIONAL_GROUPS = frozenset(f"operational:{k}" for k in OPERATIONAL_KEYWORDS)
+
+# Thematic categories that are clearly national
+NATIONAL_CATEGORIES = frozenset([
+    'Social/Political Issues', 'Security & Defense', 'Regulatory & Governance',
+    'Extreme Weather Events', 'Infrastructure & Development'
+])
+
+def classify_national_activity(text: str, thematic_category: str,
+                               keyword_hits: Optional[Set[str]] = None) -> bool:
     """
     Determine if news qualifies as a National Activity Indicator.
     Uses keyword matching on text and thematic category analysis.
+    `keyword_hits` may carry a precomputed INDICATOR_MATCHER result.
     """
-    text_lower = text.lower()
-    
     # Check thematic categories that are clearly national
-    national_categories = [
-        'Social/Political Issues', 'Security & Defense', 'Regulatory & Governance',
-        'Extreme Weather Events', 'Infrastructure & Development'
-    ]
-    if thematic_category in national_categories:
+    if thematic_category in NATIONAL_CATEGORIES:
         return True
     
-    # Keyword matching
-    keyword_count = 0
-    for category_keywords in NATIONAL_ACTIVITY_KEYWORDS.values():
-        for keyword in category_keywords:
-            if keyword in text_lower:
-                keyword_count += 1
-                if keyword_count >= 2:  # At least 2 keywords for confidence
-                    return True
-    
-    return keyword_count >= 1  # Allow 1 strong keyword
+    # Keyword matching (a single strong keyword is enough)
+    if keyword_hits is None:
+        keyword_hits = INDICATOR_MATCHER.match_categories(text)
+    return not NATIONAL_GROUPS.isdisjoint(keyword_hits)
 
-def classify_operational_environment(text: str, impacts: List[Dict]) -> bool:
+def classify_operational_environment(text: str, impact_count: int,
+                                     keyword_hits: Optional[Set[str]] = None) -> bool:
     """
     Determine if news qualifies as an Operational Environment Indicator.
     Checks for business/operational impact signals.
+    `keyword_hits` may carry a precomputed INDICATOR_MATCHER result.
     """
-    text_lower = text.lower()
-    
     # Check if it affects multiple industries (broad operational impact)
-    if len(impacts) >= 3:
+    if impact_count >= 3:
         return True
     
     # Keyword matching
-    for category_keywords in OPERATIONAL_KEYWORDS.values():
-        for keyword in category_keywords:
-            if keyword in text_lower:
-                return True
-    
-    return False
+    if keyword_hits is None:
+        keyword_hits = INDICATOR_MATCHER.match_categories(text)
+    return not OPERATIONAL_GROUPS.isdisjoint(keyword_hits)
 
-def calculate_risk_score(opp_score: float, text: str, impacts: List[Dict]) -> Dict:
+def risk_opportunity(opp_score: float) -> Dict:
     """
-    Calculate risk score, category, and explanation.
+    Risk / opportunity scores, categories and explanations.
     Risk is inverse of opportunity - negative opp_score = high risk.
     """
     # Risk score is absolute value of negative opportunity
@@ -207,10 +275,6 @@ def calculate_risk_score(opp_score: float, text: str, impacts: List[Dict]) -> Di
         opp_category = "No Significant Opportunity"
         opp_explanation = "No immediate opportunity indicators detected."
     
-    # Get most impacted industries
-    top_industries = sorted(impacts, key=lambda x: abs(x['score']), reverse=True)[:3]
-    affected_industries = [imp['industry'] for imp in top_industries]
-    
     return {
         "risk_score": round(risk_score, 4),
         "risk_category": risk_category,
@@ -218,9 +282,19 @@ def calculate_risk_score(opp_score: float, text: str, impacts: List[Dict]) -> Di
         "opportunity_score": round(opp_score_positive, 4),
         "opportunity_category": opp_category,
         "opportunity_explanation": opp_explanation,
-        "top_affected_industries": affected_industries
     }
 
+def calculate_risk_score(opp_score: float, text: str, impacts: List[Dict]) -> Dict:
+    """
+    Calculate risk score, category, and explanation, plus the most
+    impacted industries.
+    """
+    risk_data = risk_opportunity(opp_score)
+    # Get most impacted industries (bounded heap; same order as a full stable sort)
+    top_industries = heapq.nlargest(3, impacts, key=lambda x: abs(x['score']))
+    risk_data["top_affected_industries"] = [imp['industry'] for imp in top_industries]
+    return risk_data
+
 # safe json reader
 def safe_load_json(path: Path) -> Optional[Any]:
     if not path.exists():
@@ -357,8 +431,122 @@ if zero_shot_engine is None:
     zero_shot_engine = ZeroShotDummy()
 
 
+# ---- shared scoring steps (pipeline runs and on-demand /score) ----
+def zero_shot_classify(text: str) -> Dict[str, Any]:
+    """Thematic category and industry relevance for one text, in classification-cache form."""
+    thematic_res = zero_shot_engine(text, THEMATIC_CATEGORIES, multi_label=False)
+    industry_res = zero_shot_engine(text, ALL_INDUSTRIES, multi_label=True)
+    return {
+        'thematic_category': thematic_res["labels"][0],
+        'industry_labels': industry_res['labels'],
+        'industry_scores': industry_res['scores']
+    }
+
+def zero_shot_classify_many(texts: List[str]) -> List[Dict[str, Any]]:
+    """Batched zero_shot_classify: one model call per label set when the engine takes a list."""
+    if len(texts) > 1:
+        try:
+            thematic = zero_shot_engine(list(texts), THEMATIC_CATEGORIES, multi_label=False)
+            industry = zero_shot_engine(list(texts), ALL_INDUSTRIES, multi_label=True)
+            if isinstance(thematic, list) and isinstance(industry, list) and len(thematic) == len(industry) == len(texts):
+                return [{
+                    'thematic_category': t["labels"][0],
+                    'industry_labels': i['labels'],
+                    'industry_scores': i['scores']
+                } for t, i in zip(thematic, industry)]
+        except Exception as e:
+            print(f"[WARN] Batched zero-shot failed, classifying one by one: {e}")
+    return [zero_shot_classify(text) for text in texts]
+
+# Smaller batches are not worth packing into arrays
+MIN_VECTOR_BATCH = 8
+
+def build_impacts(opp_score: float, industry_labels: List[str], industry_scores: List[float]) -> List[Dict]:
+    """Per-industry impacts from the global opportunity score and industry relevances."""
+    impacts = []
+    for label, relevance in zip(industry_labels, industry_scores):
+        # Threshold for relevance
+        if relevance > RELEVANCE_THRESHOLD: 
+            # Calculate Industry Score
+            # If opp_score is positive, we want positive impact.
+            # If opp_score is negative, we want negative impact (threat).
+            # Relevance scales the magnitude.
+            
+            ind_score = opp_score * relevance
+            
+            # Determine Impact Type
+            if ind_score > IMPACT_TYPE_THRESHOLD:
+                impact_type = "Opportunity"
+            elif ind_score < -IMPACT_TYPE_THRESHOLD:
+                impact_type = "Threat"
+            else:
+                impact_type = "Neutral"
+
+            impacts.append({
+                "industry": label,
+                "score": round(ind_score, 4),
+                "impact_type": impact_type,
+                "relevance": round(relevance, 4)
+            })
+    
+    # If no industry is relevant, assign to "Other"
+    if not impacts:
+         impacts.append({
+                "industry": "Other",
+                "score": round(opp_score * 0.5, 4), # Lower confidence
+                "impact_type": "Neutral",
+                "relevance": 0.5
+            })
+
+    # Sort impacts by absolute score magnitude
+    impacts.sort(key=lambda x: abs(x["score"]), reverse=True)
+    return impacts
+
+def build_impacts_many(opp_scores: List[float], industry_labels: List[List[str]],
+                       industry_scores: List[List[float]]) -> List[List[Dict]]:
+    """build_impacts for a batch of events; vectorized with numpy when available (same output)."""
+    if not NUMPY_AVAILABLE or len(opp_scores) < MIN_VECTOR_BATCH:
+        return [build_impacts(o, l, s) for o, l, s in zip(opp_scores, industry_labels, industry_scores)]
+    batch = build_impacts_batch(opp_scores, industry_labels, industry_scores,
+                                RELEVANCE_THRESHOLD, IMPACT_TYPE_THRESHOLD)
+    # Events with no relevant industry get the "Other" fallback
+    return [impacts if impacts is not None else build_impacts(o, [], [])
+            for impacts, o in zip(batch, opp_scores)]
+
+def score_texts(texts: List[str], classification_cache: Optional[Dict[str, Dict]] = None) -> List[Dict[str, Any]]:
+    """
+    Score arbitrary texts exactly as process_news_list scores a news item,
+    without recording anything. Texts missing from the classification cache
+    are classified together in one batched call.
+    """
+    classification_cache = classification_cache if classification_cache is not None else {}
+    hashes = [get_text_hash(text) for text in texts]
+    missing = {h: text for h, text in zip(hashes, texts) if h not in classification_cache}
+    fresh = dict(zip(missing, zero_shot_classify_many(list(missing.values())))) if missing else {}
+
+    classified = [classification_cache.get(h) or fresh[h] for h in hashes]
+    predictions = [opp_engine.predict(text) for text in texts]
+    all_impacts = build_impacts_many([p[0] for p in predictions],
+                                     [c['industry_labels'] for c in classified],
+                                     [c['industry_scores'] for c in classified])
+
+    results = []
+    for text, text_hash, cached, (opp_score, opp_conf), impacts in zip(texts, hashes, classified, predictions, all_impacts):
+        results.append({
+            "text_hash": text_hash,
+            "thematic_category": cached['thematic_category'],
+            "opportunity_score": round(float(opp_score), 4),
+            "opportunity_confidence": round(float(opp_conf), 4),
+            "impacts": impacts,
+            "risk": calculate_risk_score(opp_score, text, impacts),
+            "classification_cached": text_hash not in missing,
+        })
+    return results
+
 # ---- main processing steps (strict sources only) ----
-def process_news_list(raw_list: List[Any], source_name: str, cache: Set[str]) -> List[Dict[str, Any]]:
+def process_news_list(raw_list: List[Any], source_name: str, cache: Set[str],
+                      url_index: Optional[CanonicalUrlIndex] = None,
+                      trends: Optional[TrendDetector] = None) -> List[Dict[str, Any]]:
     events = []
     if not isinstance(raw_list, list):
         return events
@@ -369,7 +557,10 @@ def process_news_list(raw_list: List[Any], source_name: str, cache: Set[str]) ->
     classification_misses = 0
     
     cache_hits = 0
+    url_hits = 0
     new_items = 0
+    # (opp_score, classification) per event, for the batched impact step
+    pending = []
     
     for item in raw_list:
         text = extract_text_from_item(item)
@@ -379,9 +570,21 @@ def process_news_list(raw_list: List[Any], source_name: str, cache: Set[str]) ->
         # FILTER: Skip unwanted text
         if "Downloads" in text:
             continue
+
+        # Every headline (repeat coverage and cache hits included) feeds the burst detector
+        if trends is not None:
+            trends.observe(text, source_name)
+
+        # URL CHECK: Skip stories already seen under any source/link variant
+        canonical = canonicalize_url(item_url(item)) if url_index is not None else None
+        if canonical and canonical in url_index:
+            url_hits += 1
+            continue
         
         # CACHE CHECK: Skip if already processed
         text_hash = get_text_hash(text)
+        if canonical:
+            url_index.add(canonical, source_name, text_hash, now_iso())
         if text_hash in cache:
             cache_hits += 1
             continue
@@ -398,9 +601,6 @@ def process_news_list(raw_list: List[Any], source_name: str, cache: Set[str]) ->
         if text_hash in classification_cache:
             # Use cached classification results (FAST!)
             cached = classification_cache[text_hash]
-            thematic_category = cached['thematic_category']
-            industry_labels = cached['industry_labels']
-            industry_scores = cached['industry_scores']
             classification_hits += 1
         else:
             # Run expensive zero-shot classification (SLOW)
@@ -408,83 +608,38 @@ def process_news_list(raw_list: List[Any], source_name: str, cache: Set[str]) ->
             if classification_misses % 10 == 0 and classification_misses > 0:
                 print(f"  [{source_name}] Classifying item {classification_misses} (cached: {classification_hits})...")
             
-            thematic_res = zero_shot_engine(text, THEMATIC_CATEGORIES, multi_label=False)
-            thematic_category = thematic_res["labels"][0]
-            
-            industry_res = zero_shot_engine(text, ALL_INDUSTRIES, multi_label=True)
-            industry_labels = industry_res['labels']
-            industry_scores = industry_res['scores']
-            
             # Cache the results for future runs
-            classification_cache[text_hash] = {
-                'thematic_category': thematic_category,
-                'industry_labels': industry_labels,
-                'industry_scores': industry_scores
-            }
+            cached = classification_cache[text_hash] = zero_shot_classify(text)
             classification_misses += 1
-        
-        # 3. Industry Relevance & Scoring (using cached or fresh results)
-        # industry_labels and industry_scores are already set above
-        
-        impacts = []
-        for label, relevance in zip(industry_labels, industry_scores):
-            # Threshold for relevance
-            # LOWERED THRESHOLD: 0.1 to capture more industries
-            if relevance > 0.1: 
-                # Calculate Industry Score
-                # If opp_score is positive, we want positive impact.
-                # If opp_score is negative, we want negative impact (threat).
-                # Relevance scales the magnitude.
-                
-                ind_score = opp_score * relevance
-                
-                # Determine Impact Type
-                # LOWERED THRESHOLD: 0.05 for impact type
-                if ind_score > 0.05:
-                    impact_type = "Opportunity"
-                elif ind_score < -0.05:
-                    impact_type = "Threat"
-                else:
-                    impact_type = "Neutral"
-
-                impacts.append({
-                    "industry": label,
-                    "score": round(ind_score, 4),
-                    "impact_type": impact_type,
-                    "relevance": round(relevance, 4)
-                })
-        
-        # If no industry is relevant, assign to "Other"
-        if not impacts:
-             impacts.append({
-                    "industry": "Other",
-                    "score": round(opp_score * 0.5, 4), # Lower confidence
-                    "impact_type": "Neutral",
-                    "relevance": 0.5
-                })
-
-        # Sort impacts by absolute score magnitude
-        impacts.sort(key=lambda x: abs(x["score"]), reverse=True)
+        thematic_category = cached['thematic_category']
 
         ev = {
-            "id": str(uuid.uuid4()),
+            "id": make_event_id(source_name, text_hash),
             "timestamp": item.get("published") if isinstance(item, dict) and item.get("published") else now_iso(),
             "source": source_name,
             "text": text,
             "thematic_category": thematic_category,
             "opportunity_score": round(float(opp_score), 4), # Keep global score for reference
             "opportunity_confidence": round(float(opp_conf), 4),
-            "impacts": impacts
+            "impacts": None  # filled for the whole batch below
         }
         events.append(ev)
+        pending.append((opp_score, cached))
+
+    # 3. Industry Relevance & Scoring (using cached or fresh results), all events at once
+    all_impacts = build_impacts_many([opp for opp, _ in pending],
+                                     [c['industry_labels'] for _, c in pending],
+                                     [c['industry_scores'] for _, c in pending])
+    for ev, impacts in zip(events, all_impacts):
+        ev["impacts"] = impacts
     
     # Save classification cache if we added new classifications
     if classification_misses > 0:
         save_classification_cache(classification_cache)
         print(f"[CACHE] Saved {classification_misses} new classifications (total: {len(classification_cache)})")
     
-    if cache_hits > 0 or new_items > 0:
-        print(f"[{source_name}] Processed: {new_items} new, {cache_hits} cached (skipped)")
+    if cache_hits > 0 or new_items > 0 or url_hits > 0:
+        print(f"[{source_name}] Processed: {new_items} new, {cache_hits} cached, {url_hits} duplicate URLs (skipped)")
         if classification_hits > 0 or classification_misses > 0:
             print(f"[{source_name}] Classifications: {classification_misses} new, {classification_hits} cached (speedup: {classification_hits + classification_misses}x faster)")
     return events
@@ -536,7 +691,8 @@ def process_weather_dict(weather_obj: Dict[str, Any]) -> List[Dict[str, Any]]:
         impacts.sort(key=lambda x: abs(x["score"]), reverse=True)
 
         ev = {
-            "id": str(uuid.uuid4()),
+            # One id per place: a new reading shows up as an update of the same event
+            "id": make_event_id("weather", get_text_hash(place)),
             "timestamp": now_iso(),
             "source": "weather",
             "place": place,
@@ -552,117 +708,221 @@ def process_weather_dict(weather_obj: Dict[str, Any]) -> List[Dict[str, Any]]:
 # COMPETITION FEATURES: Indicator Generation
 # ========================================
 
-def generate_national_indicators(events: List[Dict]) -> List[Dict]:
+def _national_row(rec: EventRecord) -> Dict:
+    return {
+        "id": rec.id,
+        "timestamp": rec.timestamp,
+        "source": rec.source_name,
+        "headline": rec.text[:200],  # Truncated for readability
+        "thematic_category": rec.category_name,
+        "top_industries_affected": rec.industries(3),
+        "impact_score": rec.score
+    }
+
+def _affected_count(rec: EventRecord) -> int:
+    """Breadth of impact: industries with |score| > 0.1."""
+    return sum(1 for score in rec.impact_scores() if abs(score) > 0.1)
+
+def _operational_row(rec: EventRecord) -> Dict:
+    return {
+        "id": rec.id,
+        "timestamp": rec.timestamp,
+        "source": rec.source_name,
+        "signal": rec.text[:200],
+        "thematic_category": rec.category_name,
+        "affected_industries_count": _affected_count(rec),
+        "top_affected_industries": rec.industries(5),
+        "overall_impact": rec.score
+    }
+
+def _insight_row(rec: EventRecord) -> Dict:
+    # Calculate detailed risk/opportunity
+    risk_data = risk_opportunity(rec.score)
+    return {
+        "id": rec.id,
+        "timestamp": rec.timestamp,
+        "source": rec.source_name,
+        "headline": rec.text[:200],
+        "thematic_category": rec.category_name,
+        "risk_score": risk_data['risk_score'],
+        "risk_category": risk_data['risk_category'],
+        "risk_explanation": risk_data['risk_explanation'],
+        "opportunity_score": risk_data['opportunity_score'],
+        "opportunity_category": risk_data['opportunity_category'],
+        "opportunity_explanation": risk_data['opportunity_explanation'],
+        "top_affected_industries": rec.top_industries(3)
+    }
+
+INDICATOR_ROWS = {
+    "national": _national_row,
+    "operational": _operational_row,
+    "insight": _insight_row,
+}
+INDICATOR_KINDS = tuple(INDICATOR_ROWS)
+
+def render_indicator_row(kind: str, rec: EventRecord) -> Dict:
+    return INDICATOR_ROWS[kind](rec)
+
+# Sort keys for the three indicator lists (all descending):
+# absolute impact / breadth of impact / highest risk OR opportunity
+def national_sort_key(rec: EventRecord) -> float:
+    return abs(rec.score)
+
+def operational_sort_key(rec: EventRecord) -> float:
+    return _affected_count(rec)
+
+def insight_sort_key(rec: EventRecord) -> float:
+    risk_data = risk_opportunity(rec.score)
+    return max(risk_data['risk_score'], risk_data['opportunity_score'])
+
+def event_indicator_keys(rec: EventRecord) -> Dict[str, Optional[float]]:
+    """
+    Decide which indicator lists an event belongs to, with its sort key in
+    each (None = not a member). The keyword automaton runs at most once per
+    event and only when the thematic category / impact breadth do not
+    already decide membership.
+    """
+    keys = {"national": None, "operational": None, "insight": insight_sort_key(rec)}
+
+    # Weather is neither national activity nor an operational signal
+    if rec.source_name == 'weather':
+        return keys
+
+    text = rec.text
+    thematic_category = rec.category_name
+    impact_count = rec.impact_count()
+    keyword_hits = None
+    if thematic_category not in NATIONAL_CATEGORIES or impact_count < 3:
+        keyword_hits = INDICATOR_MATCHER.match_categories(text)
+
+    if classify_national_activity(text, thematic_category, keyword_hits):
+        keys["national"] = national_sort_key(rec)
+    if classify_operational_environment(text, impact_count, keyword_hits):
+        keys["operational"] = operational_sort_key(rec)
+    return keys
+
+def build_indicators(events: List[Dict]):
+    """
+    Fused single pass over events producing
+    (national_indicators, operational_indicators, risk_opportunity_insights).
+    """
+    ranked = {kind: [] for kind in INDICATOR_KINDS}
+    for rec in to_records(events):
+        for kind, key in event_indicator_keys(rec).items():
+            if key is not None:
+                ranked[kind].append((key, rec))
+
+    indicators = []
+    for kind in INDICATOR_KINDS:
+        # Stable sort, descending by key
+        ranked[kind].sort(key=lambda pair: pair[0], reverse=True)
+        indicators.append([render_indicator_row(kind, rec) for _, rec in ranked[kind]])
+    return tuple(indicators)
+
+# Callers that need more than one list build them once with build_indicators()
+# and hand that result to each wrapper
+def generate_national_indicators(events: List[Dict], indicators: Optional[tuple] = None) -> List[Dict]:
     """
     Filter and format National Activity Indicators.
     Returns events that qualify as major national events.
     """
-    national_events = []
-    
-    for event in events:
-        # Skip weather - not national activity unless disaster
-        if event.get('source') == 'weather':
-            continue
-            
-        text = event.get('text', '')
-        thematic_category = event.get('thematic_category', '')
-        
-        if classify_national_activity(text, thematic_category):
-            national_events.append({
-                "id": event.get('id'),
-                "timestamp": event.get('timestamp'),
-                "source": event.get('source'),
-                "headline": text[:200],  # Truncated for readability
-                "thematic_category": thematic_category,
-                "top_industries_affected": [imp['industry'] for imp in event.get('impacts', [])[:3]],
-                "impact_score": event.get('opportunity_score', 0)
-            })
-    
-    # Sort by absolute impact
-    national_events.sort(key=lambda x: abs(x.get('impact_score', 0)), reverse=True)
-    
-    return national_events
+    return (indicators or build_indicators(events))[0]
 
-def generate_operational_indicators(events: List[Dict]) -> List[Dict]:
+def generate_operational_indicators(events: List[Dict], indicators: Optional[tuple] = None) -> List[Dict]:
     """
     Filter and format Operational Environment Indicators.
     Returns events with business/operational signals.
     """
-    operational_events = []
-    
-    for event in events:
-        # Skip weather unless it affects operations
-        if event.get('source') == 'weather':
-            continue
-            
-        text = event.get('text', '')
-        impacts = event.get('impacts', [])
-        
-        if classify_operational_environment(text, impacts):
-            # Calculate breadth of impact
-            affected_count = len([imp for imp in impacts if abs(imp.get('score', 0)) > 0.1])
-            
-            operational_events.append({
-                "id": event.get('id'),
-                "timestamp": event.get('timestamp'),
-                "source": event.get('source'),
-                "signal": text[:200],
-                "thematic_category": event.get('thematic_category', ''),
-                "affected_industries_count": affected_count,
-                "top_affected_industries": [imp['industry'] for imp in impacts[:5]],
-                "overall_impact": event.get('opportunity_score', 0)
-            })
-    
-    # Sort by breadth of impact
-    operational_events.sort(key=lambda x: x.get('affected_industries_count', 0), reverse=True)
-    
-    return operational_events
+    return (indicators or build_indicators(events))[1]
 
-def generate_risk_opportunity_insights(events: List[Dict]) -> List[Dict]:
+def generate_risk_opportunity_insights(events: List[Dict], indicators: Optional[tuple] = None) -> List[Dict]:
     """
     Generate enhanced risk/opportunity insights with explanations.
     Returns all events with detailed risk and opportunity analysis.
     """
-    insights = []
-    
-    for event in events:
-        text = event.get('text', '')
-        opp_score = event.get('opportunity_score', 0)
-        impacts = event.get('impacts', [])
-        
-        # Calculate detailed risk/opportunity
-        risk_data = calculate_risk_score(opp_score, text, impacts)
-        
-        insights.append({
-            "id": event.get('id'),
-            "timestamp": event.get('timestamp'),
-            "source": event.get('source'),
-            "headline": text[:200],
-            "thematic_category": event.get('thematic_category', ''),
-            "risk_score": risk_data['risk_score'],
-            "risk_category": risk_data['risk_category'],
-            "risk_explanation": risk_data['risk_explanation'],
-            "opportunity_score": risk_data['opportunity_score'],
-            "opportunity_category": risk_data['opportunity_category'],
-            "opportunity_explanation": risk_data['opportunity_explanation'],
-            "top_affected_industries": risk_data['top_affected_industries']
-        })
-    
-    # Sort by highest risk OR opportunity (whichever is greater)
-    insights.sort(
-        key=lambda x: max(x.get('risk_score', 0), x.get('opportunity_score', 0)), 
-        reverse=True
-    )
-    
-    return insights
+    return (indicators or build_indicators(events))[2]
+
+def window_key(rec: EventRecord) -> str:
+    """Weather is re-emitted every run, so keep only the latest reading per place."""
+    if rec.source_name == 'weather':
+        return f"weather:{rec.get('place')}"
+    return rec.id
+
+def load_event_window() -> EventWindow:
+    window = EventWindow.load(EVENT_WINDOW_FILE, event_indicator_keys, render_indicator_row, INDICATOR_KINDS,
+                              key_fn=window_key, window_hours=WINDOW_HOURS)
+    if not EVENT_WINDOW_FILE.exists():
+        # No window state (fresh deploy, cleared output/): rebuild it, and so
+        # every output, from the events the store saw in the last WINDOW_HOURS
+        try:
+            restored = EVENT_STORE.events_seen_since(time.time() - WINDOW_HOURS * 3600)
+            for seen_at, event in restored:
+                window.insert(event, seen_at)
+            if restored:
+                print(f"[WINDOW] Restored {len(window)} events from {EVENT_STORE.path.name}")
+        except Exception as e:
+            print(f"[WARN] Failed to restore event window from store: {e}")
+    return window
+
+def update_story_clusters(window: EventWindow) -> StoryClusters:
+    """Bring the stories in line with the window: evicted events leave their story, new ones join one."""
+    stories = StoryClusters.load(STORY_INDEX_FILE)
+    current = {rec.id: rec for rec in window.records() if rec.source_name != 'weather'}
+    for event_id in [eid for eid in stories.members if eid not in current]:
+        stories.remove(event_id)
+    joined_at = now_iso()
+    for event_id, rec in current.items():
+        if event_id not in stories.members:
+            risk_data = risk_opportunity(rec.score)
+            stories.add(rec, risk_data['risk_score'], risk_data['opportunity_score'], joined_at)
+    stories.save()
+    return stories
+
+def group_rows_by_story(rows: List[Dict], stories: StoryClusters) -> List[Dict]:
+    """Keep the highest-ranked row of each story, annotated with the story it stands for."""
+    grouped = []
+    seen = set()
+    for row in rows:
+        story = stories.story_of(row["id"])
+        if story is None:
+            grouped.append(row)
+            continue
+        if story.id in seen:
+            continue
+        seen.add(story.id)
+        grouped.append({**row, "story_id": story.id, "story_size": len(story.members),
+                        "story_sources": sorted({m.source for m in story.members.values()})})
+    return grouped
 
 # ---- run pipeline (single snapshot) ----
-def run_pipeline(save_history: bool = True):
+def generation_id(snapshot: Dict[str, Any]) -> str:
+    """Sorts chronologically, unique per snapshot."""
+    return snapshot["run_timestamp"].replace("-", "").replace(":", "") + "-" + snapshot["snapshot_id"][:8]
+
+def publish_generation(generation: Generation, snapshot: Dict[str, Any], events_count: int):
+    """Swap the manifest (output/latest.json) to this run's generation; drives the server's live stream."""
+    try:
+        generation.commit({
+            "snapshot_id": snapshot["snapshot_id"],
+            "run_timestamp": snapshot["run_timestamp"],
+            "published_at": now_iso(),
+            "events_count": events_count,
+            "new_events_count": snapshot["events_count"],
+            "new_event_ids": [e["id"] for e in snapshot["events"]],
+        })
+        print(f"[PUBLISH] Generation {generation.id}: {', '.join(generation.files)}")
+    except Exception as e:
+        print(f"[ERROR] Failed to publish generation {generation.id}: {e}")
+
+def run_pipeline(save_history: bool = True, group_stories: bool = False):
     print(f"[{now_iso()}] Starting pipeline run...")
     
     # Load cache
     cache = load_cache()
     initial_cache_size = len(cache)
+    url_index = CanonicalUrlIndex.load(URL_INDEX_FILE)
+    url_index.prune(time.time())
+    trends = TrendDetector.load(TREND_SKETCH_FILE)
     
     all_events: List[Dict[str, Any]] = []
 
@@ -678,7 +938,7 @@ def run_pipeline(save_history: bool = True):
         if src_name == "weather":
             events = process_weather_dict(raw_data)
         else:
-            events = process_news_list(raw_data, src_name, cache)
+            events = process_news_list(raw_data, src_name, cache, url_index, trends)
         all_events.extend(events)
 
     # Calculate overall score (average of opportunity scores)
@@ -699,72 +959,185 @@ def run_pipeline(save_history: bool = True):
     if len(cache) > initial_cache_size:
         save_cache(cache)
         print(f"[CACHE] Stored {len(cache) - initial_cache_size} new items (total: {len(cache)})")
+    url_index.save()
+    trends.save()
+
+    # Apply this run's delta to the rolling window (evict expired, insert new);
+    # indicator rows are maintained incrementally inside the window.
+    window = load_event_window()
+    evicted = window.evict_expired()
+    window.insert_many(all_events)
+    window.save()
+    try:
+        EVENT_STORE.add_snapshot(snapshot)
+    except Exception as e:
+        print(f"[ERROR] Failed to store snapshot in {EVENT_STORE.path}: {e}")
+    print(f"[WINDOW] +{len(all_events)} new, -{evicted} expired, {len(window)} events in last {WINDOW_HOURS}h")
+
+    live_snapshot = {
+        "snapshot_id": snapshot["snapshot_id"],
+        "run_timestamp": snapshot["run_timestamp"],
+        "overall_score": round(window.mean_score(), 4),
+        "events_count": len(window),
+        "new_events_count": len(all_events),
+        "window_hours": WINDOW_HOURS,
+        "events": window.events()
+    }
     
-    # live output (overwrite)
+    # Every output of this run goes into one generation directory and becomes
+    # visible at once when the manifest is swapped at the end of the run
+    generation = Generation(OUTPUT_DIR, generation_id(snapshot))
+
+    # live output (minified, with .gz/.br siblings the server sends as-is)
     try:
-        print(f"DEBUG: Snapshot keys: {list(snapshot.keys())}")
-        with LIVE_OUTPUT.open("w", encoding="utf-8") as f:
-            json.dump(snapshot, f, indent=2, ensure_ascii=False)
+        print(f"DEBUG: Snapshot keys: {list(live_snapshot.keys())}")
+        generation.publish_json(LIVE_OUTPUT.name, live_snapshot)
     except Exception as e:
         print(f"[ERROR] Failed to write live output {LIVE_OUTPUT}: {e}")
+
+    # record what this run added / updated / removed in the window
+    ChangeLog.load(CHANGE_LOG_FILE).append(snapshot["snapshot_id"], snapshot["run_timestamp"], window.drain_changes())
     
     # ========================================
     # Generate Competition Indicator Outputs
     # ========================================
     
+    # All three indicator sets cover the whole window
+    national_indicators = window.rows("national")
+    operational_indicators = window.rows("operational")
+    risk_opp_insights = window.rows("insight")
+
+    # Near-duplicate headlines of one story share a cluster; optionally one row per story
+    stories = update_story_clusters(window)
+    if group_stories:
+        national_indicators = group_rows_by_story(national_indicators, stories)
+        operational_indicators = group_rows_by_story(operational_indicators, stories)
+        risk_opp_insights = group_rows_by_story(risk_opp_insights, stories)
+
     # 1. National Activity Indicators
-    national_indicators = generate_national_indicators(all_events)
     national_output = {
         "generated_at": now_iso(),
         "total_indicators": len(national_indicators),
         "indicators": national_indicators
     }
-    national_file = OUTPUT_DIR / "national_activity_indicators.json"
+    national_file = "national_activity_indicators.json"
     try:
-        with national_file.open("w", encoding="utf-8") as f:
-            json.dump(national_output, f, indent=2, ensure_ascii=False)
+        generation.publish_json(national_file, national_output)
         print(f"[COMP] National Activity Indicators: {len(national_indicators)} events → {national_file}")
     except Exception as e:
         print(f"[ERROR] Failed to write national indicators: {e}")
     
     # 2. Operational Environment Indicators
-    operational_indicators = generate_operational_indicators(all_events)
     operational_output = {
         "generated_at": now_iso(),
         "total_indicators": len(operational_indicators),
         "indicators": operational_indicators
     }
-    operational_file = OUTPUT_DIR / "operational_environment_indicators.json"
+    operational_file = "operational_environment_indicators.json"
     try:
-        with operational_file.open("w", encoding="utf-8") as f:
-            json.dump(operational_output, f, indent=2, ensure_ascii=False)
+        generation.publish_json(operational_file, operational_output)
         print(f"[COMP] Operational Environment Indicators: {len(operational_indicators)} events → {operational_file}")
     except Exception as e:
         print(f"[ERROR] Failed to write operational indicators: {e}")
     
     # 3. Risk & Opportunity Insights
-    risk_opp_insights = generate_risk_opportunity_insights(all_events)
     risk_opp_output = {
         "generated_at": now_iso(),
         "total_insights": len(risk_opp_insights),
         "insights": risk_opp_insights
     }
-    risk_opp_file = OUTPUT_DIR / "risk_opportunity_insights.json"
+    risk_opp_file = "risk_opportunity_insights.json"
     try:
-        with risk_opp_file.open("w", encoding="utf-8") as f:
-            json.dump(risk_opp_output, f, indent=2, ensure_ascii=False)
+        generation.publish_json(risk_opp_file, risk_opp_output)
         print(f"[COMP] Risk \u0026 Opportunity Insights: {len(risk_opp_insights)} events → {risk_opp_file}")
     except Exception as e:
         print(f"[ERROR] Failed to write risk/opportunity insights: {e}")
 
-    # append hourly snapshot (Option 2: one object per line)
+    # 4. Story clusters
+    story_rows = stories.summaries()
+    stories_output = {
+        "generated_at": now_iso(),
+        "total_stories": len(story_rows),
+        "stories": story_rows
+    }
+    try:
+        generation.publish_json("story_clusters.json", stories_output)
+        print(f"[COMP] Story Clusters: {len(stories.members)} events in {len(story_rows)} stories → story_clusters.json")
+    except Exception as e:
+        print(f"[ERROR] Failed to write story clusters: {e}")
+
+    # append hourly snapshot (one compressed member in today's segment + index entry)
+    active_threads = []
     if save_history:
         try:
-            with HISTORY_FILE.open("a", encoding="utf-8") as f:
-                f.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+            HISTORY_STORE.append(snapshot)
+        except Exception as e:
+            print(f"[ERROR] Failed to append history to {HISTORY_STORE.root}: {e}")
+
+        # fold the new snapshot into the per-industry / per-category time series
+        rollups = Rollups.load(ROLLUPS_FILE)
+        if rollups.add_snapshot(snapshot):
+            rollups.save()
+
+        # link the new events to earlier events of the same developing story
+        try:
+            threads = StoryThreads.load(STORY_THREADS_FILE)
+            active_threads = threads.active(threads.add_snapshot(snapshot))
+            threads.save()
+        except Exception as e:
+            print(f"[ERROR] Failed to update story threads {STORY_THREADS_FILE}: {e}")
+
+        # and append it to the columnar archive used for long-range analytics
+        try:
+            ColumnarArchive(COLUMNAR_DIR).append(snapshot)
+        except Exception as e:
+            print(f"[ERROR] Failed to append to columnar archive {COLUMNAR_DIR}: {e}")
+
+        # embed its headlines into the nearest-neighbour index
+        try:
+            AnnIndex(ANN_DIR).append(snapshot)
         except Exception as e:
-            print(f"[ERROR] Failed to append history {HISTORY_FILE}: {e}")
+            print(f"[ERROR] Failed to append to ANN index {ANN_DIR}: {e}")
+
+        # and index its new headlines for full-text search
+        try:
+            SearchIndex(SEARCH_DIR).append(snapshot)
+        except Exception as e:
+            print(f"[ERROR] Failed to update search index {SEARCH_DIR}: {e}")
+
+    # story threads this run's events continued (two or more events across runs)
+    threads_output = {
+        "generated_at": now_iso(),
+        "total_threads": len(active_threads),
+        "threads": active_threads
+    }
+    try:
+        generation.publish_json("active_threads.json", threads_output)
+        print(f"[COMP] Story Threads: {len(active_threads)} threads continued → active_threads.json")
+    except Exception as e:
+        print(f"[ERROR] Failed to write story threads: {e}")
+
+    # rolling statistics: updated in O(1) per key, published as industry_momentum.json
+    momentum = MomentumStats.load(MOMENTUM_FILE)
+    if save_history and momentum.add_snapshot(snapshot):
+        momentum.save()
+    momentum_output = {"generated_at": now_iso(), **momentum.summary()}
+    try:
+        generation.publish_json("industry_momentum.json", momentum_output)
+        rising = [k for k, v in momentum_output["industry"].items() if v["trend"] == "rising"]
+        print(f"[COMP] Momentum: {len(momentum_output['industry'])} industries ({len(rising)} rising) → industry_momentum.json")
+    except Exception as e:
+        print(f"[ERROR] Failed to write momentum stats: {e}")
+
+    # emerging topics: terms bursting above their decayed baseline in this hour's headlines
+    topics_output = {"generated_at": now_iso(), **trends.summary()}
+    try:
+        generation.publish_json("emerging_topics.json", topics_output)
+        print(f"[COMP] Emerging Topics: {len(topics_output['topics'])} topics → emerging_topics.json")
+    except Exception as e:
+        print(f"[ERROR] Failed to write emerging topics: {e}")
 
+    publish_generation(generation, snapshot, len(window))
     return snapshot
 
 # CLI
@@ -772,7 +1145,8 @@ if __name__ == "__main__":
     import argparse
     p = argparse.ArgumentParser()
     p.add_argument("--no-history", action="store_true", help="Don't append to hourly history")
+    p.add_argument("--group-stories", action="store_true", help="Emit one indicator row per story cluster")
     args = p.parse_args()
-    snap = run_pipeline(save_history=(not args.no_history))
+    snap = run_pipeline(save_history=(not args.no_history), group_stories=args.group_stories)
     print(f"[{now_iso()}] Completed snapshot {snap['snapshot_id']} with {snap['events_count']} events. Live written to {LIVE_OUTPUT}")
 
@@ -3,6 +3,10 @@ import pandas as pd
 from transformers import pipeline
 from tqdm import tqdm
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from engine.keyword_matcher import KeywordMatcher
 
 # CONFIG
 # ---------------------------
@@ -36,41 +40,43 @@ def extract_text(item):
         return item.strip()
     return ""
 
+# Positive context modifiers (fighting the bad stuff)
+POSITIVE_MODIFIERS = [
+    "action against", "fight", "combat", "crackdown", "arrest", "seize", 
+    "stop", "prevent", "reduce", "control", "tackle", "eliminate", "eradicate",
+    "investigate", "probe", "caught", "busted", "raid"
+]
+
+# Strong negative keywords
+NEGATIVES = [
+    "price increase", "prices increased", "prices are increased", "cost rise", "inflation",
+    "flood", "heavy rain", "landslide", "disaster", "cyclone", "storm",
+    "crisis", "shortage", "scam", "fraud", "unauthorized", "corruption", "bribe"
+]
+
+# Both lists checked in one pass over the text
+RULE_MATCHER = KeywordMatcher({"negative": NEGATIVES, "modifier": POSITIVE_MODIFIERS})
+
 def apply_keyword_rules(text, current_score):
-    text_lower = text.lower()
-    
-    # Positive context modifiers (fighting the bad stuff)
-    positive_modifiers = [
-        "action against", "fight", "combat", "crackdown", "arrest", "seize", 
-        "stop", "prevent", "reduce", "control", "tackle", "eliminate", "eradicate",
-        "investigate", "probe", "caught", "busted", "raid"
-    ]
-    
-    # Strong negative keywords
-    negatives = [
-        "price increase", "prices increased", "prices are increased", "cost rise", "inflation",
-        "flood", "heavy rain", "landslide", "disaster", "cyclone", "storm",
-        "crisis", "shortage", "scam", "fraud", "unauthorized", "corruption", "bribe"
-    ]
+    matched = RULE_MATCHER.match_categories(text)
     
     # Check for negatives
-    for kw in negatives:
-        if kw in text_lower:
-            # Check if it's being fought
-            is_being_fought = any(mod in text_lower for mod in positive_modifiers)
-            
-            if is_being_fought:
-                # If fighting bad things, it's GOOD (or at least not bad)
-                # e.g. "Action against corruption" -> Positive
-                if current_score < 0.2:
-                    return 0.4 # Force positive
-                return current_score + 0.2
+    if "negative" in matched:
+        # Check if it's being fought
+        is_being_fought = "modifier" in matched
+        
+        if is_being_fought:
+            # If fighting bad things, it's GOOD (or at least not bad)
+            # e.g. "Action against corruption" -> Positive
+            if current_score < 0.2:
+                return 0.4 # Force positive
+            return current_score + 0.2
+        else:
+            # If just the bad thing, it's BAD
+            if current_score > 0:
+                return -0.5  # Force negative
             else:
-                # If just the bad thing, it's BAD
-                if current_score > 0:
-                    return -0.5  # Force negative
-                else:
-                    return current_score - 0.3 # Make it more negative
+                return current_score - 0.3 # Make it more negative
                 
     return current_score
 
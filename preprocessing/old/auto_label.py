@@ -6,6 +6,10 @@ import csv
 import re
 import os
 import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from engine.keyword_matcher import KeywordMatcher
 
 # ----------------------------------------
 # 1. PATH SETTINGS
@@ -72,6 +76,9 @@ RULES = {
 
 DEFAULT_CAT = "other"
 
+# All rule sets compiled once; first matching category in RULES order wins
+RULE_MATCHER = KeywordMatcher(RULES)
+
 
 
 # ----------------------------------------
@@ -95,10 +102,7 @@ def clean_text(text):
 
 def auto_label(text):
     text_c = clean_text(text)
-    for category, keywords in RULES.items():
-        if any(k in text_c for k in keywords):
-            return category
-    return DEFAULT_CAT
+    return RULE_MATCHER.first_category(text_c, DEFAULT_CAT)
 
 
 
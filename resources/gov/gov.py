@@ -3,8 +3,10 @@ import os
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
+from pathlib import Path
 
-OUTPUT_DIR = "../../jsons"
+OUTPUT_DIR = Path(__file__).resolve().parents[2] / "jsons"
+OUTPUT_FILE = OUTPUT_DIR / "government_news.json"
 
 GOV_SOURCES = [
     {
@@ -132,9 +134,8 @@ def extract_html(source):
         return []
 
 
-def run_gov_collector():
-    ensure_output_dir()
-
+def collect():
+    """Fetch every government source and return the combined list."""
     all_data = []
 
     for source in GOV_SOURCES:
@@ -145,7 +146,12 @@ def run_gov_collector():
 
         all_data.extend(entries)
 
-    save_json("government_news.json", all_data)
+    return all_data
+
+
+def run_gov_collector():
+    ensure_output_dir()
+    save_json(OUTPUT_FILE.name, collect())
 
 
 if __name__ == "__main__":
@@ -2,13 +2,18 @@ import requests
 import feedparser
 import json
 from datetime import datetime
-import yt_key
+from pathlib import Path
+
+try:
+    from resources.headlines import yt_key
+except ImportError:
+    import yt_key
 
 # ----------------------------------------------
 # CONFIG
 # ----------------------------------------------
 
-OUTPUT_FILE = "../../jsons/sri_lanka_news.json"
+OUTPUT_FILE = Path(__file__).resolve().parents[2] / "jsons" / "sri_lanka_news.json"
 YOUTUBE_API_KEY = yt_key.YOUTUBE  # free quota
 
 # RSS sources (Sri Lanka)
@@ -96,7 +101,7 @@ def scrape_youtube():
             "&maxResults=50"
         )
         try:
-            r = requests.get(url).json()
+            r = requests.get(url, timeout=15).json()
 
             if "items" in r:
                 for item in r["items"]:
@@ -123,7 +128,7 @@ def scrape_gdelt():
 
     url = "http://api.gdeltproject.org/api/v2/doc/doc?query=Sri%20Lanka&mode=ArtList&format=json&maxrecords=250"
     try:
-        data = requests.get(url).json()
+        data = requests.get(url, timeout=15).json()
         articles = data.get("articles", [])
         result = []
 
@@ -174,12 +179,8 @@ def scrape_reddit():
 # -----------------------------------------------------
 # MASTER AGGREGATOR
 # -----------------------------------------------------
-def main():
-    print("================================")
-    print("   SRI LANKA NEWS SCRAPER")
-    print("   (Reddit Removed)")
-    print("================================")
-
+def collect():
+    """Fetch every headline source and return the combined list."""
     combined = []
 
     combined += scrape_rss()
@@ -190,6 +191,17 @@ def main():
     # Future:
     # combined += scrape_reddit()   # re-enable when approved
 
+    return combined
+
+
+def main():
+    print("================================")
+    print("   SRI LANKA NEWS SCRAPER")
+    print("   (Reddit Removed)")
+    print("================================")
+
+    combined = collect()
+
     print(f"\n[✓] Total collected: {len(combined)} headlines")
 
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
@@ -1,12 +1,18 @@
 import requests
 import json
 import time
-import weather_key
+from pathlib import Path
+
+try:
+    from resources.weather import weather_key
+except ImportError:
+    import weather_key
 
 # ================================
 #  CONFIGURATION
 # ================================
 API_KEY = weather_key.OPENWEATHER
+OUTPUT_FILE = Path(__file__).resolve().parents[2] / "jsons" / "srilanka_weather.json"
 
 # Sri Lanka district coordinates (central reference points)
 DISTRICTS = {
@@ -87,19 +93,26 @@ def fetch_weather(lat, lon):
 # ================================
 #  MAIN EXECUTION
 # ================================
-def main():
+def collect():
+    """Fetch weather for every district and return {district: record}."""
     final_output = {}
 
-    print("Fetching Sri Lanka district weather data...\n")
-
     for district, (lat, lon) in DISTRICTS.items():
         print(f"Processing: {district}")
         weather = fetch_weather(lat, lon)
         final_output[district] = weather
         time.sleep(1.2)  # to avoid free API rate limits
 
+    return final_output
+
+
+def main():
+    print("Fetching Sri Lanka district weather data...\n")
+
+    final_output = collect()
+
     # Save JSON file
-    with open("../../jsons/srilanka_weather.json", "w") as f:
+    with open(OUTPUT_FILE, "w") as f:
         json.dump(final_output, f, indent=4)
 
     print("\nCompleted! Weather data saved as: srilanka_weather.json")
@@ -1,33 +1,23 @@
 import subprocess
 import sys
-from datetime import datetime
 import argparse
 import time
 from pathlib import Path
 
+from collect_all import collect_all
+
 BASE_DIR = Path(__file__).resolve().parent
 
-RESOURCES_DIR = BASE_DIR / "resources"
 PIPELINE_SCRIPT = BASE_DIR / "pipeline.py"
-HISTORY_DIR = BASE_DIR / "history"
 
 def run_resource_scripts():
-    print("Running resource scripts...")
-
-    scripts = [
-        RESOURCES_DIR / "gov/gov.py",
-        RESOURCES_DIR / "headlines/headline_ocean.py",
-        RESOURCES_DIR / "weather/weather.py",
-    ]
+    print("Running resource collectors...")
 
-    for script in scripts:
-        print(f" → Running {script.name}")
-        result = subprocess.run([sys.executable, str(script)], capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"[ERROR] {script.name} failed:")
-            print(result.stderr)
+    for result in collect_all():
+        if not result["ok"]:
+            print(f"[ERROR] {result['source']} failed: {result['error']}")
         else:
-            print(f"[OK] {script.name} completed.")
+            print(f"[OK] {result['source']}: {result['count']} items in {result['duration']}s.")
 
 def run_pipeline():
     print("Running pipeline to generate live_output.json ...")
@@ -41,28 +31,14 @@ def run_pipeline():
         print("[OK] Pipeline completed.")
         return True
 
-def append_to_history():
-    print("Appending snapshot to history...")
-    HISTORY_DIR.mkdir(exist_ok=True)
-    history_file = HISTORY_DIR / "hourly_history.jsonl"
-    live_file = BASE_DIR / "output/live_output.json"
-
-    if live_file.exists():
-        line = live_file.read_text().strip()
-        with open(history_file, "a") as f:
-            f.write(line + "\n")
-        print("[OK] Snapshot appended.")
-    else:
-        print("[ERROR] live_output.json not found!")
-
 def run_once():
     print("==========================")
     print("Running hourly job ONCE")
     print("==========================")
 
     run_resource_scripts()
-    if run_pipeline():
-        append_to_history()
+    # pipeline.py appends this run's snapshot to history itself
+    run_pipeline()
 
 def run_every_hour():
     while True:
@@ -5,17 +5,425 @@ Serves:
 - UI from /ui/dist/index.html at root (/)
 - Static assets from /ui/dist/assets/
 - JSON outputs from /output/ directory
+- History API:
+    /api/history?last=N                 last N snapshots (JSONL)
+    /api/history?from=T1&to=T2          snapshots with T1 <= run_timestamp <= T2 (JSONL)
+    /api/history/index                  snapshot index (JSON)
+- Time-series API (precomputed rollups):
+    /api/timeseries?dimension=industry|category[&key=Tea][&resolution=hourly|daily|weekly]
+                   [&from=T1][&to=T2][&last=N]
+    /api/momentum?dimension=industry|category[&key=Tea]
+                                        EWMA / Welford stats and momentum z-score per key
+- Story threads across snapshots:
+    /api/thread?id=<event_id>           timeline and score trajectory of the event's story
+- Similar headlines across all history (approximate nearest neighbours, history/ann/):
+    /api/similar?text=...|id=<event_id>[&k=10]
+                                        most similar stored events with their cosine similarity
+- Full-text search across all history (positional inverted index, history/search/):
+    /api/search?q=imf "colombo port"[&industry=..][&category=..][&source=..]
+               [&since=T1][&until=T2][&limit=20][&offset=0]
+                                        BM25-ranked events; quoted phrases, all terms required
+- Query API over the current window (in-memory indexes, cursor pagination):
+    /api/events?industry=Tea&impact_type=Threat&category=..&source=..
+               [&min_score=][&max_score=][&hours=24|&since=T1&until=T2]
+               [&sort=time|score][&order=desc|asc][&limit=50][&cursor=..]
+    /api/insights?industry=..&category=..&source=..&risk_category=..&opportunity_category=..
+               [&min_risk=][&max_risk=][&min_score=][&max_score=] + time / sort / paging as above
+- Deltas between snapshots (stable content-derived event ids):
+    /api/changes?since=<snapshot_id>    events added / updated / removed since that snapshot
+                                        (reset=true with the full window if it is unknown)
+- Trends from the SQLite event store (output/events.db, read-only):
+    /api/trend?industry=Construction[&category=..][&source=..][&days=30]
+                                        daily count, mean score, mean risk, threats / opportunities
+- On-demand scoring with the warm pipeline models (bursts are coalesced into batches):
+    POST /score  {"text": "..."} or {"texts": ["...", ...]}
+                                        category, industry impacts and risk/opportunity
+    /api/score/stats                    batching, cache hits and p50/p99 latency
+- Live stream (Server-Sent Events):
+    /api/stream                         `snapshot` event each time the pipeline publishes
+
+Requests are handled on worker threads over HTTP/1.1 keep-alive. Files are
+served from an in-memory cache invalidated by mtime; every response carries
+a strong ETag (content hash), `If-None-Match` is answered with 304, and
+bodies are gzip- (or brotli-, if installed) encoded when the client accepts it.
+Outputs published with precompressed .gz/.br siblings (engine/publish.py)
+are sent straight from those files with sendfile instead of being encoded
+per request.
 """
 
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import gzip
+import hashlib
+import json
+import math
 import os
+import sqlite3
+import stat
+import sys
+import threading
+import time
 from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
 
 # Detect if running in Docker or local
 BASE_DIR = Path('/app') if Path('/app').exists() else Path(__file__).parent
 print(f"[INFO] Base directory: {BASE_DIR}")
 
+sys.path.append(str(BASE_DIR))
+from engine.history_store import HistoryStore
+from engine.rollups import DIMENSIONS, RESOLUTIONS, Rollups
+from engine.momentum import MomentumStats
+from engine.story_threads import StoryThreads, archive_path, describe, load_archive
+from engine.ann_index import META_FILENAME, AnnIndex, embed
+from engine.search_index import FILTER_FIELDS, SearchIndex
+from engine.event_query import build_event_index, build_insight_index, parse_time, run_query
+from engine.event_window import ADDED, REMOVED, UPDATED, ChangeLog
+from engine.scoring_service import ScoringService
+from engine.event_store import EventStore
+from engine.publish import MANIFEST_NAME, PRECOMPRESSED_SUFFIXES, load_manifest, resolve_output
+
+HISTORY_STORE = HistoryStore(BASE_DIR / 'history')
+OUTPUT_DIR = BASE_DIR / 'output'
+ROLLUPS_FILE = OUTPUT_DIR / 'rollups.json'
+MOMENTUM_FILE = OUTPUT_DIR / 'momentum.json'
+STORY_THREADS_FILE = OUTPUT_DIR / 'story_threads.json'
+ANN_META_FILE = BASE_DIR / 'history' / 'ann' / META_FILENAME
+SEARCH_META_FILE = BASE_DIR / 'history' / 'search' / 'meta.json'
+CHANGE_LOG_FILE = OUTPUT_DIR / 'window_changes.jsonl'
+# Names the current output generation; swapped atomically by the pipeline
+MANIFEST_FILE = OUTPUT_DIR / MANIFEST_NAME
+# Written by the pipeline; WAL mode lets every request thread read during a run
+EVENT_STORE = EventStore(OUTPUT_DIR / 'events.db', read_only=True)
+MAX_TREND_DAYS = 366
+MAX_SIMILAR = 100
+MAX_SEARCH_RESULTS = 100
+MAX_SEARCH_OFFSET = 1000
+
+EVENT_TERM_FIELDS = ('industry', 'impact_type', 'category', 'source')
+INSIGHT_TERM_FIELDS = ('industry', 'category', 'source', 'risk_category', 'opportunity_category')
+
+# Loaded objects cached until the backing file's mtime changes
+_file_cache = {}
+# Guards _file_cache / _file_locks; a per-path lock is held while that path's loader runs
+_file_cache_lock = threading.Lock()
+_file_locks = {}
+
+def load_cached(path: Path, loader):
+    with _file_cache_lock:
+        path_lock = _file_locks.setdefault(path, threading.Lock())
+    # Concurrent requests for the same stale file wait for one build instead of each loading it
+    with path_lock:
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        with _file_cache_lock:
+            cached = _file_cache.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, loader(path))
+            with _file_cache_lock:
+                _file_cache[path] = cached
+                # Entries for superseded generations are dropped once their files are pruned
+                for stale in [p for p in _file_cache if p != path and not p.exists()]:
+                    _file_cache.pop(stale, None)
+                    _file_locks.pop(stale, None)
+    return cached[1]
+
+def int_param(query, name: str, default, low: int, high: int):
+    """An integer query parameter within [low, high] (default when absent)."""
+    if name not in query:
+        return default
+    try:
+        value = int(query[name][0])
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return value
+
+def float_param(query, name: str, default: float, low: float, high: float) -> float:
+    """A finite number query parameter within (low, high] (default when absent)."""
+    if name not in query:
+        return default
+    try:
+        value = float(query[name][0])
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+    if not math.isfinite(value) or not low < value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return value
+
+def current_manifest():
+    return load_cached(MANIFEST_FILE, lambda p: load_manifest(p.parent)) or {}
+
+def output_file(name: str) -> Path:
+    """`output/<name>` as of the current generation."""
+    return resolve_output(OUTPUT_DIR, name, current_manifest())
+
+def read_json_list(path: Path, key: str):
+    try:
+        with path.open('r', encoding='utf-8') as f:
+            return json.load(f).get(key, [])
+    except FileNotFoundError:
+        return []
+
+def event_index():
+    return load_cached(output_file('live_output.json'), lambda p: build_event_index(read_json_list(p, 'events')))
+
+def load_scorer():
+    """Import the pipeline once (loads its models) and score against its classification cache."""
+    import pipeline
+
+    # A live view of the store's classifications table, read on the worker thread
+    cache = pipeline.load_classification_cache()
+
+    def scorer(texts):
+        return pipeline.score_texts(texts, cache)
+    return scorer
+
+SCORING = ScoringService(load_scorer)
+MAX_SCORE_TEXTS = 64
+MAX_SCORE_CHARS = 5000
+MAX_SCORE_BODY_BYTES = 1024 * 1024
+
+# Cap on snapshots returned by a single history request
+MAX_HISTORY_SNAPSHOTS = 1000
+
+# Optional: brotli is preferred over gzip when the package is installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+# Larger files are streamed from disk instead of being held in memory
+MAX_CACHED_FILE_BYTES = 32 * 1024 * 1024
+MAX_CACHED_FILES = 256
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/x-ndjson', 'application/javascript', 'image/svg+xml')
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """Pick 'br', 'gzip' or 'identity' from an Accept-Encoding header (q-values honoured)."""
+    offered = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        offered[name] = q
+    supported = ('br', 'gzip') if brotli else ('gzip',)
+    best, best_q = 'identity', 0.0
+    for encoding in supported:
+        q = offered.get(encoding, offered.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+class Representation:
+    """A response body with its strong ETag; compressed variants are built lazily and kept."""
+
+    def __init__(self, body: bytes, content_type: str):
+        self.body = body
+        self.content_type = content_type
+        self.etag = make_etag(body)
+        self.compressible = len(body) >= MIN_COMPRESS_BYTES and content_type.startswith(COMPRESSIBLE_TYPES)
+        # encoding -> (path, inode, size) of a verified precompressed sibling file
+        self.precompressed = {}
+        self._encoded = {}
+        self._lock = threading.Lock()
+
+    def variant_etag(self, encoding: str) -> str:
+        # Strong ETags identify a representation, so each encoding gets its own
+        if encoding == 'identity' or not self.compressible:
+            return self.etag
+        return f'{self.etag[:-1]}-{encoding}"'
+
+    def variant(self, encoding: str):
+        """Return (body, etag) for 'identity', 'gzip' or 'br'."""
+        if encoding == 'identity' or not self.compressible:
+            return self.body, self.etag
+        with self._lock:
+            body = self._encoded.get(encoding)
+            if body is None:
+                if encoding == 'br':
+                    body = brotli.compress(self.body, quality=5)
+                else:
+                    body = gzip.compress(self.body, compresslevel=6, mtime=0)
+                self._encoded[encoding] = body
+        return body, self.variant_etag(encoding)
+
+def find_precompressed(path: str, body: bytes):
+    """
+    Sibling .gz/.br files that decode to exactly `body`. Checked once per
+    file version, so a sibling left over from an older publish is never
+    served with the new version's ETag.
+    """
+    found = {}
+    for encoding, suffix in PRECOMPRESSED_SUFFIXES.items():
+        if encoding == 'br' and brotli is None:
+            continue
+        sibling = path + suffix
+        try:
+            with open(sibling, 'rb') as f:
+                st = os.fstat(f.fileno())
+                data = f.read()
+            decoded = brotli.decompress(data) if encoding == 'br' else gzip.decompress(data)
+        except Exception:
+            continue
+        if decoded == body:
+            found[encoding] = (sibling, st.st_ino, st.st_size)
+    return found
+
+class StaticCache:
+    """File bodies held in memory, reloaded when the file's (mtime, size) changes."""
+
+    def __init__(self, max_file_bytes: int = MAX_CACHED_FILE_BYTES):
+        self.max_file_bytes = max_file_bytes
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str, content_type: str):
+        """Return a Representation, or None if the file is missing or too large to cache."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode) or st.st_size > self.max_file_bytes:
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self._entries.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        try:
+            with open(path, 'rb') as f:
+                # fstat the handle actually read so an atomic replace can't pair old key with new body
+                st = os.fstat(f.fileno())
+                body = f.read()
+        except OSError:
+            return None
+        rep = Representation(body, content_type)
+        if rep.compressible:
+            rep.precompressed = find_precompressed(path, body)
+        with self._lock:
+            self._entries.pop(path, None)
+            self._entries[path] = ((st.st_mtime_ns, st.st_size), rep)
+            # Each generation has its own paths; forget the oldest ones
+            while len(self._entries) > MAX_CACHED_FILES:
+                self._entries.pop(next(iter(self._entries)))
+        return rep
+
+STATIC_CACHE = StaticCache()
+
+STREAM_POLL_SECONDS = 0.25
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_RETRY_MS = 3000
+
+class SnapshotBroadcaster:
+    """
+    Pushes a `snapshot` event to every /api/stream subscriber when the
+    pipeline publishes. A single watcher thread serves all subscribers:
+    their sockets are detached from the handler threads and written to
+    directly, so an idle subscriber costs a socket, not a thread.
+    """
+
+    def __init__(self, marker: Path):
+        self.marker = marker
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._current = None  # (event id, encoded event)
+        self._poll()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def _poll(self) -> bool:
+        """Reload the marker if it changed; True when a new snapshot was published."""
+        try:
+            st = self.marker.stat()
+        except FileNotFoundError:
+            return False
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            data = json.loads(self.marker.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Failed to read publish marker: {e}")
+            return False
+        event_id = str(data.get('snapshot_id') or stamp[0])
+        if self._current is not None and self._current[0] == event_id:
+            return False
+        payload = json.dumps(data, ensure_ascii=False)
+        self._current = (event_id, f"id: {event_id}\nevent: snapshot\ndata: {payload}\n\n".encode('utf-8'))
+        return True
+
+    def _send(self, sock, data: bytes) -> bool:
+        try:
+            sent = sock.send(data)
+        except OSError:
+            sent = -1
+        if sent == len(data):
+            return True
+        # Gone, or too slow to take a small event: drop it and let
+        # EventSource reconnect (it resumes via Last-Event-ID)
+        try:
+            sock.close()
+        except OSError:
+            pass
+        return False
+
+    def subscribe(self, sock, last_event_id: str = None):
+        sock.setblocking(False)
+        message = f"retry: {STREAM_RETRY_MS}\n\n".encode('utf-8')
+        with self._lock:
+            # Catch the client up unless it already saw the current snapshot
+            if self._current is not None and self._current[0] != last_event_id:
+                message += self._current[1]
+            if self._send(sock, message):
+                self._subscribers.append(sock)
+
+    def broadcast(self, data: bytes):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if self._send(s, data)]
+
+    def run(self):
+        last_sent = time.monotonic()
+        while True:
+            time.sleep(STREAM_POLL_SECONDS)
+            now = time.monotonic()
+            if self._poll():
+                self.broadcast(self._current[1])
+                print(f"[INFO] Pushed snapshot {self._current[0]} to {len(self)} subscribers")
+                last_sent = now
+            elif now - last_sent >= STREAM_HEARTBEAT_SECONDS:
+                # Comment line keeps proxies from idling the stream out and detects dead peers
+                self.broadcast(b': ping\n\n')
+                last_sent = now
+
+    def start(self):
+        threading.Thread(target=self.run, name='snapshot-broadcaster', daemon=True).start()
+
+BROADCASTER = SnapshotBroadcaster(MANIFEST_FILE)
+
 class EvolveXHandler(SimpleHTTPRequestHandler):
+    # Keep-alive; idle connections are closed after `timeout` seconds
+    protocol_version = 'HTTP/1.1'
+    timeout = 60
+    extensions_map = {**SimpleHTTPRequestHandler.extensions_map, '.jsonl': 'application/x-ndjson', '.json': 'application/json'}
+
     def __init__(self, *args, **kwargs):
         # Set the directory to serve from
         super().__init__(*args, directory=str(BASE_DIR), **kwargs)
@@ -23,23 +431,364 @@ class EvolveXHandler(SimpleHTTPRequestHandler):
     def end_headers(self):
         # Enable CORS
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', '*')
-        self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate')
+        self.send_header('Access-Control-Expose-Headers', 'ETag')
         super().end_headers()
     
     def do_OPTIONS(self):
         self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path.startswith('/api/'):
+            self.handle_api(parts.path, parse_qs(parts.query))
+            return
+        self.serve_static(head=False)
+
+    def do_HEAD(self):
+        self.serve_static(head=True)
+
+    # ---- responses ----
+    def not_modified(self, etag: str) -> bool:
+        header = self.headers.get('If-None-Match')
+        if not header:
+            return False
+        if header.strip() == '*':
+            return True
+        # If-None-Match uses weak comparison
+        tags = {t.strip().removeprefix('W/') for t in header.split(',')}
+        return etag in tags
+
+    def send_representation(self, rep: Representation, cache_control: str = 'no-cache',
+                            status: int = 200, head: bool = False):
+        encoding = negotiate_encoding(self.headers.get('Accept-Encoding', '')) if rep.compressible else 'identity'
+        etag = rep.variant_etag(encoding)
+        if status == 200 and self.not_modified(etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', cache_control)
+            if rep.compressible:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+        if encoding in rep.precompressed and self.send_precompressed(rep, encoding, etag, cache_control, head):
+            return
+        body, etag = rep.variant(encoding)
+        self.send_response(status)
+        self.send_header('Content-Type', rep.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', cache_control)
+        if rep.compressible:
+            self.send_header('Vary', 'Accept-Encoding')
+        if encoding != 'identity':
+            self.send_header('Content-Encoding', encoding)
         self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def send_precompressed(self, rep: Representation, encoding: str, etag: str,
+                           cache_control: str, head: bool) -> bool:
+        """Send a verified sibling file with zero-copy sendfile; False if it changed on disk."""
+        path, inode, size = rep.precompressed[encoding]
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            return False
+        with f:
+            st = os.fstat(f.fileno())
+            if (st.st_ino, st.st_size) != (inode, size):
+                # Replaced by a newer publish since it was verified
+                return False
+            self.send_response(200)
+            self.send_header('Content-Type', rep.content_type)
+            self.send_header('Content-Length', str(size))
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', cache_control)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Content-Encoding', encoding)
+            self.end_headers()
+            if not head:
+                self.connection.sendfile(f)
+        return True
+
+    def serve_static(self, head: bool):
+        path = self.translate_path(self.path)
+        rep = STATIC_CACHE.get(path, self.guess_type(path))
+        if rep is None:
+            # Missing, directory or too large to cache: stream from disk
+            if head:
+                super().do_HEAD()
+            else:
+                super().do_GET()
+            return
+        # Vite asset names are content-hashed and generations are immutable
+        if urlsplit(self.path).path.startswith(('/assets/', '/output/generations/')):
+            cache_control = 'public, max-age=31536000, immutable'
+        else:
+            cache_control = 'no-cache'
+        self.send_representation(rep, cache_control, head=head)
+
+    # ---- API ----
+    def send_body(self, body: bytes, content_type: str, status: int = 200):
+        self.send_representation(Representation(body, content_type), status=status)
+
+    def send_json(self, obj, status: int = 200):
+        self.send_body(json.dumps(obj, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8', status)
+
+    def handle_api(self, path, query):
+        try:
+            if path == '/api/history':
+                self.api_history(query)
+            elif path == '/api/history/index':
+                self.send_json(HISTORY_STORE.entries())
+            elif path == '/api/timeseries':
+                self.api_timeseries(query)
+            elif path == '/api/momentum':
+                self.api_momentum(query)
+            elif path == '/api/thread':
+                self.api_thread(query)
+            elif path == '/api/similar':
+                self.api_similar(query)
+            elif path == '/api/search':
+                self.api_search(query)
+            elif path == '/api/events':
+                self.send_json(run_query(event_index(), query, EVENT_TERM_FIELDS, ('score',)))
+            elif path == '/api/insights':
+                index = load_cached(output_file('risk_opportunity_insights.json'),
+                                    lambda p: build_insight_index(read_json_list(p, 'insights')))
+                self.send_json(run_query(index, query, INSIGHT_TERM_FIELDS, ('score', 'risk')))
+            elif path == '/api/changes':
+                self.api_changes(query)
+            elif path == '/api/trend':
+                self.api_trend(query)
+            elif path == '/api/score/stats':
+                self.send_json(SCORING.stats())
+            elif path == '/api/stream':
+                self.api_stream()
+            else:
+                self.send_json({"error": f"Unknown endpoint {path}"}, 404)
+        except ValueError as e:
+            self.send_json({"error": str(e)}, 400)
+        except ConnectionError:
+            # The client went away; there is no one left to answer
+            self.close_connection = True
+        except Exception as e:
+            print(f"[ERROR] {path} failed: {e!r}")
+            self.close_connection = True
+            self.send_json({"error": "Internal server error"}, 500)
+
+    def api_history(self, query):
+        if 'last' in query:
+            entries = HISTORY_STORE.last_entries(min(int_param(query, 'last', None, 0, sys.maxsize), MAX_HISTORY_SNAPSHOTS))
+        elif 'from' in query or 'to' in query:
+            entries = HISTORY_STORE.entries_between(query.get('from', [None])[0], query.get('to', [None])[0])
+            entries = entries[-MAX_HISTORY_SNAPSHOTS:]
+        else:
+            raise ValueError("Specify ?last=N or ?from=T1&to=T2")
+
+        # Same JSONL shape as the legacy hourly_history.jsonl
+        body = ''.join(json.dumps(s, ensure_ascii=False) + '\n' for s in HISTORY_STORE.read_many(entries))
+        self.send_body(body.encode('utf-8'), 'application/x-ndjson; charset=utf-8')
     
+    def api_changes(self, query):
+        since = query.get('since', [None])[0]
+        log = load_cached(CHANGE_LOG_FILE, ChangeLog.load)
+        index = event_index()
+        # The log may already hold a run whose generation is not published yet
+        current = current_manifest().get('snapshot_id') or log.latest()
+        changes = log.since(since, until=current) if since else None
+        if changes is None:
+            # Unknown or expired snapshot: the client should replace its state
+            self.send_json({"since": since, "snapshot_id": current, "reset": True,
+                            ADDED: index.records, UPDATED: [], REMOVED: []})
+            return
+        delta = {ADDED: [], UPDATED: [], REMOVED: []}
+        for event_id, status in changes.items():
+            if status == REMOVED:
+                delta[REMOVED].append(event_id)
+            else:
+                event = index.get(event_id)
+                if event is not None:
+                    delta[status].append(event)
+        self.send_json({"since": since, "snapshot_id": current, "reset": False, **delta})
+
+    def api_trend(self, query):
+        params = {k: query.get(k, [None])[0] for k in ('industry', 'category', 'source')}
+        days = float_param(query, 'days', 30.0, 0, MAX_TREND_DAYS)
+        try:
+            points = EVENT_STORE.trend(days=days, **params)
+        except sqlite3.OperationalError as e:
+            self.send_json({"error": f"Event store unavailable: {e}"}, 503)
+            return
+        self.send_json({**{k: v for k, v in params.items() if v}, "days": days, "points": points})
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        if path not in ('/score', '/api/score'):
+            self.close_connection = True
+            self.send_json({"error": f"Unknown endpoint {path}"}, 404)
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length < 0:
+                # rfile.read(-1) would block until the client closes the connection
+                self.close_connection = True
+                raise ValueError("Invalid Content-Length")
+            if length > MAX_SCORE_BODY_BYTES:
+                self.close_connection = True
+                raise ValueError("Request body too large")
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(payload, dict):
+                raise ValueError('Expected {"text": ...} or {"texts": [...]}')
+            single = 'text' in payload
+            texts = [payload['text']] if single else payload.get('texts')
+            if not isinstance(texts, list) or not texts or not all(isinstance(t, str) and t.strip() for t in texts):
+                raise ValueError('Expected {"text": ...} or {"texts": [...]} with non-empty strings')
+            if len(texts) > MAX_SCORE_TEXTS:
+                raise ValueError(f"At most {MAX_SCORE_TEXTS} texts per request")
+            if any(len(t) > MAX_SCORE_CHARS for t in texts):
+                raise ValueError(f"Texts are limited to {MAX_SCORE_CHARS} characters")
+            results = SCORING.score([t.strip() for t in texts])
+        except ValueError as e:
+            self.send_json({"error": str(e)}, 400)
+            return
+        except (TimeoutError, FuturesTimeoutError) as e:
+            self.send_json({"error": str(e) or "Scoring timed out"}, 503)
+            return
+        except RuntimeError as e:
+            self.send_json({"error": str(e)}, 503)
+            return
+        except Exception as e:
+            print(f"[ERROR] Scoring failed: {e!r}")
+            self.send_json({"error": "Scoring failed"}, 500)
+            return
+        self.send_json(results[0] if single else {"results": results})
+
+    def api_stream(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.end_headers()
+        # Hand the socket over to the broadcaster and free this worker thread
+        self.close_connection = True
+        self.server.detach(self.connection)
+        BROADCASTER.subscribe(self.connection, self.headers.get('Last-Event-ID'))
+
+    def api_timeseries(self, query):
+        dimension = query.get('dimension', ['industry'])[0]
+        resolution = query.get('resolution', ['hourly'])[0]
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"dimension must be one of {DIMENSIONS}")
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {RESOLUTIONS}")
+        start = query.get('from', [None])[0]
+        end = query.get('to', [None])[0]
+        last = int_param(query, 'last', None, 1, 1_000_000)
+
+        rollups = load_cached(ROLLUPS_FILE, Rollups.load)
+        keys = query['key'] if 'key' in query else rollups.keys(dimension)
+        self.send_json({
+            "dimension": dimension,
+            "resolution": resolution,
+            "series": {k: rollups.query(dimension, k, resolution, start, end, last) for k in keys},
+        })
+
+    def api_momentum(self, query):
+        dimension = query.get('dimension', ['industry'])[0]
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"dimension must be one of {DIMENSIONS}")
+
+        stats = load_cached(MOMENTUM_FILE, MomentumStats.load)
+        keys = query['key'] if 'key' in query else stats.keys(dimension)
+        self.send_json({
+            "dimension": dimension,
+            "applied_through": stats.applied_through,
+            "stats": {k: stats.get(dimension, k) for k in keys},
+        })
+
+    def api_thread(self, query):
+        event_id = query.get('id', [None])[0]
+        if not event_id:
+            raise ValueError("Specify ?id=<event_id>")
+        info = load_cached(STORY_THREADS_FILE, StoryThreads.load).thread(event_id)
+        if info is None:
+            # Threads that stopped developing live in the archive
+            timeline = load_cached(archive_path(STORY_THREADS_FILE), load_archive).get(event_id)
+            info = describe(timeline) if timeline else None
+        if info is None:
+            self.send_json({"error": f"Unknown event {event_id}"}, 404)
+            return
+        self.send_json(info)
+
+    def api_similar(self, query):
+        text, event_id = query.get('text', [None])[0], query.get('id', [None])[0]
+        if not text and not event_id:
+            raise ValueError("Specify ?text=... or ?id=<event_id>")
+        k = int_param(query, 'k', 10, 1, MAX_SIMILAR)
+        try:
+            if not text:
+                event = EVENT_STORE.get_events([event_id]).get(event_id)
+                if event is None:
+                    self.send_json({"error": f"Unknown event {event_id}"}, 404)
+                    return
+                text = event.get('text', '')
+            searcher = load_cached(ANN_META_FILE, lambda p: AnnIndex(p.parent).searcher())
+            hits = searcher.search(embed(text), k, exclude=event_id)
+            events = EVENT_STORE.get_events([eid for eid, _ in hits])
+        except sqlite3.OperationalError as e:
+            self.send_json({"error": f"Event store unavailable: {e}"}, 503)
+            return
+        self.send_json({
+            "query": text,
+            "indexed": searcher.count,
+            "results": [{"id": eid, "similarity": sim, **events.get(eid, {})} for eid, sim in hits],
+        })
+
+    def api_search(self, query):
+        text = query.get('q', [''])[0]
+        if not text.strip():
+            raise ValueError("Specify ?q=...")
+        limit = int_param(query, 'limit', 20, 1, MAX_SEARCH_RESULTS)
+        offset = int_param(query, 'offset', 0, 0, MAX_SEARCH_OFFSET)
+        bounds = {}
+        for name in ('since', 'until'):
+            value = query.get(name, [None])[0]
+            bounds[name] = parse_time(value)
+            if value and bounds[name] is None:
+                raise ValueError(f"{name} must be an ISO-8601 time")
+        filters = {f: query.get(f, [None])[0] for f in FILTER_FIELDS}
+
+        reader = load_cached(SEARCH_META_FILE, lambda p: SearchIndex(p.parent).reader())
+        found = reader.search(text, filters, bounds['since'], bounds['until'], limit, offset)
+        try:
+            events = EVENT_STORE.get_events([eid for eid, _, _ in found['results']])
+        except sqlite3.OperationalError as e:
+            self.send_json({"error": f"Event store unavailable: {e}"}, 503)
+            return
+        self.send_json({
+            "query": text,
+            "indexed": reader.docs,
+            "total": found['total'],
+            "truncated": found['truncated'],
+            "results": [{"id": eid, "score": score, **events.get(eid, {})} for eid, score, _ in found['results']],
+        })
+
     def translate_path(self, path):
         """Override to serve UI and outputs correctly"""
         # Remove query string
         path = path.split('?', 1)[0]
         path = path.split('#', 1)[0]
         
-        # Serve output JSON files
+        # Serve output JSON files (plain names resolve to the current generation)
         if path.startswith('/output/'):
+            name = path[len('/output/'):]
+            if name and '/' not in name:
+                return str(output_file(name))
             return os.path.join(str(BASE_DIR), path.lstrip('/'))
         
         # Serve history JSONL files
@@ -53,11 +802,32 @@ class EvolveXHandler(SimpleHTTPRequestHandler):
         # Serve index.html for root and all other routes (SPA)
         return str(BASE_DIR / 'ui' / 'dist' / 'index.html')
 
+class EvolveXServer(ThreadingHTTPServer):
+    """Threaded server whose handlers may detach a connection (kept open after the handler returns)."""
+
+    # socketserver's default listen backlog of 5 resets connections in bursts
+    request_queue_size = 128
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._detached = set()
+
+    def detach(self, request):
+        self._detached.add(request)
+
+    def shutdown_request(self, request):
+        if request in self._detached:
+            self._detached.discard(request)
+            return
+        super().shutdown_request(request)
+
 if __name__ == '__main__':
     port = 8000
     print(f"🚀 EvolveX Server starting on http://0.0.0.0:{port}")
     print(f"   UI: http://localhost:{port}/")
     print(f"   API: http://localhost:{port}/output/")
     
-    httpd = HTTPServer(('0.0.0.0', port), EvolveXHandler)
+    BROADCASTER.start()
+    SCORING.start()
+    httpd = EvolveXServer(('0.0.0.0', port), EvolveXHandler)
     httpd.serve_forever()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Check ANN search (flat and IVF) against a brute-force scan, plus id dedupe and replayed snapshots"""
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+from engine.ann_index import DIM, HORIZON_DAYS, AnnIndex, embed, np
+
+START = datetime(2025, 12, 1)
+VOCABULARY = ("tea auction prices colombo port fuel cut rupee dollar cyclone ditwah floods death toll "
+              "central bank rates tourism arrivals apparel exports parliament budget power strike").split()
+
+
+def make_snapshots(n: int, per_run: int = 30, seed: int = 7):
+    rng = random.Random(seed)
+    snapshots = []
+    for i in range(n):
+        at = START + timedelta(hours=i)
+        events = [{"id": f"e{i}-{j}", "source": "rss", "text": " ".join(rng.sample(VOCABULARY, rng.randint(3, 7)))}
+                  for j in range(per_run)]
+        events.append({"id": f"w{i}", "source": "weather", "text": "Colombo 29C light rain"})
+        snapshots.append({"snapshot_id": f"s{i}", "run_timestamp": at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                          "events": events})
+    return snapshots
+
+
+def brute_force(snapshots, vec, k):
+    texts = {e["id"]: e["text"] for s in snapshots for e in s["events"] if e["source"] != "weather"}
+    sims = {eid: sum(a * b for a, b in zip(embed(text), vec)) for eid, text in texts.items()}
+    return sorted(sims.items(), key=lambda s: -s[1])[:k], sims
+
+
+def assert_matches(found, expected, sims):
+    # Equal similarities may come back in either order, so compare scores and check each id's own score
+    assert [s for _, s in found] == [round(s, 4) for _, s in expected]
+    assert all(abs(sims[eid] - sim) < 1e-4 for eid, sim in found)
+    assert len({eid for eid, _ in found}) == len(found)
+
+
+def test_flat_search_matches_brute_force(tmp_path: Path):
+    snapshots = make_snapshots(12)
+    index = AnnIndex(tmp_path / "ann")
+    assert index.append_many(snapshots[:6]) == 6
+    assert AnnIndex(tmp_path / "ann").append_many(snapshots) == 6  # replayed runs are skipped
+    assert AnnIndex(tmp_path / "ann").append_many(snapshots) == 0
+    index = AnnIndex(tmp_path / "ann")
+    assert len(index) == 12 * 30 and not index.trained
+
+    searcher = index.searcher()
+    for query in ("fuel price cut", "cyclone ditwah death toll", "central bank rates rupee"):
+        vec = embed(query)
+        expected, sims = brute_force(snapshots, vec, 10)
+        assert_matches(searcher.search(vec, 10), expected, sims)
+    top = searcher.search(vec, 1)[0][0]
+    assert top not in dict(searcher.search(vec, 5, exclude=top))
+
+
+def test_reappearing_events_are_embedded_once(tmp_path: Path):
+    snapshots = make_snapshots(3)
+    index = AnnIndex(tmp_path / "ann")
+    index.append_many(snapshots[:2])
+    # The next run re-emits the previous run's events alongside its own
+    repeat = dict(snapshots[2], events=snapshots[1]["events"] + snapshots[2]["events"])
+    assert index.append(repeat) and len(index) == 3 * 30
+
+    # After the horizon the ids have been forgotten and are embedded again
+    later = START + timedelta(days=HORIZON_DAYS, hours=3)
+    again = dict(snapshots[0], snapshot_id="s-later", run_timestamp=later.strftime("%Y-%m-%dT%H:%M:%SZ"))
+    assert index.append(again) and len(index) == 4 * 30
+    assert all(not eid.startswith("e2-") for eid in index.meta["recent"])
+    # ...but search still returns each event once
+    text = snapshots[0]["events"][0]["text"]
+    found = index.searcher().search(embed(text), 60)
+    assert len({eid for eid, _ in found}) == len(found) and found[0][1] > 0.99
+
+
+def test_ivf_search(tmp_path: Path):
+    if np is None:
+        import pytest
+        pytest.skip("numpy is not installed")
+    snapshots = make_snapshots(20)
+    index = AnnIndex(tmp_path / "ann")
+    index.append_many(snapshots[:16])
+    index.train(nlist=8)
+    assert index.trained and index.meta["nlist"] == 8
+    # Vectors appended after training are assigned to their nearest centroid
+    index.append_many(snapshots)
+    count = len(index)
+    vectors = np.fromfile(index.path("vectors.f32"), dtype="<f4").reshape(count, DIM)
+    centroids = np.fromfile(index.path(index.meta["centroids"]), dtype="<f4").reshape(8, DIM)
+    lists = np.fromfile(index.path(index.meta["lists"]), dtype="<i4")
+    assert (lists == np.argmax(vectors @ centroids.T, axis=1)).all()
+
+    searcher = AnnIndex(tmp_path / "ann").searcher()
+    hits = total = 0
+    for query in ("fuel price cut", "cyclone ditwah death toll", "tourism arrivals budget"):
+        vec = embed(query)
+        expected, sims = brute_force(snapshots, vec, 10)
+        # Probing every list is an exact search
+        assert_matches(searcher.search(vec, 10, nprobe=8), expected, sims)
+        found = searcher.search(vec, 10, nprobe=2)
+        assert all(abs(sims[eid] - sim) < 1e-4 for eid, sim in found)
+        hits += len({eid for eid, _ in found} & {eid for eid, _ in expected})
+        total += len(expected)
+    assert hits >= 0.5 * total
+
+    # Retraining writes a new lists/centroids pair and removes the old one only after meta.json names it
+    old = {index.meta["lists"], index.meta["centroids"]}
+    index.train(nlist=4)
+    current = AnnIndex(tmp_path / "ann")
+    assert current.meta["nlist"] == 4 and not old & {current.meta["lists"], current.meta["centroids"]}
+    assert sorted(p.name for p in (tmp_path / "ann").glob("[lc]*")) == sorted([current.meta["centroids"],
+                                                                                current.meta["lists"]])
+    # ...and a searcher opened before the retrain keeps answering from its own pair
+    vec = embed("fuel price cut")
+    expected, sims = brute_force(snapshots, vec, 10)
+    assert_matches(searcher.search(vec, 10, nprobe=8), expected, sims)
+    assert_matches(current.searcher().search(vec, 10, nprobe=4), expected, sims)
+
+
+if __name__ == "__main__":
+    tests = [test_flat_search_matches_brute_force, test_reappearing_events_are_embedded_once]
+    if np is not None:
+        tests.append(test_ivf_search)
+    for test in tests:
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print(f"[OK] ann index (numpy: {np is not None})")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Offline test of canonical URL dedup against the recorded fixtures in fixtures/canonical_urls/"""
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+import pipeline
+from engine.canonical_urls import HORIZON_DAYS, CanonicalUrlIndex, canonicalize_url, item_url
+from engine.event_store import EventStore
+
+FIXTURES = ROOT / "fixtures" / "canonical_urls"
+
+
+def load_cases():
+    with (FIXTURES / "items.json").open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class CheckedCache(set):
+    """Text-hash cache that records lookups: items skipped by URL never reach it."""
+
+    def __init__(self, hashes):
+        super().__init__(hashes)
+        self.checked = []
+
+    def __contains__(self, text_hash):
+        self.checked.append(text_hash)
+        return super().__contains__(text_hash)
+
+
+def run_cases(cases, cache, index):
+    """process_news_list on each fixture item in turn; True where the item was skipped as a known URL."""
+    skipped = []
+    for case in cases:
+        before = len(cache.checked)
+        assert pipeline.process_news_list([case["item"]], case["source"], cache, index) == []
+        skipped.append(len(cache.checked) == before)
+    return skipped
+
+
+def test_canonical_forms():
+    for case in load_cases():
+        got = canonicalize_url(item_url(case["item"]))
+        assert got == case["canonical"], f"{case['case']}: {got} != {case['canonical']}"
+
+
+def test_dedup_in_process_news_list(tmp_path: Path):
+    cases = load_cases()
+    # Every headline is already in the text cache, so no item reaches the models
+    cache = CheckedCache(pipeline.get_text_hash(pipeline.extract_text_from_item(c["item"])) for c in cases)
+    store, pipeline.EVENT_STORE = pipeline.EVENT_STORE, EventStore(tmp_path / "events.db")
+    try:
+        index = CanonicalUrlIndex.load(tmp_path / "canonical_url_index.json")
+        assert run_cases(cases, cache, index) == [c["duplicate"] for c in cases]
+        index.save()
+
+        # The mapping persists across runs: a second pass skips every usable link
+        reloaded = CanonicalUrlIndex.load(tmp_path / "canonical_url_index.json")
+        assert len(reloaded) == len({c["canonical"] for c in cases if c["canonical"]})
+        assert run_cases(cases, cache, reloaded) == [bool(c["canonical"]) for c in cases]
+    finally:
+        pipeline.EVENT_STORE = store
+
+
+def test_old_entries_expire(tmp_path: Path):
+    index = CanonicalUrlIndex(tmp_path / "canonical_url_index.json")
+    now = time.time()
+    for days, url in ((HORIZON_DAYS + 1, "https://a.lk/old"), (HORIZON_DAYS - 1, "https://a.lk/recent")):
+        seen = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now - days * 86400))
+        index.add(url, "rss", None, seen)
+    index.save()
+
+    reloaded = CanonicalUrlIndex.load(tmp_path / "canonical_url_index.json")
+    assert reloaded.prune(now) == 1
+    assert "https://a.lk/old" not in reloaded and "https://a.lk/recent" in reloaded
+    reloaded.save()
+    assert len(CanonicalUrlIndex.load(tmp_path / "canonical_url_index.json")) == 1
+
+
+if __name__ == "__main__":
+    test_canonical_forms()
+    for test in (test_dedup_in_process_news_list, test_old_entries_expire):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("[OK] canonical URL fixtures")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Check /api/changes deltas: folded change-log entries reproduce the window diff between snapshots"""
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+import pipeline
+from engine.event_window import ADDED, REMOVED, UPDATED, ChangeLog, fold_change
+
+
+def simulate_runs(rng, runs: int):
+    """Yield (state, changes) per run; state maps event id -> version, changes are folded per run."""
+    state, next_id = {}, 0
+    for _ in range(runs):
+        changes = {}
+        for _ in range(rng.randint(0, 6)):
+            action = rng.random()
+            if action < 0.4 or not state:
+                # New id, or an id that was removed earlier coming back
+                event_id = f"e{rng.randrange(next_id + 1)}"
+                next_id += 1
+                if event_id in state:
+                    continue
+                state[event_id] = rng.random()
+                fold_change(changes, event_id, ADDED)
+            elif action < 0.7:
+                event_id = rng.choice(sorted(state))
+                del state[event_id]
+                fold_change(changes, event_id, REMOVED)
+            else:
+                # Re-insert with a new body: the window removes then adds it
+                event_id = rng.choice(sorted(state))
+                state[event_id] = rng.random()
+                fold_change(changes, event_id, REMOVED)
+                fold_change(changes, event_id, ADDED)
+        yield dict(state), changes
+
+
+def diff(before, after):
+    changes = {i: ADDED for i in after.keys() - before.keys()}
+    changes.update({i: REMOVED for i in before.keys() - after.keys()})
+    changes.update({i: UPDATED for i in before.keys() & after.keys() if before[i] != after[i]})
+    return changes
+
+
+def test_since_equals_state_diff(tmp_path: Path):
+    rng = random.Random(5)
+    log = ChangeLog(tmp_path / "window_changes.jsonl")
+    states = []
+    for run, (state, changes) in enumerate(simulate_runs(rng, 60)):
+        log.append(f"s{run}", f"2025-12-01T{run % 24:02d}:00:00Z", changes)
+        states.append(state)
+
+    reloaded = ChangeLog.load(tmp_path / "window_changes.jsonl")
+    assert reloaded.entries == log.entries and reloaded.latest() == "s59"
+    for i in range(len(states)):
+        assert reloaded.since(f"s{i}") == diff(states[i], states[-1]), i
+    assert reloaded.since("s10", until="s20") == diff(states[10], states[20])
+    assert reloaded.since("s59") == {}
+    assert reloaded.since("unknown") is None
+
+
+def test_log_is_bounded(tmp_path: Path):
+    log = ChangeLog(tmp_path / "window_changes.jsonl", max_entries=5)
+    for run in range(12):
+        log.append(f"s{run}", "2025-12-01T00:00:00Z", {f"e{run}": ADDED})
+    reloaded = ChangeLog.load(tmp_path / "window_changes.jsonl", max_entries=5)
+    assert [e["snapshot_id"] for e in reloaded.entries] == [f"s{i}" for i in range(7, 12)]
+    # Expired snapshots get a full reset from the server
+    assert reloaded.since("s3") is None
+    assert reloaded.since("s7") == {f"e{i}": ADDED for i in range(8, 12)}
+
+
+def test_event_ids_are_stable():
+    text_hash = pipeline.get_text_hash("Tea exports rise on strong auction prices")
+    first = pipeline.make_event_id("rss", text_hash)
+    assert first == pipeline.make_event_id("rss", pipeline.get_text_hash("Tea exports rise on strong auction prices"))
+    assert first != pipeline.make_event_id("gdelt", text_hash)
+    assert len(first) == 20
+
+
+if __name__ == "__main__":
+    for test in (test_since_equals_state_diff, test_log_is_bounded):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    test_event_ids_are_stable()
+    print("[OK] change log")
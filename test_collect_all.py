@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Test of collect_all with stand-in collector modules (no network)"""
+import json
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+import collect_all
+
+DELAY = 0.3
+
+
+def _module(name: str, collect):
+    module = types.ModuleType(name)
+    module.collect = collect
+    sys.modules[name] = module
+    return name
+
+
+def _slow(items):
+    def collect():
+        time.sleep(DELAY)
+        return items
+    return collect
+
+
+def _broken():
+    raise RuntimeError("feed unreachable")
+
+
+def test_collectors_run_concurrently_and_fail_independently(tmp_path: Path):
+    collectors = {
+        "a": (_module("_fake_collector_a", _slow([{"title": "one"}, {"title": "two"}])), tmp_path / "a.json"),
+        "b": (_module("_fake_collector_b", _slow([{"title": "three"}])), tmp_path / "b.json"),
+        "c": (_module("_fake_collector_c", _slow([])), tmp_path / "c.json"),
+        "broken": (_module("_fake_collector_broken", _broken), tmp_path / "broken.json"),
+    }
+    saved = dict(collect_all.COLLECTORS)
+    collect_all.COLLECTORS.clear()
+    collect_all.COLLECTORS.update(collectors)
+    try:
+        start = time.perf_counter()
+        results = {r["source"]: r for r in collect_all.collect_all()}
+        wall = time.perf_counter() - start
+        # Wall time is that of the slowest source, not the sum
+        assert wall < 2 * DELAY, wall
+        assert results["a"]["ok"] and results["a"]["count"] == 2
+        assert json.loads((tmp_path / "a.json").read_text(encoding="utf-8")) == [{"title": "one"}, {"title": "two"}]
+        assert results["c"]["ok"] and results["c"]["count"] == 0
+        assert not results["broken"]["ok"] and "feed unreachable" in results["broken"]["error"]
+        assert not (tmp_path / "broken.json").exists()
+
+        # Re-running rewrites the same files atomically and leaves no temp files behind
+        first = (tmp_path / "b.json").read_bytes()
+        collect_all.collect_all(["b"])
+        assert (tmp_path / "b.json").read_bytes() == first
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["a.json", "b.json", "c.json"]
+    finally:
+        collect_all.COLLECTORS.clear()
+        collect_all.COLLECTORS.update(saved)
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        test_collectors_run_concurrently_and_fail_independently(Path(tmp))
+    print("[OK] collect_all")
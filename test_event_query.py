@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Offline test of the event query index: filters, keyset pagination and malformed values"""
+import http.client
+import json
+import random
+import sys
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+import server
+from engine.event_query import build_event_index, parse_time, run_query
+
+INDUSTRIES = ["Tea", "Tourism & Hospitality", "Construction"]
+KINDS = ["Opportunity", "Threat", "Neutral"]
+
+
+def make_events(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    events = []
+    for i in range(n):
+        events.append({
+            "id": f"e{i:03d}",
+            # Few distinct hours, so many rows tie on the sort key
+            "timestamp": f"2025-12-01T{rng.randrange(6):02d}:00:00Z",
+            "source": rng.choice(["rss", "gdelt"]),
+            "thematic_category": rng.choice(["Economy", "Disaster"]),
+            "opportunity_score": rng.choice([round(rng.uniform(-1, 1), 2), None]),
+            "impacts": [{"industry": ind, "impact_type": rng.choice(KINDS)} for ind in rng.sample(INDUSTRIES, 2)],
+        })
+    return events
+
+
+def pages(index, params):
+    cursor, seen = None, []
+    while True:
+        query = dict(params, **({"cursor": [cursor]} if cursor else {}))
+        page = run_query(index, query, ("industry", "impact_type", "category", "source"))
+        seen.extend(e["id"] for e in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return seen, page["total"]
+
+
+def expected_order(events, key, descending):
+    def sort_key(e):
+        value = key(e)
+        return (-1e18 if value is None else value, e["id"])
+    return [e["id"] for e in sorted(events, key=sort_key, reverse=descending)]
+
+
+def test_keyset_pages_match_full_sort():
+    events = make_events(120)
+    index = build_event_index(events)
+    for order in ("desc", "asc"):
+        ids, total = pages(index, {"limit": ["7"], "order": [order]})
+        assert total == 120
+        assert ids == expected_order(events, lambda e: parse_time(e["timestamp"]), order == "desc")
+
+        ids, _ = pages(index, {"limit": ["5"], "order": [order], "sort": ["score"], "min_score": ["-0.5"]})
+        wanted = [e for e in events if e["opportunity_score"] is not None and e["opportunity_score"] >= -0.5]
+        assert ids == expected_order(wanted, lambda e: e["opportunity_score"], order == "desc")
+
+
+def test_term_filters_hold_for_one_impact():
+    events = make_events(80)
+    index = build_event_index(events)
+    ids, total = pages(index, {"industry": ["Tea"], "impact_type": ["Threat"], "source": ["rss,gdelt"], "limit": ["9"]})
+    wanted = {e["id"] for e in events
+              if any(i["industry"] == "Tea" and i["impact_type"] == "Threat" for i in e["impacts"])}
+    assert set(ids) == wanted and total == len(wanted) == len(ids)
+
+
+def test_malformed_values_sort_as_missing():
+    events = [
+        {"id": "a", "timestamp": "2025-12-01T00:00:00Z", "opportunity_score": 0.5},
+        {"id": "b", "timestamp": "not a time", "opportunity_score": "n/a"},
+        {"id": "c", "timestamp": "2025-12-01T01:00:00Z", "opportunity_score": float("nan")},
+        {"id": "d", "timestamp": None, "opportunity_score": "0.25"},
+    ]
+    index = build_event_index(events)
+    page = index.query(sort="score")
+    assert [e["id"] for e in page["items"]] == ["a", "d", "c", "b"]
+    assert {e["id"] for e in index.query(ranges={"score": (0.0, None)})["items"]} == {"a", "d"}
+
+    # An empty window still answers queries on every field
+    empty = build_event_index([])
+    assert empty.query(sort="score")["items"] == []
+
+
+def test_bad_cursor_is_rejected():
+    index = build_event_index(make_events(3))
+    try:
+        index.query(cursor="!!not-a-cursor")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("invalid cursor accepted")
+
+
+def test_non_finite_numbers_are_rejected():
+    index = build_event_index(make_events(3))
+    for params in ({"limit": ["inf"]}, {"hours": ["nan"]}, {"min_score": ["-inf"]}, {"limit": ["ten"]}):
+        try:
+            run_query(index, params, ("source",))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{params} accepted")
+
+
+class BrokenStore:
+    def entries(self):
+        raise OSError("segment directory vanished")
+
+
+def get(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", path)
+    response = conn.getresponse()
+    status, payload = response.status, json.loads(response.read())
+    conn.close()
+    return status, payload
+
+
+def test_api_errors_get_a_response():
+    httpd = server.EvolveXServer(("127.0.0.1", 0), server.EvolveXHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    port = httpd.server_address[1]
+    original = server.HISTORY_STORE
+    try:
+        for path in ("/api/events?limit=inf", "/api/trend?days=nan", "/api/trend?days=inf",
+                     "/api/similar?text=tea&k=1e9", "/api/search?q=tea&offset=-1", "/api/timeseries?last=x"):
+            status, payload = get(port, path)
+            assert status == 400 and payload["error"], path
+        # Unexpected failures still answer, with a 500
+        server.HISTORY_STORE = BrokenStore()
+        assert get(port, "/api/history/index") == (500, {"error": "Internal server error"})
+    finally:
+        server.HISTORY_STORE = original
+        httpd.shutdown()
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    test_keyset_pages_match_full_sort()
+    test_term_filters_hold_for_one_impact()
+    test_malformed_values_sort_as_missing()
+    test_bad_cursor_is_rejected()
+    test_non_finite_numbers_are_rejected()
+    test_api_errors_get_a_response()
+    print("[OK] event query")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Offline test of the SQLite event store: snapshots, impacts, trends and the classification cache"""
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+from engine.event_query import parse_time
+from engine.event_store import EventStore
+
+NOW = parse_time("2025-12-03T12:00:00Z")
+
+
+def make_event(event_id: str, ts: str, score: float, industries, source="rss", category="Economy"):
+    return {"id": event_id, "timestamp": ts, "source": source, "thematic_category": category,
+            "opportunity_score": score, "text": f"headline {event_id}",
+            "impacts": [{"industry": ind, "score": round(score * 0.5, 4),
+                         "impact_type": "Opportunity" if score > 0.05 else "Threat" if score < -0.05 else "Neutral",
+                         "relevance": 0.5} for ind in industries]}
+
+
+def test_snapshots_and_trends(tmp_path: Path):
+    store = EventStore(tmp_path / "events.db")
+    first = {"snapshot_id": "s1", "run_timestamp": "2025-12-01T00:00:00Z", "overall_score": 0.1, "events": [
+        make_event("a", "2025-12-01T00:00:00Z", 0.4, ["Tea", "Construction"]),
+        make_event("w", "2025-12-01T00:00:00Z", -0.2, ["Construction"], source="weather", category="Weather"),
+    ]}
+    second = {"snapshot_id": "s2", "run_timestamp": "2025-12-02T00:00:00Z", "overall_score": 0.0, "events": [
+        # A new weather reading updates the same event and replaces its impacts
+        make_event("w", "2025-12-02T00:00:00Z", -0.6, ["Tea"], source="weather", category="Weather"),
+        make_event("b", "2025-12-02T00:00:00Z", 0.0, ["Tea"]),
+    ]}
+    assert store.add_snapshot(first) and store.add_snapshot(second)
+    assert not store.add_snapshot(first)  # idempotent
+    assert len(store) == 3
+
+    assert store.get_events(["w", "missing"]) == {"w": second["events"][0]}
+    assert {e["id"] for e in store.snapshot_events("s1")} == {"a", "w"}
+    assert [e["id"] for _, e in store.events_seen_since(parse_time("2025-12-02T00:00:00Z"))] == ["w", "b"]
+
+    construction = store.trend(industry="Construction", days=5, now=NOW)
+    assert construction == [{"day": "2025-12-01", "count": 1, "mean_score": 0.2, "mean_risk": 0.0,
+                             "threats": 0, "opportunities": 1}]
+    tea = store.trend(industry="Tea", days=5, now=NOW)
+    assert [(p["day"], p["count"], p["threats"]) for p in tea] == [("2025-12-01", 1, 0), ("2025-12-02", 2, 1)]
+    weather = store.trend(category="Weather", days=5, now=NOW)
+    assert weather == [{"day": "2025-12-02", "count": 1, "mean_score": -0.6, "mean_risk": 0.6,
+                        "threats": 1, "opportunities": 0}]
+    assert store.trend(source="rss", days=1, now=NOW) == []
+
+
+def test_classification_writes_commit_immediately(tmp_path: Path):
+    store = EventStore(tmp_path / "events.db")
+    cache = store.classifications()
+    cache.update({"h0": {"thematic_category": "Economy", "industry_labels": ["Tea"], "industry_scores": [0.9]}})
+    reader = EventStore(tmp_path / "events.db", read_only=True)
+    seen = []
+
+    for i in range(1, 4):
+        cache[f"h{i}"] = {"thematic_category": "Politics", "industry_labels": ["Tea", "Construction"],
+                          "industry_scores": [0.5, 0.25]}
+        # No write transaction is left open between inserts
+        assert not store.conn.in_transaction
+        # Another thread (the server) sees each insert straight away
+        t = threading.Thread(target=lambda: seen.append(reader.classifications().get(f"h{i}")))
+        t.start()
+        t.join()
+
+    assert all(r is not None and r["industry_scores"] == [0.5, 0.25] for r in seen)
+    assert len(cache) == 4 and "h0" in cache and "nope" not in cache
+    assert cache["h0"]["industry_labels"] == ["Tea"]
+    try:
+        cache["nope"]
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("missing hash returned a record")
+
+
+if __name__ == "__main__":
+    for test in (test_snapshots_and_trends, test_classification_writes_commit_immediately):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("[OK] event store")
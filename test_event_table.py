@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Check that slotted EventRecords reproduce the published event dicts exactly"""
+import json
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+from engine.event_table import EventRecord, to_records
+
+INDUSTRIES = ["Tea", "Construction", "Tourism & Hospitality", "Apparel", "Other"]
+
+
+def random_event(rng, i):
+    impacts = [{"industry": ind, "score": round(rng.uniform(-1, 1), 4),
+                "impact_type": rng.choice(["Opportunity", "Threat", "Neutral"]), "relevance": round(rng.random(), 4)}
+               for ind in rng.sample(INDUSTRIES, rng.randint(0, 4))]
+    event = {"id": f"e{i}", "timestamp": "2025-12-01T00:00:00Z", "source": rng.choice(["rss", "gdelt", "weather"]),
+             "text": f"headline {i}", "thematic_category": rng.choice(["Economy", "Weather", ""]),
+             "opportunity_score": round(rng.uniform(-1, 1), 4), "opportunity_confidence": rng.choice([0.5, None]),
+             "impacts": impacts}
+    if event["source"] == "weather":
+        event["place"] = rng.choice(["Colombo", "Kandy"])
+        event["details"] = {"temperature": 29, "warnings": []}
+    # Older outputs: missing keys, other key orders, non-standard impact dicts
+    roll = rng.random()
+    if roll < 0.1:
+        del event["opportunity_confidence"]
+    elif roll < 0.2:
+        event = dict(reversed(list(event.items())))
+    elif roll < 0.3 and impacts:
+        impacts[0] = {"score": impacts[0]["score"], "industry": impacts[0]["industry"]}
+    elif roll < 0.35:
+        event["impacts"] = None
+    return event
+
+
+def test_round_trip_is_exact():
+    rng = random.Random(13)
+    events = [random_event(rng, i) for i in range(500)]
+    records = to_records(events)
+    for event, rec in zip(events, records):
+        # Same keys, same order, same values
+        assert json.dumps(rec.to_dict()) == json.dumps(event), event["id"]
+        for key in list(event) + ["missing_key"]:
+            assert rec.get(key, "default") == event.get(key, "default"), (event["id"], key)
+
+
+def test_top_industries_match_stable_sort():
+    rng = random.Random(17)
+    for i in range(200):
+        event = random_event(rng, i)
+        impacts = event.get("impacts") or []
+        if any(set(imp) != {"industry", "score", "impact_type", "relevance"} for imp in impacts):
+            continue
+        # Ties on |score| are common in real outputs
+        for imp in impacts:
+            imp["score"] = rng.choice([0.1, -0.1, 0.2, imp["score"]])
+        rec = EventRecord.from_dict(event)
+        expected = [imp["industry"] for imp in sorted(impacts, key=lambda imp: abs(imp["score"]), reverse=True)]
+        assert rec.top_industries(3) == expected[:3]
+        assert rec.industries() == [imp["industry"] for imp in impacts]
+        assert rec.impact_count() == len(impacts)
+
+
+if __name__ == "__main__":
+    test_round_trip_is_exact()
+    test_top_industries_match_stable_sort()
+    print("[OK] event table")
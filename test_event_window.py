@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Check the incrementally maintained event window against full recomputation"""
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+from engine.event_window import ADDED, REMOVED, UPDATED, EventWindow
+
+KINDS = ("big", "positive")
+HOUR = 3600.0
+
+
+def classify(rec):
+    # Coarse keys so ties are frequent
+    return {"big": round(abs(rec.score), 1), "positive": rec.score if rec.score > 0 else None}
+
+
+def render(kind, rec):
+    return {"id": rec.id, "kind": kind, "score": rec.score}
+
+
+def key_fn(rec):
+    # Weather-like identity: one entry per place
+    return rec.get("place") or rec.id
+
+
+def make_window(path):
+    return EventWindow.load(path, classify, render, KINDS, key_fn, window_hours=6)
+
+
+def expected_rows(window, kind):
+    """Full recomputation: stable sort of the live entries (in insertion order) by key, descending."""
+    live = [e for e in window.entries.values() if e.sort_keys[kind] is not None]
+    live.sort(key=lambda e: e.sort_keys[kind], reverse=True)
+    return [render(kind, e.record) for e in live]
+
+
+def random_event(rng, i):
+    event = {"id": f"e{i}", "timestamp": "2025-12-01T00:00:00Z", "source": "news", "text": f"headline {i}",
+             "thematic_category": "Economy", "opportunity_score": round(rng.uniform(-1, 1), 1),
+             "impacts": [{"industry": "Tea", "score": 0.1, "impact_type": "Neutral", "relevance": 0.5}]}
+    if rng.random() < 0.2:
+        event["place"] = rng.choice(["Colombo", "Kandy", "Galle"])
+    return event
+
+
+def test_incremental_rows_match_full_sort(tmp_path: Path):
+    rng = random.Random(11)
+    path = tmp_path / "event_window.json"
+    window = make_window(path)
+    now, i = 1_700_000_000.0, 0
+    for run in range(40):
+        now += HOUR
+        for _ in range(rng.randint(0, 8)):
+            window.insert(random_event(rng, i), now)
+            i += 1
+        window.evict_expired(now)
+        assert all(e.inserted_at >= now - 6 * HOUR for e in window.entries.values())
+        for kind in KINDS:
+            assert window.rows(kind) == expected_rows(window, kind), (run, kind)
+        assert abs(window.mean_score() * len(window) - sum(e.record.score for e in window.entries.values())) < 1e-9
+        if run % 7 == 0:
+            # Save / load keeps entries, order and the published event form
+            window.save()
+            reloaded = make_window(path)
+            for kind in KINDS:
+                assert reloaded.rows(kind) == window.rows(kind)
+            assert reloaded.events() == window.events()
+            window = reloaded
+
+
+def test_replacement_and_changes():
+    window = EventWindow(Path("unused.json"), classify, render, KINDS, key_fn)
+    window.insert({"id": "w1", "place": "Colombo", "opportunity_score": 0.2}, 1.0)
+    window.insert({"id": "n1", "opportunity_score": -0.5}, 1.0)
+    window.drain_changes()
+    # A new reading for the same place replaces the old entry
+    window.insert({"id": "w2", "place": "Colombo", "opportunity_score": 0.4}, 2.0)
+    assert len(window) == 2
+    assert [r["id"] for r in window.rows("positive")] == ["w2"]
+    assert window.drain_changes() == {"w1": REMOVED, "w2": ADDED}
+    # Re-inserting an identical event is reported as an update, not a new event
+    window.insert({"id": "n1", "opportunity_score": -0.5}, 3.0)
+    assert window.drain_changes() == {"n1": UPDATED}
+    assert len(window) == 2
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        test_incremental_rows_match_full_sort(Path(tmp))
+    test_replacement_and_changes()
+    print("[OK] event window")
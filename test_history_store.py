@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Offline test of the segmented history store: seek reads, body dedup and maintenance"""
+import gzip
+import json
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+from engine.history_store import HistoryStore
+
+
+def make_snapshot(hour: int, day: int = 1, events=None):
+    ts = f"2025-12-{day:02d}T{hour:02d}:00:00Z"
+    if events is None:
+        events = [
+            {"id": f"w-{day}-{hour}", "timestamp": ts, "category": "weather", "title": "Colombo weather", "sentiment": 0.0},
+            {"id": f"n-{day}-{hour}", "timestamp": ts, "category": "news", "title": f"Story {day}/{hour}", "sentiment": 0.1 * hour},
+        ]
+    return {"snapshot_id": f"snap-{day}-{hour}", "run_timestamp": ts, "events_count": len(events), "events": events}
+
+
+def test_seek_reads(tmp_path: Path):
+    store = HistoryStore(tmp_path / "history")
+    written = [make_snapshot(h, d) for d in (1, 2) for h in range(0, 24, 6)]
+    for snapshot in written:
+        store.append(snapshot)
+
+    assert len(store) == len(written)
+    assert store.last(2) == written[-2:]
+    assert store.last(0) == []
+    assert store.between("2025-12-02") == written[4:]
+    # Date-only end bound covers the whole day
+    assert store.between("2025-12-01T06", "2025-12-01") == written[1:4]
+    assert store.get("snap-2-12") == written[6]
+    assert store.get("missing") is None
+
+    # A second reader sees records appended after it first loaded the index
+    reader = HistoryStore(tmp_path / "history")
+    assert len(reader) == len(written)
+    extra = make_snapshot(0, 3)
+    store.append(extra)
+    assert reader.last(1) == [extra]
+    assert [s["snapshot_id"] for s in reader.read_many(reader.last_entries(3))] == ["snap-2-12", "snap-2-18", "snap-3-0"]
+
+
+def test_bodies_stored_once(tmp_path: Path):
+    store = HistoryStore(tmp_path / "history")
+    first = make_snapshot(0)
+    second = make_snapshot(1)
+    # Same weather body, different per-run id/timestamp
+    second["events"][0] = dict(first["events"][0], id="w-again", timestamp=second["run_timestamp"])
+    e1 = store.append(first)
+    e2 = store.append(second)
+    assert e1["new_bodies"] == 2
+    assert e2["new_bodies"] == 1
+    assert store.get("snap-1-1") == second
+
+    # Snapshot records hold references only
+    raw = store.read_record(e2)
+    assert "events" not in raw and len(raw["refs"]) == 2
+    with open(store.segments_dir / e2["segment"], "rb") as f:
+        f.seek(e2["offset"])
+        assert json.loads(gzip.decompress(f.read(e2["length"]))) == raw
+
+
+def test_compact_swaps_in_new_store(tmp_path: Path):
+    root = tmp_path / "history"
+    store = HistoryStore(root)
+    written = [make_snapshot(h) for h in range(4)]
+    for snapshot in written:
+        store.append(snapshot)
+    # A reader opened before compaction follows CURRENT on its next refresh
+    reader = HistoryStore(root)
+    assert len(reader) == 4
+
+    stats = store.compact()
+    assert stats["snapshots"] == 4
+    live = (root / "CURRENT").read_text(encoding="utf-8").strip()
+    assert store.data_dir == root / live
+    assert not (root / "index.jsonl").exists() and not (root / "segments").exists()
+    assert store.last(4) == written
+    assert reader.last(4) == written
+
+    # Appends after the swap land in the live store; a second compaction replaces it again
+    extra = make_snapshot(5)
+    reader.append(extra)
+    assert store.last(1) == [extra]
+    store.compact()
+    assert not (root / live).exists()
+    assert HistoryStore(root).last(5) == written + [extra]
+
+
+def test_compaction_during_reads(tmp_path: Path):
+    root = tmp_path / "history"
+    store = HistoryStore(root)
+    written = [make_snapshot(h, d) for d in (1, 2) for h in range(0, 24, 4)]
+    for snapshot in written:
+        store.append(snapshot)
+    old_entries = store.entries()
+
+    # A compaction started mid-read waits for the reader instead of removing the store under it
+    reading = store.read_many(old_entries)
+    got = [next(reading) for _ in range(3)]
+    compactor = threading.Thread(target=HistoryStore(root).compact)
+    compactor.start()
+    compactor.join(0.3)
+    assert compactor.is_alive()
+    got += list(reading)
+    compactor.join(5)
+    assert not compactor.is_alive() and got == written
+    assert (root / "CURRENT").exists() and not (root / "segments").exists()
+
+    # Entries looked up before the compaction are re-resolved in the new store
+    assert list(store.read_many(old_entries[-3:])) == written[-3:]
+    assert HistoryStore(root).read(old_entries[0]) == written[0]
+
+
+def test_interrupted_compaction_leaves_old_store_live(tmp_path: Path):
+    root = tmp_path / "history"
+    store = HistoryStore(root)
+    store.append(make_snapshot(0))
+    store.compact()
+    live = store.data_dir
+    # Simulate a crash after staging but before CURRENT was replaced
+    (root / "store-leftover" / "segments").mkdir(parents=True)
+    (root / "store-leftover" / "index.jsonl").write_text("{}\n", encoding="utf-8")
+    assert HistoryStore(root).data_dir == live
+    store.compact()
+    assert not (root / "store-leftover").exists()
+    assert [s["snapshot_id"] for s in HistoryStore(root).last(5)] == ["snap-1-0"]
+
+
+def test_migrate_keeps_empty_snapshots(tmp_path: Path):
+    empty_a = make_snapshot(0, events=[])
+    empty_b = make_snapshot(1, events=[])
+    full = make_snapshot(2)
+    legacy = tmp_path / "hourly_history.jsonl"
+    lines = [json.dumps(s) for s in (empty_a, empty_a, empty_b, full, full)]
+    legacy.write_text("\n".join(lines + ["not json"]) + "\n", encoding="utf-8")
+
+    store = HistoryStore(tmp_path / "history")
+    assert store.migrate_legacy(legacy) == 3
+    assert store.last(5) == [empty_a, empty_b, full]
+    # Re-running skips everything already imported
+    assert store.migrate_legacy(legacy) == 0
+
+
+def test_shared_store_across_threads(tmp_path: Path):
+    root = tmp_path / "history"
+    writer = HistoryStore(root)
+    shared = HistoryStore(root)  # like server.HISTORY_STORE
+    errors = []
+
+    def read_loop():
+        try:
+            for _ in range(200):
+                ids = [s["snapshot_id"] for s in shared.last(5)]
+                assert len(ids) == len(set(ids)), ids
+                assert ids == sorted(ids, key=lambda i: int(i.rsplit("-", 1)[1]))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read_loop) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for hour in range(24):
+        writer.append(make_snapshot(hour))
+    for t in threads:
+        t.join()
+    assert not errors, errors[0]
+    assert len(shared) == 24
+
+
+if __name__ == "__main__":
+    for test in (test_seek_reads, test_bodies_stored_once, test_compact_swaps_in_new_store,
+                 test_compaction_during_reads, test_interrupted_compaction_leaves_old_store_live,
+                 test_migrate_keeps_empty_snapshots, test_shared_store_across_threads):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("[OK] history store")
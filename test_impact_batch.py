@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Check the numpy impact batch against pipeline.build_impacts on random, boundary and ragged inputs"""
+import json
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+import pipeline
+from engine.impact_batch import NUMPY_AVAILABLE, build_impacts_batch
+
+INDUSTRIES = ["Tea", "Construction", "Tourism & Hospitality", "Apparel", "Rubber", "Fisheries", "IT & Telecommunications"]
+
+
+def require_numpy():
+    if not NUMPY_AVAILABLE:
+        import pytest
+        pytest.skip("numpy is not installed")
+
+
+def random_inputs(rng, n: int):
+    opp_scores, labels, relevances = [], [], []
+    for _ in range(n):
+        width = rng.randint(0, len(INDUSTRIES))
+        row_labels = rng.sample(INDUSTRIES, width)
+        kind = rng.random()
+        if kind < 0.3:
+            # Scores landing on a .5 boundary in the 5th decimal, where numpy and round() can disagree
+            opp = 1.0
+            row = [(rng.randrange(1000, 10000) + 0.5) / 1e4 for _ in row_labels]
+        elif kind < 0.45:
+            # Exactly on the relevance and impact-type thresholds
+            opp = rng.choice([0.5, -0.5, 1.0])
+            row = [rng.choice([pipeline.RELEVANCE_THRESHOLD, 0.1, 0.2, 0.10000001]) for _ in row_labels]
+        elif kind < 0.55:
+            # Ties on |score| keep label order
+            opp = rng.choice([0.4, -0.4])
+            row = [rng.choice([0.25, 0.5]) for _ in row_labels]
+        else:
+            opp = rng.uniform(-1, 1)
+            row = [rng.random() for _ in row_labels]
+        if rng.random() < 0.15:
+            # Ragged: the classifier returned more or fewer scores than labels
+            row = row[:-1] if row and rng.random() < 0.5 else row + [rng.random()]
+        opp_scores.append(opp)
+        labels.append(row_labels)
+        relevances.append(row)
+    return opp_scores, labels, relevances
+
+
+def test_batch_matches_build_impacts():
+    require_numpy()
+    rng = random.Random(23)
+    for _ in range(20):
+        opp_scores, labels, relevances = random_inputs(rng, rng.randint(1, 200))
+        batch = build_impacts_batch(opp_scores, labels, relevances,
+                                    pipeline.RELEVANCE_THRESHOLD, pipeline.IMPACT_TYPE_THRESHOLD)
+        for o, l, r, got in zip(opp_scores, labels, relevances, batch):
+            expected = pipeline.build_impacts(o, l, r)
+            if got is None:
+                # Only events without a relevant industry fall back to "Other"
+                assert [imp["industry"] for imp in expected] == ["Other"]
+                continue
+            assert json.dumps(got) == json.dumps(expected), (o, l, r)
+
+
+def test_build_impacts_many_matches_per_event():
+    require_numpy()
+    rng = random.Random(29)
+    for n in (0, 1, pipeline.MIN_VECTOR_BATCH, 300):
+        opp_scores, labels, relevances = random_inputs(rng, n)
+        expected = [pipeline.build_impacts(o, l, r) for o, l, r in zip(opp_scores, labels, relevances)]
+        assert json.dumps(pipeline.build_impacts_many(opp_scores, labels, relevances)) == json.dumps(expected)
+
+
+if __name__ == "__main__":
+    if not NUMPY_AVAILABLE:
+        print("[SKIP] numpy is not installed")
+        sys.exit(0)
+    test_batch_matches_build_impacts()
+    test_build_impacts_many_matches_per_event()
+    print("[OK] impact batch")
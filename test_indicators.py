@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Check the fused indicator builder against the original three-pass generators"""
+import json
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+import pipeline
+
+HEADLINES = [
+    "Fuel shortage hits Colombo port logistics",
+    "Parliament passes budget amid protests",
+    "Tea exports rise on strong auction prices",
+    "Cyclone warning issued for coastal districts",
+    "Power cut schedule announced for Tuesday",
+    "Local cricket team wins series",
+    "Central Bank holds policy rates steady",
+]
+
+
+def random_events(n: int, seed: int = 1):
+    rng = random.Random(seed)
+    events = []
+    for i in range(n):
+        impacts = [{"industry": rng.choice(pipeline.ALL_INDUSTRIES),
+                    "score": rng.choice([0.0, 0.1, -0.1, 0.25, round(rng.uniform(-1, 1), 4)]),
+                    "impact_type": "Neutral", "relevance": 0.5} for _ in range(rng.randint(0, 6))]
+        events.append({
+            "id": f"e{i}",
+            "timestamp": f"2025-12-01T{i % 24:02d}:00:00Z",
+            "source": rng.choice(["sri_lanka_news", "government_news", "weather"]),
+            "text": rng.choice(HEADLINES) + f" ({i})",
+            "thematic_category": rng.choice(pipeline.THEMATIC_CATEGORIES),
+            # Repeated scores exercise the stable ordering of ties
+            "opportunity_score": rng.choice([0.0, 0.3, -0.3, round(rng.uniform(-1, 1), 4)]),
+            "impacts": impacts,
+        })
+    return events
+
+
+# ---- reference: the original per-list passes ----
+def reference_national(events):
+    rows = []
+    for event in events:
+        if event.get('source') == 'weather':
+            continue
+        text = event.get('text', '')
+        if pipeline.classify_national_activity(text, event.get('thematic_category', '')):
+            rows.append({
+                "id": event.get('id'), "timestamp": event.get('timestamp'), "source": event.get('source'),
+                "headline": text[:200], "thematic_category": event.get('thematic_category', ''),
+                "top_industries_affected": [imp['industry'] for imp in event.get('impacts', [])[:3]],
+                "impact_score": event.get('opportunity_score', 0),
+            })
+    rows.sort(key=lambda x: abs(x.get('impact_score', 0)), reverse=True)
+    return rows
+
+
+def reference_operational(events):
+    rows = []
+    for event in events:
+        if event.get('source') == 'weather':
+            continue
+        text, impacts = event.get('text', ''), event.get('impacts', [])
+        if pipeline.classify_operational_environment(text, len(impacts)):
+            rows.append({
+                "id": event.get('id'), "timestamp": event.get('timestamp'), "source": event.get('source'),
+                "signal": text[:200], "thematic_category": event.get('thematic_category', ''),
+                "affected_industries_count": len([imp for imp in impacts if abs(imp.get('score', 0)) > 0.1]),
+                "top_affected_industries": [imp['industry'] for imp in impacts[:5]],
+                "overall_impact": event.get('opportunity_score', 0),
+            })
+    rows.sort(key=lambda x: x.get('affected_industries_count', 0), reverse=True)
+    return rows
+
+
+def reference_insights(events):
+    rows = []
+    for event in events:
+        text = event.get('text', '')
+        risk = pipeline.calculate_risk_score(event.get('opportunity_score', 0), text, event.get('impacts', []))
+        rows.append({
+            "id": event.get('id'), "timestamp": event.get('timestamp'), "source": event.get('source'),
+            "headline": text[:200], "thematic_category": event.get('thematic_category', ''),
+            **{k: risk[k] for k in ("risk_score", "risk_category", "risk_explanation", "opportunity_score",
+                                    "opportunity_category", "opportunity_explanation", "top_affected_industries")},
+        })
+    rows.sort(key=lambda x: max(x.get('risk_score', 0), x.get('opportunity_score', 0)), reverse=True)
+    return rows
+
+
+def dump(rows):
+    return json.dumps(rows, indent=2, ensure_ascii=False)
+
+
+def test_fused_pass_matches_reference():
+    for seed in range(5):
+        events = random_events(300, seed)
+        national, operational, insights = pipeline.build_indicators(events)
+        assert dump(national) == dump(reference_national(events))
+        assert dump(operational) == dump(reference_operational(events))
+        assert dump(insights) == dump(reference_insights(events))
+
+
+def test_wrappers_share_one_pass():
+    events = random_events(50)
+    calls = []
+    build = pipeline.build_indicators
+    pipeline.build_indicators = lambda ev: calls.append(1) or build(ev)
+    try:
+        indicators = pipeline.build_indicators(events)
+        pipeline.generate_national_indicators(events, indicators)
+        pipeline.generate_operational_indicators(events, indicators)
+        pipeline.generate_risk_opportunity_insights(events, indicators)
+        assert len(calls) == 1
+        # Without a prebuilt result each call sees the events as they are now
+        events[0]["opportunity_score"] = -events[0]["opportunity_score"] - 1.0
+        assert pipeline.generate_risk_opportunity_insights(events) == build(events)[2]
+        assert pipeline.generate_risk_opportunity_insights(events) != indicators[2]
+    finally:
+        pipeline.build_indicators = build
+
+
+if __name__ == "__main__":
+    test_fused_pass_matches_reference()
+    test_wrappers_share_one_pass()
+    print("[OK] indicators")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Check the Aho-Corasick KeywordMatcher against plain `keyword in text.lower()` scans"""
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+from engine.keyword_matcher import KeywordMatcher
+
+RULES = {
+    "utilities": ["power cut", "fuel", "water supply", "electricity"],
+    "disaster": ["flood", "cyclone", "landslide", "he"],
+    "economy": ["imf", "inflation", "rupee", "price", "prices", "she"],
+}
+
+
+def naive_hits(text):
+    lowered = text.lower()
+    return {c: {k for k in kws if k in lowered} for c, kws in RULES.items() if any(k in lowered for k in kws)}
+
+
+def test_matches_naive_scan():
+    matcher = KeywordMatcher(RULES)
+    rng = random.Random(7)
+    alphabet = "abcdefhilmnoprstuwyz "
+    keywords = [k for kws in RULES.values() for k in kws]
+    for _ in range(2000):
+        parts = [rng.choice(keywords) if rng.random() < 0.3 else "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 8)))
+                 for _ in range(rng.randint(0, 6))]
+        text = "".join(p.upper() if rng.random() < 0.2 else p for p in parts)
+        assert matcher.hits(text) == naive_hits(text), text
+        assert matcher.match_categories(text) == set(naive_hits(text)), text
+
+
+def test_overlapping_and_suffix_keywords():
+    matcher = KeywordMatcher(RULES)
+    # "ushers" holds "she" and "he" overlapping; "prices" holds "price" as a prefix
+    assert matcher.hits("USHERS") == {"disaster": {"he"}, "economy": {"she"}}
+    assert matcher.hits("Fuel prices up") == {"utilities": {"fuel"}, "economy": {"price", "prices"}}
+    assert matcher.hits("") == {}
+
+
+def test_first_category_follows_rule_order():
+    matcher = KeywordMatcher(RULES)
+    assert matcher.first_category("IMF warns of floods") == "disaster"
+    assert matcher.first_category("nothing relevant", default="Other") == "Other"
+    # Rebuilding from the same rules gives the same answers
+    assert KeywordMatcher(RULES).hits("power cut after cyclone") == matcher.hits("power cut after cyclone")
+
+
+if __name__ == "__main__":
+    test_matches_naive_scan()
+    test_overlapping_and_suffix_keywords()
+    test_first_category_follows_rule_order()
+    print("[OK] keyword matcher")
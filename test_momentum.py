@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Check incremental momentum state against brute-force statistics over the full series"""
+import calendar
+import math
+import random
+import statistics
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+from engine.momentum import (FAST, FAST_HALF_LIFE_HOURS, MEAN, SLOW, SLOW_HALF_LIFE_HOURS, SLOW_VAR, MomentumStats,
+                             _decay)
+
+START = datetime(2025, 11, 1)
+
+
+def make_snapshot(i: int, at: datetime, tea_scores, category_score=None):
+    events = [{"impacts": [{"industry": "Tea", "score": s, "impact_type": "Neutral"}]} for s in tea_scores]
+    if category_score is not None:
+        events.append({"thematic_category": "Economy", "opportunity_score": category_score, "impacts": []})
+    return {"snapshot_id": f"s{i}", "run_timestamp": at.strftime("%Y-%m-%dT%H:%M:%SZ"), "events": events}
+
+
+def ew_weights(times, half_life):
+    """Weight of each observation in the time-decayed average after the last one."""
+    alphas = [1.0] + [_decay((b - a) / 3600.0, half_life) for a, b in zip(times, times[1:])]
+    weights = []
+    for i, alpha in enumerate(alphas):
+        w = alpha
+        for later in alphas[i + 1:]:
+            w *= 1.0 - later
+        weights.append(w)
+    return weights
+
+
+def test_state_matches_brute_force(tmp_path: Path):
+    rng = random.Random(31)
+    stats = MomentumStats(tmp_path / "momentum.json")
+    at, times, values = START, [], []
+    for i in range(120):
+        # Irregular schedule: skipped runs and bursts
+        at += timedelta(minutes=rng.choice([20, 60, 60, 60, 180, 600]))
+        scores = [round(rng.uniform(-1, 1), 4) for _ in range(rng.randint(1, 4))]
+        assert stats.add_snapshot(make_snapshot(i, at, scores))
+        times.append(calendar.timegm(at.timetuple()))
+        values.append(sum(scores) / len(scores))
+        if i == 60:
+            # Persisted state continues exactly where it left off
+            stats.save()
+            stats = MomentumStats.load(tmp_path / "momentum.json")
+
+    state = stats.state["industry"]["Tea"]
+    described = stats.get("industry", "Tea")
+    assert described["runs"] == 120
+    assert math.isclose(state[MEAN], statistics.fmean(values), abs_tol=1e-9)
+    assert math.isclose(described["std"], round(statistics.stdev(values), 4), abs_tol=1e-4)
+    for index, half_life in ((FAST, FAST_HALF_LIFE_HOURS), (SLOW, SLOW_HALF_LIFE_HOURS)):
+        weights = ew_weights(times, half_life)
+        assert math.isclose(state[index], sum(w * v for w, v in zip(weights, values)), abs_tol=1e-9)
+    weights = ew_weights(times, SLOW_HALF_LIFE_HOURS)
+    slow = sum(w * v for w, v in zip(weights, values))
+    assert math.isclose(state[SLOW_VAR], sum(w * (v - slow) ** 2 for w, v in zip(weights, values)), abs_tol=1e-9)
+
+
+def test_idempotent_and_trend():
+    stats = MomentumStats(Path("unused.json"))
+    at = START
+    for i in range(48):
+        at += timedelta(hours=1)
+        snapshot = make_snapshot(i, at, [0.1 + 0.01 * (i % 3)], category_score=0.0)
+        assert stats.add_snapshot(snapshot)
+        assert not stats.add_snapshot(snapshot)
+    before = stats.get("industry", "Tea")["momentum"]
+    # A sustained jump lifts the fast average well above the baseline
+    for i in range(48, 60):
+        at += timedelta(hours=1)
+        stats.add_snapshot(make_snapshot(i, at, [0.8], category_score=0.0))
+    tea = stats.get("industry", "Tea")
+    assert tea["trend"] == "rising" and tea["momentum"] > max(before, 1.0)
+    assert stats.get("category", "Economy")["momentum"] == 0.0  # flat series: no variance
+    assert list(stats.summary()["industry"]) == ["Tea"]
+    assert not stats.add_snapshot(make_snapshot(0, START, [0.5]))  # older than applied_through
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        test_state_matches_brute_force(Path(tmp))
+    test_idempotent_and_trend()
+    print("[OK] momentum")
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Offline test of published outputs: precompressed siblings and atomic generations"""
+import gzip
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+from engine.publish import (GENERATIONS_DIRNAME, KEEP_GENERATIONS, PRECOMPRESSED_SUFFIXES, Generation, brotli,
+                            load_manifest, publish_json, resolve_output)
+
+PAYLOAD = {"events": [{"id": f"e{i}", "title": "Colombo port traffic ශ්‍රී ලංකා", "score": i / 10} for i in range(50)]}
+
+
+def test_precompressed_siblings_match(tmp_path: Path):
+    path = tmp_path / "live_output.json"
+    size = publish_json(path, PAYLOAD)
+    body = path.read_bytes()
+    assert size == len(body)
+    assert json.loads(body) == PAYLOAD
+    assert b"\n" not in body and b": " not in body  # minified
+
+    assert gzip.decompress(path.with_name("live_output.json.gz").read_bytes()) == body
+    br = path.with_name("live_output.json" + PRECOMPRESSED_SUFFIXES["br"])
+    if brotli is not None:
+        assert brotli.decompress(br.read_bytes()) == body
+    else:
+        assert not br.exists()
+
+    # Republishing replaces every variant; no temp files are left behind
+    publish_json(path, {"events": []})
+    assert gzip.decompress(path.with_name("live_output.json.gz").read_bytes()) == path.read_bytes()
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_generation_is_invisible_until_commit(tmp_path: Path):
+    first = Generation(tmp_path, "20251201T000000")
+    first.publish_json("live_output.json", {"run": 1})
+    first.commit({"snapshot_id": "s1"})
+
+    second = Generation(tmp_path, "20251201T010000")
+    second.publish_json("live_output.json", {"run": 2})
+    second.publish_json("risk_opportunity_insights.json", {"run": 2})
+    # Staged files are not resolved until the manifest names the generation
+    assert json.loads(resolve_output(tmp_path, "live_output.json").read_bytes()) == {"run": 1}
+    assert resolve_output(tmp_path, "risk_opportunity_insights.json") == tmp_path / "risk_opportunity_insights.json"
+
+    manifest = second.commit({"snapshot_id": "s2"})
+    assert load_manifest(tmp_path) == manifest
+    assert manifest["generation"] == "20251201T010000" and manifest["snapshot_id"] == "s2"
+    resolved = resolve_output(tmp_path, "live_output.json.gz")
+    assert resolved == tmp_path / GENERATIONS_DIRNAME / "20251201T010000" / "live_output.json.gz"
+    assert json.loads(gzip.decompress(resolved.read_bytes())) == {"run": 2}
+    # Plain output/ copies mirror the current generation
+    assert json.loads((tmp_path / "risk_opportunity_insights.json").read_bytes()) == {"run": 2}
+    assert not (tmp_path / GENERATIONS_DIRNAME / "20251201T010000.tmp").exists()
+
+
+def test_failed_write_keeps_previous_generation(tmp_path: Path):
+    first = Generation(tmp_path, "20251201T000000")
+    first.publish_json("live_output.json", {"run": 1})
+    first.publish_json("story_clusters.json", {"run": 1})
+    first.commit({"snapshot_id": "s1"})
+
+    second = Generation(tmp_path, "20251201T010000")
+    second.publish_json("live_output.json", {"run": 2})
+    try:
+        second.publish_json("story_clusters.json", {"run": object()})
+        assert False, "unserializable output was written"
+    except TypeError:
+        pass
+    try:
+        second.commit({"snapshot_id": "s2"})
+        assert False, "generation with a failed file was committed"
+    except RuntimeError:
+        pass
+    # Both files still come from the same (previous) run
+    assert load_manifest(tmp_path)["snapshot_id"] == "s1"
+    for name in ("live_output.json", "story_clusters.json"):
+        assert json.loads(resolve_output(tmp_path, name).read_bytes()) == {"run": 1}
+        assert json.loads((tmp_path / name).read_bytes()) == {"run": 1}
+
+
+def test_old_generations_are_pruned(tmp_path: Path):
+    for hour in range(KEEP_GENERATIONS + 3):
+        generation = Generation(tmp_path, f"20251201T{hour:02d}0000")
+        generation.publish_json("live_output.json", {"run": hour})
+        generation.commit({})
+    # An abandoned staging directory from a crashed run
+    Generation(tmp_path, "20251201T990000").publish_json("live_output.json", {"run": -1})
+    Generation(tmp_path, "20251202T000000").commit({})
+
+    names = sorted(d.name for d in (tmp_path / GENERATIONS_DIRNAME).iterdir())
+    assert names == [f"20251201T{h:02d}0000" for h in range(KEEP_GENERATIONS + 1, KEEP_GENERATIONS + 3)] + ["20251202T000000"]
+    assert load_manifest(tmp_path)["generation"] == "20251202T000000"
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        test_precompressed_siblings_match(Path(tmp))
+    for test in (test_generation_is_invisible_until_commit, test_failed_write_keeps_previous_generation,
+                 test_old_generations_are_pruned):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("[OK] publish")
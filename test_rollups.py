@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Offline test of time-series rollups: bucket aggregates, threshold typing and idempotent folding"""
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+from engine.constants import OPPORTUNITY_THRESHOLD, THREAT_THRESHOLD
+from engine.rollups import Rollups, observations
+
+
+def make_snapshot(ts: str, sid: str, scores):
+    events = [{
+        "thematic_category": "Economy",
+        "opportunity_score": score,
+        "impacts": [{"industry": "Tea", "score": (score or 0) / 2, "impact_type": "Opportunity" if (score or 0) > 0 else "Threat"}],
+    } for score in scores]
+    return {"snapshot_id": sid, "run_timestamp": ts, "events": events}
+
+
+def test_category_types_use_shared_thresholds():
+    snapshot = make_snapshot("2025-12-01T00:00:00Z", "a", [OPPORTUNITY_THRESHOLD, OPPORTUNITY_THRESHOLD + 0.01,
+                                                           THREAT_THRESHOLD, THREAT_THRESHOLD - 0.01, None])
+    kinds = [kind for dim, _, _, kind in observations(snapshot) if dim == "category"]
+    # Thresholds are exclusive; a missing score counts as 0
+    assert kinds == ["Neutral", "Opportunity", "Neutral", "Threat", "Neutral"]
+
+
+def test_buckets_and_idempotency(tmp_path: Path):
+    rollups = Rollups(tmp_path / "rollups.json")
+    first = make_snapshot("2025-12-01T00:00:00Z", "a", [0.4, -0.2])
+    second = make_snapshot("2025-12-01T01:00:00Z", "b", [0.1])
+    assert rollups.add_snapshot(first)
+    assert rollups.add_snapshot(second)
+    # Re-applied or older snapshots are ignored
+    assert not rollups.add_snapshot(first)
+    assert not rollups.add_snapshot(second)
+
+    hourly = rollups.query("category", "Economy", "hourly")
+    assert [(p["t"], p["count"]) for p in hourly] == [("2025-12-01T00:00Z", 2), ("2025-12-01T01:00Z", 1)]
+    daily = rollups.query("category", "Economy", "daily")
+    assert daily == [{"t": "2025-12-01", "count": 3, "mean": round(0.3 / 3, 4), "min": -0.2, "max": 0.4,
+                      "opportunity_ratio": round(2 / 3, 4), "threat_ratio": round(1 / 3, 4)}]
+    # 2025-12-01 is a Monday
+    assert rollups.query("industry", "Tea", "weekly")[0]["t"] == "2025-12-01"
+
+    rollups.save()
+    reloaded = Rollups.load(tmp_path / "rollups.json")
+    assert not reloaded.add_snapshot(second)
+    assert reloaded.query("category", "Economy", "daily") == daily
+
+
+if __name__ == "__main__":
+    test_category_types_use_shared_thresholds()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_buckets_and_idempotency(Path(tmp))
+    print("[OK] rollups")
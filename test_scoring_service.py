@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Offline test of the /score front end with a fake model: batching, coalescing, caching and load failure"""
+import http.client
+import json
+import sys
+import threading
+import time
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+import server
+from engine.scoring_service import ScoringService
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def load(self):
+        # Hold the first batch until the test has queued everything
+        self.release.wait(5)
+        return self.score
+
+    def score(self, texts):
+        self.calls.append(list(texts))
+        return [{"text": t, "length": len(t)} for t in texts]
+
+
+def run_concurrently(service, requests):
+    results, threads = [None] * len(requests), []
+    for i, texts in enumerate(requests):
+        def work(i=i, texts=texts):
+            results[i] = service.score(texts, timeout=5)
+        threads.append(threading.Thread(target=work))
+    for t in threads:
+        t.start()
+    return threads, results
+
+
+def test_batches_coalesces_and_caches():
+    model = FakeModel()
+    service = ScoringService(model.load, max_batch=8, max_wait=0.05)
+    threads, results = run_concurrently(service, [["a", "b"], ["b", "c"], ["a"], ["d", "e", "f"]])
+    while service.requests < 4:
+        time.sleep(0.01)
+    model.release.set()
+    for t in threads:
+        t.join()
+
+    assert [[r["text"] for r in res] for res in results] == [["a", "b"], ["b", "c"], ["a"], ["d", "e", "f"]]
+    # Every distinct text scored exactly once
+    scored = [t for call in model.calls for t in call]
+    assert sorted(scored) == ["a", "b", "c", "d", "e", "f"]
+    assert service.coalesced == 2
+
+    again = service.score(["c", "a"])
+    assert [r["cached"] for r in again] == [True, True]
+    stats = service.stats()
+    assert stats["ready"] and stats["cache_hits"] == 2 and stats["latency_ms"]["samples"] == 5
+
+
+def test_load_failure_fails_pending_and_rejects_new():
+    release = threading.Event()
+
+    def broken_load():
+        release.wait(5)
+        raise OSError("model files missing")
+
+    service = ScoringService(broken_load)
+    errors = []
+
+    def work():
+        try:
+            service.score(["a"], timeout=5)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=work) for _ in range(3)]
+    for t in threads:
+        t.start()
+    while service.requests < 3:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join(5)
+        assert not t.is_alive()
+    assert len(errors) == 3 and all("model files missing" in e for e in errors)
+    assert service._pending == {} and service._queue.empty()
+
+    # Later submissions fail fast and leave nothing behind
+    try:
+        service.score(["b"], timeout=5)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("submission accepted after load failure")
+    assert service._pending == {} and not service.ready
+
+
+def test_slow_batch_times_out():
+    release = threading.Event()
+
+    def slow_load():
+        def scorer(texts):
+            release.wait(5)
+            return [{"text": t} for t in texts]
+        return scorer
+
+    service = ScoringService(slow_load)
+    try:
+        service.score(["a"], timeout=0.1)
+    except TimeoutError:
+        pass
+    else:
+        raise AssertionError("slow batch did not time out")
+    release.set()
+    assert service.score(["a"], timeout=5)[0]["text"] == "a"
+
+
+class RaisingService:
+    def __init__(self, error):
+        self.error = error
+
+    def score(self, texts):
+        raise self.error
+
+
+def post(port, body: bytes, headers=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.putrequest("POST", "/api/score")
+    for name, value in (headers or {"Content-Length": str(len(body))}).items():
+        conn.putheader(name, value)
+    conn.endheaders(body)
+    response = conn.getresponse()
+    status, payload = response.status, json.loads(response.read())
+    conn.close()
+    return status, payload
+
+
+def test_score_endpoint_always_responds():
+    httpd = server.EvolveXServer(("127.0.0.1", 0), server.EvolveXHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    port = httpd.server_address[1]
+    original = server.SCORING
+    body = json.dumps({"text": "Fuel prices cut"}).encode("utf-8")
+    try:
+        server.SCORING = RaisingService(FuturesTimeoutError())
+        assert post(port, body) == (503, {"error": "Scoring timed out"})
+        server.SCORING = RaisingService(KeyError("industry_labels"))
+        assert post(port, body) == (500, {"error": "Scoring failed"})
+        # A negative length is rejected instead of blocking on rfile.read(-1)
+        assert post(port, b"", {"Content-Length": "-1"}) == (400, {"error": "Invalid Content-Length"})
+
+        server.SCORING = ScoringService(lambda: FakeModel().score)
+        status, payload = post(port, body)
+        assert status == 200 and payload["text"] == "Fuel prices cut" and not payload["cached"]
+    finally:
+        server.SCORING = original
+        httpd.shutdown()
+        httpd.server_close()
+
+
+if __name__ == "__main__":
+    test_batches_coalesces_and_caches()
+    test_load_failure_fails_pending_and_rejects_new()
+    test_slow_batch_times_out()
+    test_score_endpoint_always_responds()
+    print("[OK] scoring service")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Check search results against brute-force BM25, across segment merges, replays and concurrent readers"""
+import math
+import random
+import sys
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+from engine.event_query import parse_time
+from engine.search_index import (BM25_B, BM25_K1, MERGE_FACTOR, SearchIndex, _open_segments, parse_query)
+from engine.text_tokens import words
+
+START = datetime(2025, 12, 1)
+VOCABULARY = ("tea auction prices colombo port fuel cut rupee dollar cyclone ditwah floods death toll "
+              "central bank rates tourism arrivals the of in").split()
+# Drawn as single tokens so phrase queries have matches
+PHRASES = ["death toll", "tea auction prices", "colombo port", "port of colombo"]
+INDUSTRIES = ["Tea", "Construction", "Tourism & Hospitality"]
+QUERIES = ['"death toll" cyclone', '"colombo port"', "fuel cut", '"tea auction prices"', "rupee",
+           '"port of colombo"']
+
+
+def make_snapshots(n: int, seed: int = 11):
+    rng = random.Random(seed)
+    snapshots = []
+    for i in range(n):
+        ts = (START + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        events = [{"id": f"e{i}-{j}", "timestamp": ts, "source": "rss",
+                   "text": " ".join(rng.choice(VOCABULARY + PHRASES) for _ in range(rng.randint(3, 12))),
+                   "impacts": [{"industry": ind} for ind in rng.sample(INDUSTRIES, rng.randint(0, 2))]}
+                  for j in range(rng.randint(1, 6))]
+        events.append({"id": f"w{i}", "timestamp": ts, "source": "weather", "text": "Colombo port rain"})
+        snapshots.append({"snapshot_id": f"s{i}", "run_timestamp": ts, "events": events})
+    return snapshots
+
+
+def brute_force(snapshots, query, industry=None, limit=20):
+    docs = [(e["id"], parse_time(e["timestamp"]), words(e["text"]), {imp["industry"] for imp in e["impacts"]})
+            for s in snapshots for e in s["events"] if e["source"] != "weather"]
+    avg = sum(len(tokens) for _, _, tokens, _ in docs) / len(docs)
+
+    def tf(tokens, clause):
+        return sum(tokens[p:p + len(clause)] == clause for p in range(len(tokens)))
+
+    def idf(term):
+        df = sum(term in tokens for _, _, tokens, _ in docs)
+        return math.log(1.0 + (len(docs) - df + 0.5) / (df + 0.5))
+
+    clauses = parse_query(query)
+    matches = []
+    for event_id, at, tokens, industries in docs:
+        if industry and industry not in industries:
+            continue
+        counts = [tf(tokens, clause) for clause in clauses]
+        if not all(counts):
+            continue
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * len(tokens) / avg)
+        score = sum(sum(idf(t) for t in clause) * c * (BM25_K1 + 1.0) / (c + norm) for clause, c in zip(clauses, counts))
+        matches.append((score, at, event_id))
+    matches.sort(reverse=True)
+    return len(matches), [(event_id, round(score, 4), at) for score, at, event_id in matches[:limit]]
+
+
+def assert_search_matches(index, snapshots):
+    reader = index.reader()
+    for query in QUERIES:
+        for industry in (None, "Tea"):
+            found = reader.search(query, {"industry": industry})
+            total, expected = brute_force(snapshots, query, industry)
+            assert not found["truncated"] and found["total"] == total, query
+            assert found["results"] == expected, query
+
+
+def test_bm25_across_merges(tmp_path: Path):
+    snapshots = make_snapshots(40)
+    index = SearchIndex(tmp_path / "search")
+    for snapshot in snapshots[:20]:
+        assert index.append(snapshot)
+    # Merges keep O(log N) segments
+    assert len(index.meta["segments"]) < MERGE_FACTOR
+    assert_search_matches(index, snapshots[:20])
+
+    reopened = SearchIndex(tmp_path / "search")
+    assert reopened.append_many(snapshots) == 20
+    assert reopened.append_many(snapshots) == 0  # replayed runs are skipped
+    assert len(reopened) == sum(len(s["events"]) - 1 for s in snapshots)
+    assert_search_matches(reopened, snapshots)
+    # Files of merged-away segments are gone
+    live = {s["name"] for s in reopened.meta["segments"]}
+    assert {p.name.split(".")[0] for p in (tmp_path / "search").glob("seg-*")} == live
+
+    with_phrase = reopened.reader().search('"port colombo"')
+    assert with_phrase["total"] == reopened.reader().search('"port of colombo"')["total"]
+
+
+def test_reappearing_events_and_interrupted_append(tmp_path: Path):
+    snapshots = make_snapshots(3)
+    index = SearchIndex(tmp_path / "search")
+    index.append_many(snapshots[:2])
+    # The next run re-emits the previous run's events alongside its own
+    index.append(dict(snapshots[2], events=snapshots[1]["events"] + snapshots[2]["events"]))
+    assert len(index) == sum(len(s["events"]) - 1 for s in snapshots)
+
+    # Past the horizon the same ids are indexed again, but each is returned once
+    later = (START + timedelta(days=8)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    index.append(dict(snapshots[0], snapshot_id="s-later", run_timestamp=later))
+    assert len(index) == sum(len(s["events"]) - 1 for s in snapshots) + len(snapshots[0]["events"]) - 1
+    text = snapshots[0]["events"][0]["text"]
+    ids = [eid for eid, _, _ in index.reader().search(text, limit=100)["results"]]
+    assert len(ids) == len(set(ids)) and snapshots[0]["events"][0]["id"] in ids
+
+    # Segment files meta.json does not list are removed by the next append
+    (tmp_path / "search" / "seg-999999.post").write_bytes(b"\0" * 8)
+    index.append(dict(snapshots[1], snapshot_id="s-later-2", run_timestamp=later))
+    assert not (tmp_path / "search" / "seg-999999.post").exists()
+
+
+def test_concurrent_readers_share_segments(tmp_path: Path):
+    snapshots = make_snapshots(12)
+    index = SearchIndex(tmp_path / "search")
+    index.append_many(snapshots[:6])
+    index.reader()
+    index.append_many(snapshots)
+    readers = []
+    threads = [threading.Thread(target=lambda: readers.append(SearchIndex(tmp_path / "search").reader()))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(readers) == 8
+    assert all([id(s) for s in r.segments] == [id(s) for s in readers[0].segments] for r in readers)
+    assert sum(p.parent == tmp_path / "search" for p in _open_segments) == len(index.meta["segments"])
+
+
+if __name__ == "__main__":
+    for test in (test_bm25_across_merges, test_reappearing_events_and_interrupted_append,
+                 test_concurrent_readers_share_segments):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("[OK] search index")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Offline test of the /api/stream broadcaster: catch-up, Last-Event-ID resume and dropped subscribers"""
+import json
+import socket
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+from server import SnapshotBroadcaster
+
+
+def publish(marker: Path, snapshot_id: str):
+    marker.write_text(json.dumps({"snapshot_id": snapshot_id, "events_count": 3}), encoding="utf-8")
+
+
+def received(sock) -> str:
+    sock.settimeout(1)
+    return sock.recv(65536).decode("utf-8")
+
+
+def test_subscribe_and_broadcast(tmp_path: Path):
+    marker = tmp_path / "last_publish.json"
+    broadcaster = SnapshotBroadcaster(marker)
+    # Nothing published yet: a subscriber only gets the retry hint
+    server_a, client_a = socket.socketpair()
+    broadcaster.subscribe(server_a)
+    assert received(client_a) == "retry: 3000\n\n"
+
+    publish(marker, "snap-1")
+    assert broadcaster._poll()
+    assert not broadcaster._poll()  # unchanged marker is not re-sent
+    broadcaster.broadcast(broadcaster._current[1])
+    message = received(client_a)
+    assert message.startswith("id: snap-1\nevent: snapshot\ndata: ")
+    assert json.loads(message.split("data: ", 1)[1])["snapshot_id"] == "snap-1"
+
+    # Late subscribers are caught up, unless they already saw the current snapshot
+    server_b, client_b = socket.socketpair()
+    broadcaster.subscribe(server_b)
+    assert "id: snap-1\n" in received(client_b)
+    server_c, client_c = socket.socketpair()
+    broadcaster.subscribe(server_c, last_event_id="snap-1")
+    assert received(client_c) == "retry: 3000\n\n"
+    assert len(broadcaster) == 3
+
+    # A closed peer is dropped on the next send; the others still get it
+    client_b.close()
+    broadcaster.broadcast(b": ping\n\n")
+    broadcaster.broadcast(b": ping\n\n")
+    assert len(broadcaster) == 2
+    assert received(client_c) == ": ping\n\n: ping\n\n"
+    for sock in (server_a, client_a, server_c, client_c):
+        sock.close()
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        test_subscribe_and_broadcast(Path(tmp))
+    print("[OK] snapshot stream")
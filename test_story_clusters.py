@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Offline test of online story clustering: grouping, incremental centroids, eviction and reload"""
+import math
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+from engine.event_table import EventRecord
+from engine import story_clusters
+from engine.story_clusters import StoryClusters
+
+HEADLINES = [
+    ("a1", "rss", "Cyclone Ditwah death toll rises to 643 as floods hit Colombo"),
+    ("a2", "google_news", "Cyclone Ditwah: death toll rises to 643, floods hit Colombo - EconomyNext"),
+    ("a3", "gdelt", "Sri Lanka cyclone Ditwah death toll rises to 643"),
+    ("b1", "rss", "Central Bank holds policy rates steady for third meeting"),
+    ("b2", "gdelt", "Central Bank holds policy rates steady"),
+    ("c1", "rss", "Tea exports rise to record as tourism arrivals grow"),
+]
+
+
+def record(event_id, source, text, score=0.1):
+    return EventRecord.from_dict({"id": event_id, "source": source, "text": text, "thematic_category": "Economy",
+                                  "opportunity_score": score,
+                                  "impacts": [{"industry": "Tea", "score": score, "impact_type": "Neutral",
+                                               "relevance": 0.5}]})
+
+
+def add_all(clusters, items):
+    return {eid: clusters.add(record(eid, src, text), 0.2, 0.1, f"2025-12-01T0{i}:00:00Z")
+            for i, (eid, src, text) in enumerate(items)}
+
+
+def assert_centroids_consistent(clusters):
+    for story in clusters.stories.values():
+        total = {}
+        for member in story.members.values():
+            for i, w in member.vector.items():
+                total[i] = total.get(i, 0.0) + w
+        assert all(math.isclose(story.centroid.get(i, 0.0), w, abs_tol=1e-9) for i, w in total.items())
+        assert math.isclose(story.norm2, sum(w * w for w in total.values()), rel_tol=1e-9, abs_tol=1e-9)
+
+
+def test_near_duplicates_share_a_story(tmp_path: Path):
+    clusters = StoryClusters(tmp_path / "story_index.json")
+    assigned = add_all(clusters, HEADLINES)
+    assert assigned["a1"] == assigned["a2"] == assigned["a3"]
+    assert assigned["b1"] == assigned["b2"]
+    assert len({assigned["a1"], assigned["b1"], assigned["c1"]}) == 3
+    assert_centroids_consistent(clusters)
+
+    top = clusters.summaries()[0]
+    assert top["size"] == 3 and top["sources"] == ["gdelt", "google_news", "rss"]
+    assert top["first_seen"] == "2025-12-01T00:00:00Z" and top["last_seen"] == "2025-12-01T02:00:00Z"
+
+    # Re-adding an event moves it rather than duplicating it
+    clusters.add(record("a2", "google_news", HEADLINES[1][2], score=0.5), 0.2, 0.1, "2025-12-01T09:00:00Z")
+    assert len(clusters.members) == len(HEADLINES) and clusters.story_of("a2").id == assigned["a1"]
+
+    clusters.save()
+    # Loading refills the LSH buckets from the stored min-hashes instead of hashing every member again
+    min_hashes = story_clusters.min_hashes
+    story_clusters.min_hashes = None
+    try:
+        reloaded = StoryClusters.load(tmp_path / "story_index.json")
+    finally:
+        story_clusters.min_hashes = min_hashes
+    assert reloaded.buckets == clusters.buckets
+    assert {eid: reloaded.story_of(eid).id for eid in assigned} == assigned
+    assert reloaded.next_id == clusters.next_id
+    # New near-duplicates still find the reloaded story through the LSH index
+    assert reloaded.add(record("a4", "rss", "Ditwah death toll rises to 643 as floods hit Colombo"),
+                        0.2, 0.1, "2025-12-01T10:00:00Z") == assigned["a1"]
+
+
+def test_eviction_undoes_every_addition(tmp_path: Path):
+    clusters = StoryClusters(tmp_path / "story_index.json")
+    assigned = add_all(clusters, HEADLINES)
+    clusters.remove("a2")
+    clusters.remove("missing")
+    assert len(clusters.stories[assigned["a1"]].members) == 2
+    assert_centroids_consistent(clusters)
+    for eid, _, _ in HEADLINES:
+        clusters.remove(eid)
+    assert clusters.stories == {} and clusters.members == {}
+    assert clusters.buckets == {} and clusters.df == {}
+
+
+if __name__ == "__main__":
+    for test in (test_near_duplicates_share_a_story, test_eviction_undoes_every_addition):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("[OK] story clusters")
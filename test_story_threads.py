@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Offline test of story threads: MinHash threading across runs, replays, reload and archiving closed threads"""
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+from engine.story_threads import HORIZON_DAYS, StoryThreads, load_archive
+
+START = datetime(2025, 12, 1)
+
+RUNS = [
+    [("a1", "Cyclone Ditwah death toll rises to 643 as floods hit Colombo"),
+     ("b1", "Central Bank holds policy rates steady for third meeting")],
+    [("a2", "Cyclone Ditwah death toll rises to 650 as floods hit Colombo"),
+     ("c1", "Tea exports rise to record as tourism arrivals grow")],
+    [("a3", "Ditwah death toll rises to 650, floods recede in Colombo"),
+     ("b2", "Central Bank holds policy rates steady")],
+]
+
+
+def make_snapshot(i: int, at: datetime, events):
+    return {"snapshot_id": f"s{i}", "run_timestamp": at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "events": [{"id": eid, "source": "rss", "text": text, "opportunity_score": 0.1 * (i + 1)}
+                       for eid, text in events]}
+
+
+def test_threads_follow_a_story(tmp_path: Path):
+    path = tmp_path / "story_threads.json"
+    threads = StoryThreads(path)
+    snapshots = [make_snapshot(i, START + timedelta(hours=i), events) for i, events in enumerate(RUNS)]
+    threads.add_snapshot(snapshots[0])
+    threads.save()
+
+    # Threading continues from the persisted state and its rebuilt LSH buckets
+    threads = StoryThreads.load(path)
+    roots = set()
+    for snapshot in snapshots[1:]:
+        roots |= threads.add_snapshot(snapshot)
+    assert threads.find("a1") == threads.find("a2") == threads.find("a3")
+    assert threads.find("b1") == threads.find("b2") != threads.find("a1")
+    assert threads.find("c1") == "c1"
+
+    active = threads.active(roots)
+    assert [t["size"] for t in active] == [3, 2]
+    ditwah = active[0]
+    assert [e["id"] for e in ditwah["timeline"]] == ["a1", "a2", "a3"]
+    assert [round(t["mean_score"], 1) for t in ditwah["trajectory"]] == [0.1, 0.2, 0.3]
+
+    # Replaying a run, or an older one, changes nothing
+    before = (dict(threads.parent), {k: list(v) for k, v in threads.threads.items()})
+    assert threads.add_snapshot(snapshots[2]) == set()
+    assert threads.add_snapshot(snapshots[0]) == set()
+    assert (threads.parent, threads.threads) == before
+
+    # Weather readings are not threaded
+    weather = make_snapshot(3, START + timedelta(hours=3), [("w1", "Colombo 29C light rain")])
+    weather["events"][0]["source"] = "weather"
+    assert threads.add_snapshot(weather) == set() and threads.find("w1") is None
+
+
+def test_closed_threads_are_archived(tmp_path: Path):
+    path = tmp_path / "story_threads.json"
+    threads = StoryThreads(path)
+    for i, events in enumerate(RUNS):
+        threads.add_snapshot(make_snapshot(i, START + timedelta(hours=i), events))
+    root = threads.find("a1")
+
+    later = START + timedelta(days=HORIZON_DAYS, hours=5)
+    assert threads.add_snapshot(make_snapshot(9, later, [("d1", "Parliament debates budget proposals")])) == {"d1"}
+    assert threads.find("a1") is None and set(threads.threads) == {"d1"}
+    assert list(threads.recent) == ["d1"]
+    archived = load_archive(threads.archive_path)
+    assert [e[1] for e in archived["a3"]] == ["a1", "a2", "a3"] and root in archived
+
+    # A replay of an archived run does not reopen its threads
+    threads.save()
+    threads = StoryThreads.load(path)
+    assert threads.add_snapshot(make_snapshot(0, START, RUNS[0])) == set()
+    assert set(threads.threads) == {"d1"}
+
+
+if __name__ == "__main__":
+    for test in (test_threads_follow_a_story, test_closed_threads_are_archived):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("[OK] story threads")
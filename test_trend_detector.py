@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Offline test of count-min burst detection: estimates, bucket dedup, baselines and emerging topics"""
+import random
+import sys
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.append(str(ROOT))
+
+import pipeline
+from engine.canonical_urls import CanonicalUrlIndex
+from engine.event_store import EventStore
+from engine.trend_detector import MIN_COUNT, TrendDetector, headline_terms
+
+HOUR = 3600.0
+START = 1_764_547_200.0  # 2025-12-01T00:00:00Z
+
+BACKGROUND = [
+    "Tea auction prices steady in Colombo",
+    "Central Bank holds policy rates",
+    "Parliament debates budget proposals",
+    "Tourism arrivals rise in November",
+    "Rupee steady against dollar",
+    "Apparel exporters seek new markets",
+    "Port city investment talks continue",
+    "Fuel prices unchanged this month",
+]
+BURST = [
+    "Cyclone Ditwah floods Colombo suburbs",
+    "Cyclone Ditwah death toll rises",
+    "Relief flights as Cyclone Ditwah hits east",
+    "Schools closed ahead of Cyclone Ditwah",
+    "Cyclone Ditwah disrupts tea estates",
+    "Power cuts after Cyclone Ditwah landfall",
+]
+
+
+def test_estimates_never_undercount():
+    rng = random.Random(41)
+    detector = TrendDetector(Path("unused.json"))
+    truth = Counter()
+    for i in range(400):
+        text = " ".join(rng.choice(["flood", "tea", "port", "rupee", "budget", "power", "strike"]) for _ in range(4))
+        text += f" item{i}"
+        assert detector.observe(text, "rss", START)
+        truth.update(headline_terms(text))
+    for term, count in truth.items():
+        estimate = detector._estimate(detector.current, term)
+        assert estimate >= count
+    # With a few hundred distinct terms in 4 x 4096 cells, collisions are rare
+    exact = sum(detector._estimate(detector.current, t) == c for t, c in truth.items())
+    assert exact >= 0.95 * len(truth)
+
+
+def test_burst_surfaces_as_one_topic(tmp_path: Path):
+    detector = TrendDetector(tmp_path / "trend_sketch.json")
+    for hour in range(30):
+        at = START + hour * HOUR
+        for text in BACKGROUND:
+            assert detector.observe(text, "rss", at)
+            # Repeated runs within the hour see the same headlines again
+            assert not detector.observe(text, "gdelt", at + 600)
+    assert detector.emerging() == []
+    detector.save()
+
+    detector = TrendDetector.load(tmp_path / "trend_sketch.json")
+    at = START + 30 * HOUR
+    for text in BACKGROUND:
+        detector.observe(text, "rss", at)
+    for i, text in enumerate(BURST):
+        detector.observe(text, "rss" if i % 2 else "google_news", at)
+    topics = detector.emerging()
+    assert topics, "burst not detected"
+    top = topics[0]
+    assert top["term"] == "cyclone ditwah" and top["kind"] == "phrase"
+    assert top["count"] == len(BURST) >= MIN_COUNT and top["baseline"] == 0.0
+    assert top["sources"] == ["google_news", "rss"]
+    # Steady background terms do not burst
+    assert all(t["term"] not in ("tea", "colombo") for t in topics)
+
+    summary = detector.summary()
+    assert summary["bucket_start"] == "2025-12-02T06:00:00Z"
+    assert summary["baseline_buckets"] == 30 and summary["headlines"] == len(BACKGROUND) + len(BURST)
+
+
+def test_baseline_tracks_steady_counts():
+    detector = TrendDetector(Path("unused.json"))
+    for hour in range(200):
+        detector.observe(f"Rupee steady against dollar {hour % 2}", "rss", START + hour * HOUR)
+    detector.observe("flush", "rss", START + 200 * HOUR)
+    assert abs(detector._estimate(detector.baseline, "w:rupee") - 1.0) < 0.01
+    # Empty hours decay the baseline
+    detector.observe("flush again", "rss", START + 224 * HOUR)
+    assert abs(detector._estimate(detector.baseline, "w:rupee") - 0.5) < 0.02
+
+
+def test_repeat_coverage_is_counted(tmp_path: Path):
+    detector = TrendDetector(tmp_path / "trend_sketch.json")
+    url_index = CanonicalUrlIndex(tmp_path / "canonical_url_index.json")
+    first = {"title": "Cyclone Ditwah floods Colombo suburbs", "link": "https://www.dailymirror.lk/news/ditwah/1"}
+    # The same article through another feed: known URL, different headline text
+    repeat = {"title": "Cyclone Ditwah floods Colombo suburbs - Daily Mirror",
+              "link": "https://dailymirror.lk/news/ditwah/1?utm_source=google"}
+    # Already processed, so neither item reaches the models
+    cache = {pipeline.get_text_hash(first["title"])}
+    store, pipeline.EVENT_STORE = pipeline.EVENT_STORE, EventStore(tmp_path / "events.db")
+    try:
+        assert pipeline.process_news_list([first], "rss", cache, url_index, detector) == []
+        assert pipeline.process_news_list([repeat], "google_news", cache, url_index, detector) == []
+    finally:
+        pipeline.EVENT_STORE = store
+    assert len(url_index) == 1
+    for term in headline_terms(first["title"]):
+        assert detector._estimate(detector.current, term) >= 2, term
+        assert detector.candidates[term] == {"rss", "google_news"}, term
+
+
+if __name__ == "__main__":
+    test_estimates_never_undercount()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_burst_surfaces_as_one_topic(Path(tmp))
+    test_baseline_tracks_steady_counts()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_repeat_coverage_is_counted(Path(tmp))
+    print("[OK] trend detector")
@@ -1,6 +1,12 @@
 export const LIVE_JSON_PATH = "http://localhost:8000/output/live_output.json";
 export const HISTORY_JSONL_PATH = "http://localhost:8000/history/hourly_history.jsonl";
+// Segmented history API: ?last=N or ?from=ISO&to=ISO, returns JSONL
+export const HISTORY_API_PATH = "http://localhost:8000/api/history";
+// Precomputed per-industry / per-category rollups
+export const TIMESERIES_API_PATH = "http://localhost:8000/api/timeseries";
 
 // 1 hour
 export const REFRESH_INTERVAL_MS = 3600000;
 
+// Server-Sent Events: one `snapshot` event per pipeline publish
+export const STREAM_API_PATH = "http://localhost:8000/api/stream";
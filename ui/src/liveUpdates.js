@@ -0,0 +1,43 @@
+import { STREAM_API_PATH } from "./config";
+
+// Used only where EventSource is unavailable
+const FALLBACK_POLL_MS = 60000;
+
+// One EventSource shared by every mounted page
+const listeners = new Set();
+let source = null;
+let lastSnapshotId = null;
+
+function openStream() {
+  source = new EventSource(STREAM_API_PATH);
+  source.addEventListener("snapshot", (e) => {
+    let info = null;
+    try {
+      info = JSON.parse(e.data);
+    } catch (err) {
+      console.error("Bad snapshot event:", err);
+    }
+    // Reconnects may replay the snapshot we already handled
+    if (info && info.snapshot_id === lastSnapshotId) return;
+    lastSnapshotId = info ? info.snapshot_id : null;
+    listeners.forEach((listener) => listener(info));
+  });
+}
+
+// Call `listener(info)` whenever the pipeline publishes a new snapshot.
+// Returns an unsubscribe function, so it can be returned from useEffect.
+export function subscribeSnapshots(listener) {
+  if (typeof EventSource === "undefined") {
+    const interval = setInterval(() => listener(null), FALLBACK_POLL_MS);
+    return () => clearInterval(interval);
+  }
+  listeners.add(listener);
+  if (!source) openStream();
+  return () => {
+    listeners.delete(listener);
+    if (listeners.size === 0 && source) {
+      source.close();
+      source = null;
+    }
+  };
+}
@@ -1,12 +1,13 @@
 import React, { useState, useEffect, useMemo } from 'react';
 import { Search, ChevronDown, TrendingUp, TrendingDown, Calendar } from 'lucide-react';
-import { HISTORY_JSONL_PATH } from '../config';
+import { LIVE_JSON_PATH, TIMESERIES_API_PATH } from '../config';
 import { INDUSTRIES } from '../constants';
 import clsx from 'clsx';
 import dayjs from 'dayjs';
 
 const Analysis = () => {
-    const [rawData, setRawData] = useState([]);
+    const [series, setSeries] = useState({});
+    const [liveEvents, setLiveEvents] = useState([]);
     const [loading, setLoading] = useState(true);
     const [selectedIndustry, setSelectedIndustry] = useState(null);
     const [searchTerm, setSearchTerm] = useState('');
@@ -14,48 +15,23 @@ const Analysis = () => {
     useEffect(() => {
         const fetchData = async () => {
             try {
-                const response = await fetch(HISTORY_JSONL_PATH);
-                if (!response.ok) throw new Error('Failed to fetch history');
-                const text = await response.text();
-
-                // Parse JSONL and flatten events
-                const parsedData = text.trim().split('\n').flatMap(line => {
-                    try {
-                        const snapshot = JSON.parse(line);
-                        if (!snapshot || !snapshot.events) return [];
-
-                        return snapshot.events.flatMap(event => {
-                            const baseEvent = {
-                                ...event,
-                                timestamp: event.timestamp || snapshot.run_timestamp
-                            };
-
-                            // Handle new multi-industry format
-                            if (event.impacts && Array.isArray(event.impacts)) {
-                                return event.impacts.map(impact => ({
-                                    ...baseEvent,
-                                    industry: impact.industry,
-                                    score: impact.score,
-                                    impact_type: impact.impact_type
-                                }));
-                            }
-
-                            // Fallback for old format
-                            return [{
-                                ...baseEvent,
-                                industry: event.category || 'General',
-                                score: event.opportunity_score || 0
-                            }];
-                        });
-                    } catch (e) {
-                        return [];
-                    }
-                });
-
-                setRawData(parsedData);
+                // Precomputed hourly rollups (a few KB regardless of history length)
+                // plus the live window for recent headlines
+                const [seriesRes, liveRes] = await Promise.all([
+                    fetch(`${TIMESERIES_API_PATH}?dimension=industry&resolution=hourly&last=50`),
+                    fetch(LIVE_JSON_PATH)
+                ]);
+                if (!seriesRes.ok) throw new Error('Failed to fetch time series');
+                const seriesJson = await seriesRes.json();
+                setSeries(seriesJson.series || {});
+
+                if (liveRes.ok) {
+                    const live = await liveRes.json();
+                    setLiveEvents(live.events || []);
+                }
             } catch (err) {
                 console.error(err);
-                setRawData([]);
+                setSeries({});
             } finally {
                 setLoading(false);
             }
@@ -74,30 +50,26 @@ const Analysis = () => {
         }
     }, [industries, selectedIndustry]);
 
-    // Filter data for chart
+    // Hourly mean impact score for the selected industry
     const chartData = useMemo(() => {
         if (!selectedIndustry) return [];
-        const filtered = rawData
-            .filter(d => (d.industry || 'General') === selectedIndustry)
-            .sort((a, b) => new Date(a.timestamp) - new Date(b.timestamp));
-
-        // Aggregate by hour/time to avoid too many points
-        // For simplicity, we'll take the last 50 points
-        return filtered.slice(-50).map(d => ({
-            time: dayjs(d.timestamp).format('HH:mm'),
-            fullDate: dayjs(d.timestamp).format('MMM D, HH:mm'),
-            score: parseFloat(d.score)
+        return (series[selectedIndustry] || []).map(p => ({
+            time: dayjs(p.t).format('HH:mm'),
+            fullDate: dayjs(p.t).format('MMM D, HH:mm'),
+            score: p.mean
         }));
-    }, [rawData, selectedIndustry]);
+    }, [series, selectedIndustry]);
 
     // Get top news for selected industry
     const topNews = useMemo(() => {
         if (!selectedIndustry) return [];
-        return rawData
-            .filter(d => (d.industry || 'General') === selectedIndustry)
+        return liveEvents
+            .flatMap(event => (event.impacts || [])
+                .filter(impact => impact.industry === selectedIndustry)
+                .map(impact => ({ ...event, score: impact.score })))
             .sort((a, b) => new Date(b.timestamp) - new Date(a.timestamp)) // Newest first
             .slice(0, 5);
-    }, [rawData, selectedIndustry]);
+    }, [liveEvents, selectedIndustry]);
 
     const filteredIndustries = industries.filter(ind =>
         ind.toLowerCase().includes(searchTerm.toLowerCase())
@@ -1,5 +1,6 @@
 import React, { useEffect, useMemo, useState } from "react";
-import { HISTORY_JSONL_PATH } from "../config";
+import { HISTORY_API_PATH } from "../config";
+import { subscribeSnapshots } from "../liveUpdates";
 import { Line } from "react-chartjs-2";
 
 import {
@@ -24,7 +25,7 @@ export default function History() {
   const loadHistory = async () => {
     setLoading(true);
     try {
-      const res = await fetch(HISTORY_JSONL_PATH + "?t=" + Date.now());
+      const res = await fetch(`${HISTORY_API_PATH}?last=${rangeLimit}`);
       const text = await res.text();
       const lines = text.trim().split("\n").filter(Boolean);
       const parsed = lines.map((line) => JSON.parse(line));
@@ -38,14 +39,17 @@ export default function History() {
 
   useEffect(() => {
     loadHistory();
-  }, []);
+  }, [rangeLimit]);
+
+  // reload when the pipeline publishes a new snapshot
+  useEffect(() => subscribeSnapshots(() => loadHistory()), [rangeLimit]);
 
   // allow charts to reload on demand
   useEffect(() => {
     const listener = () => loadHistory();
     window.addEventListener("evolvex:reload", listener);
     return () => window.removeEventListener("evolvex:reload", listener);
-  }, []);
+  }, [rangeLimit]);
 
   // Extract all industries that appear anywhere
   const industries = useMemo(() => {
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { TrendingUp, TrendingDown, Activity, AlertTriangle } from 'lucide-react';
 import { LIVE_JSON_PATH } from '../config';
 import clsx from 'clsx';
+import { subscribeSnapshots } from '../liveUpdates';
 
 const Home = () => {
   const [data, setData] = useState([]);
@@ -55,8 +56,8 @@ const Home = () => {
     };
 
     fetchData();
-    const interval = setInterval(fetchData, 60000);
-    return () => clearInterval(interval);
+    // Refetch when the pipeline publishes (unchanged files come back as 304)
+    return subscribeSnapshots(fetchData);
   }, []);
 
   if (loading) return <div className="p-10 text-center">Loading dashboard...</div>;
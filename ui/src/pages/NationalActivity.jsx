@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { AlertTriangle, TrendingUp, Activity, Calendar, Target } from 'lucide-react';
 import clsx from 'clsx';
+import { subscribeSnapshots } from '../liveUpdates';
 
 const API_PATH = window.location.origin.replace(':5173', ':8000');
 const NATIONAL_INDICATORS_PATH = `${API_PATH}/output/national_activity_indicators.json`;
@@ -27,8 +28,8 @@ const NationalActivity = () => {
         };
 
         fetchData();
-        const interval = setInterval(fetchData, 60000); // Refresh every minute
-        return () => clearInterval(interval);
+        // Refetch when the pipeline publishes (unchanged files come back as 304)
+        return subscribeSnapshots(fetchData);
     }, []);
 
     if (loading) return <div className="p-10 text-center">Loading national indicators...</div>;
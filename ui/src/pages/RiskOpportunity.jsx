@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { AlertTriangle, TrendingUp, Calendar, Shield, DollarSign } from 'lucide-react';
 import clsx from 'clsx';
+import { subscribeSnapshots } from '../liveUpdates';
 
 const API_PATH = window.location.origin.replace(':5173', ':8000');
 const RISK_OPP_PATH = `${API_PATH}/output/risk_opportunity_insights.json`;
@@ -28,8 +29,8 @@ const RiskOpportunity = () => {
         };
 
         fetchData();
-        const interval = setInterval(fetchData, 60000);
-        return () => clearInterval(interval);
+        // Refetch when the pipeline publishes (unchanged files come back as 304)
+        return subscribeSnapshots(fetchData);
     }, []);
 
     if (loading) return <div className="p-10 text-center">Loading risk/opportunity insights...</div>;